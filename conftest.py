@@ -0,0 +1 @@
+# Lets tests import the `src` package from the repository root
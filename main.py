@@ -2,48 +2,89 @@ import logging
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import psycopg2
 import uvicorn
 from dotenv import load_dotenv
 from pathlib import Path
 import subprocess
 
+from src.auth.developers import login_with_github
+from src.auth.device_flow import init_device_flow, shutdown_device_flow
+from src.auth.github import init_github_client, shutdown_github_client
+from src.auth.token_cache import init_token_cache, shutdown_token_cache
+from src.cache.responses import init_response_cache
+from src.config import AppData
+from src.database.migrations import migrate
+from src.database.notifications import get_notification_listener, shutdown_notification_listener
+from src.downloads.pipeline import init_download_pipeline, shutdown_download_pipeline
+from src.endpoints import auth, developers, health, logos, mods, resolve, updates
+from src.env import env_float
+from src.index.dependency_graph import (
+    load_dependency_graph,
+    start_dependency_graph_refresh,
+    stop_dependency_graph_refresh,
+    watch_dependency_graph,
+)
+from src.index.mod_listing import (
+    load_mod_listing_index,
+    start_mod_listing_refresh,
+    stop_mod_listing_refresh,
+    watch_mod_listing,
+)
+from src.ingest.pool import init_pool, shutdown_pool
+from src.storage.artifacts import init_artifact_store
+from src.storage.logos import init_logo_store, watch_logo_pointers
+from src.types.api import ApiError, ApiJSONResponse, api_exception_handler
+from src.webhook.dispatcher import init_webhook_dispatcher, shutdown_webhook_dispatcher
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-DB_CONFIG = {
-    "dbname": os.getenv("DB_NAME"),
-    "user": os.getenv("DB_USER"),
-    "password": os.getenv("DB_PASSWORD"),
-    "host": os.getenv("DB_HOST"),
-    "port": os.getenv("DB_PORT")
-}
+async def load_indexes(data: AppData):
+    async with data.db().acquire() as conn:
+        await load_dependency_graph(conn)
+        await load_mod_listing_index(conn)
+    start_mod_listing_refresh(data.db(), env_float("LISTING_REFRESH_INTERVAL", 60))
+    start_dependency_graph_refresh(data.db(), env_float("DEPENDENCY_GRAPH_REFRESH_INTERVAL", 300))
 
-def connect_db():
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        logger.info("Database connection established")
-        return conn, cursor
-    except Exception as e:
-        logger.error(f"Error connecting to database: {e}")
-        return None, None
+def init_login(data: AppData):
+    github = init_github_client()
+
+    async def on_authorized(github_token: str) -> str:
+        async with data.db().acquire() as conn:
+            return await login_with_github(github_token, github, conn)
+
+    init_device_flow(github, on_authorized)
 
 async def lifespan(app: FastAPI):
-    await startup()
+    await startup(app)
     yield
-    await shutdown()
+    await shutdown(app)
 
-async def startup():
+async def startup(app: FastAPI):
     logger.info("Application startup")
-    await run_migrations()
-
-    conn, cursor = connect_db()
-    if not conn:
-        logger.error("Database connection failed, exiting.")
-        return
+    try:
+        app.state.data = await AppData.create()
+    except Exception as e:
+        logger.error(f"Database connection failed, exiting: {e}")
+        raise
+
+    await run_migrations(app.state.data)
+    init_pool()
+    init_logo_store()
+    init_artifact_store()
+    init_download_pipeline(app.state.data.db())
+    await init_webhook_dispatcher(app.state.data.db())
+    init_login(app.state.data)
+    listener = get_notification_listener()
+    init_token_cache(listener)
+    init_response_cache(listener)
+    watch_dependency_graph(listener, app.state.data.db())
+    watch_mod_listing(listener, app.state.data.db())
+    watch_logo_pointers(listener)
+    listener.start()
+    await load_indexes(app.state.data)
 
     port = int(os.getenv("PORT", 8000))
     debug = bool(os.getenv("DEBUG", False))
@@ -52,25 +93,32 @@ async def startup():
     if debug:
         logger.info("Running in debug mode, using 1 thread.")
 
-async def shutdown():
+async def shutdown(app: FastAPI):
     logger.info("Shutting down application")
-
-async def run_migrations():
+    shutdown_pool()
+    await stop_mod_listing_refresh()
+    await stop_dependency_graph_refresh()
+    await shutdown_download_pipeline()
+    await shutdown_webhook_dispatcher()
+    await shutdown_device_flow()
+    await shutdown_notification_listener()
+    shutdown_token_cache()
+    await shutdown_github_client()
+    if getattr(app.state, "data", None) is not None:
+        await app.state.data.db().close()
+
+async def run_migrations(data: AppData):
     logger.info("Running migrations...")
     migration_files_path = Path("migrations")
     if not migration_files_path.exists():
         logger.error("Migrations folder not found, skipping migrations.")
         return
 
-    conn, cursor = connect_db()
-    if conn:
-        for migration_file in migration_files_path.iterdir():
-            if migration_file.suffix == ".sql":
-                with open(migration_file, "r") as file:
-                    cursor.execute(file.read())
-                    conn.commit()
+    async with data.db().acquire() as conn:
+        await migrate(conn, migration_files_path)
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ApiJSONResponse)
+app.add_exception_handler(ApiError, api_exception_handler)
 
 origins = ["*"]
 app.add_middleware(
@@ -82,6 +130,14 @@ app.add_middleware(
     max_age=3600,
 )
 
+app.include_router(auth.router)
+app.include_router(developers.router)
+app.include_router(health.router)
+app.include_router(logos.router)
+app.include_router(mods.router)
+app.include_router(resolve.router)
+app.include_router(updates.router)
+
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the server!"}
@@ -1,28 +1,3 @@
--- Drop existing tables, indexes, and types
-DROP TABLE IF EXISTS mods_mod_tags CASCADE;
-DROP TABLE IF EXISTS mod_gd_versions CASCADE;
-DROP TABLE IF EXISTS dependencies CASCADE;
-DROP TABLE IF EXISTS incompatibilities CASCADE;
-DROP TABLE IF EXISTS mod_tags CASCADE;
-DROP TABLE IF EXISTS mod_versions CASCADE;
-DROP TABLE IF EXISTS mods_developers CASCADE;
-DROP TABLE IF EXISTS mods CASCADE;
-DROP TABLE IF EXISTS auth_tokens CASCADE;
-DROP TABLE IF EXISTS developers CASCADE;
-DROP TABLE IF EXISTS github_login_attempts CASCADE;
-DROP INDEX IF EXISTS idx_version_id;
-DROP TYPE IF EXISTS dependency_importance;
-DROP TYPE IF EXISTS version_compare;
-DROP TYPE IF EXISTS gd_version;
-DROP TYPE IF EXISTS gd_ver_platform;
-DROP TYPE IF EXISTS incompatibility_importance;
-DROP TABLE IF EXISTS refresh_tokens;
-DROP TABLE IF EXISTS github_web_logins;
-DROP TABLE IF EXISTS mod_links;
-DROP TABLE IF EXISTS mod_downloads;
-DROP TABLE IF EXISTS mod_version_statuses;
-DROP TYPE IF EXISTS mod_version_status;
-
 -- Create types
 CREATE TYPE dependency_importance AS ENUM ('required', 'recommended', 'suggested');
 CREATE TYPE incompatibility_importance AS ENUM ('breaking', 'conflicting');
@@ -0,0 +1,38 @@
+-- Superseded mods are stored as incompatibilities
+ALTER TYPE incompatibility_importance ADD VALUE IF NOT EXISTS 'superseded';
+
+-- Version helpers used by dependency resolution
+CREATE OR REPLACE FUNCTION semver_key(TEXT) RETURNS INTEGER[] AS $$
+    SELECT string_to_array(split_part(split_part(ltrim($1, 'v'), '+', 1), '-', 1), '.')::INTEGER[]
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION version_satisfies(TEXT, TEXT, TEXT) RETURNS BOOLEAN AS $$
+    SELECT $2 = '*' OR CASE $3
+        WHEN '=' THEN semver_key($1) = semver_key($2)
+        WHEN '>' THEN semver_key($1) > semver_key($2)
+        WHEN '>=' THEN semver_key($1) >= semver_key($2)
+        WHEN '<' THEN semver_key($1) < semver_key($2)
+        ELSE semver_key($1) <= semver_key($2)
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Newest accepted version of a mod matching a dependency constraint
+-- ($1 mod id, $2 version, $3 compare, $4 gd, $5 platform, $6 geode)
+CREATE OR REPLACE FUNCTION latest_compatible_version(TEXT, TEXT, TEXT, TEXT, TEXT, TEXT)
+RETURNS TABLE (id INTEGER, version TEXT) AS $$
+    SELECT mv.id, mv.version
+    FROM mod_versions mv
+    INNER JOIN mod_version_statuses mvs ON mvs.id = mv.status_id
+    WHERE mv.mod_id = $1
+    AND mvs.status = 'accepted'
+    AND version_satisfies(mv.version, $2, $3)
+    AND ($6 IS NULL OR split_part(ltrim(mv.geode, 'v'), '.', 1) = split_part(ltrim($6, 'v'), '.', 1))
+    AND EXISTS (
+        SELECT 1 FROM mod_gd_versions mgv
+        WHERE mgv.mod_id = mv.id
+        AND ($4 IS NULL OR mgv.gd::text = $4 OR mgv.gd = '*')
+        AND ($5 IS NULL OR mgv.platform::text = $5)
+    )
+    ORDER BY semver_key(mv.version) DESC, strpos(mv.version, '-') = 0 DESC, mv.version DESC
+    LIMIT 1
+$$ LANGUAGE sql STABLE;
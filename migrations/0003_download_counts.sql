@@ -0,0 +1,26 @@
+-- Running download totals, maintained by the batched download pipeline so
+-- listings never have to COUNT(*) mod_downloads
+CREATE TABLE IF NOT EXISTS mod_download_counts (
+  mod_id TEXT PRIMARY KEY NOT NULL,
+  download_count BIGINT NOT NULL DEFAULT 0,
+  FOREIGN KEY (mod_id) REFERENCES mods(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS mod_version_download_counts (
+  mod_version_id INTEGER PRIMARY KEY NOT NULL,
+  download_count BIGINT NOT NULL DEFAULT 0,
+  FOREIGN KEY (mod_version_id) REFERENCES mod_versions(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_mod_download_counts_count ON mod_download_counts(download_count DESC);
+
+INSERT INTO mod_version_download_counts (mod_version_id, download_count)
+  SELECT mod_version_id, count(*) FROM mod_downloads GROUP BY mod_version_id
+ON CONFLICT (mod_version_id) DO NOTHING;
+
+INSERT INTO mod_download_counts (mod_id, download_count)
+  SELECT mv.mod_id, sum(vdc.download_count)
+  FROM mod_version_download_counts vdc
+  INNER JOIN mod_versions mv ON mv.id = vdc.mod_version_id
+  GROUP BY mv.mod_id
+ON CONFLICT (mod_id) DO NOTHING;
@@ -0,0 +1,52 @@
+-- mod_downloads becomes range partitioned by day, so expired downloads are
+-- removed by dropping whole partitions instead of DELETE + vacuum.
+--
+-- Partition keys must be part of every unique index, so (mod_version_id, ip)
+-- can no longer be the primary key. The download pipeline de-duplicates
+-- against the retention window instead, using the index below.
+-- There is deliberately no DEFAULT partition: it would rule out
+-- DETACH PARTITION ... CONCURRENTLY in the cleanup job.
+
+CREATE OR REPLACE FUNCTION create_mod_downloads_partition(day DATE) RETURNS BOOLEAN AS $$
+DECLARE
+  partition_name TEXT := 'mod_downloads_p' || to_char(day, 'YYYYMMDD');
+BEGIN
+  IF to_regclass('public.' || partition_name) IS NOT NULL THEN
+    RETURN FALSE;
+  END IF;
+  EXECUTE format(
+    'CREATE TABLE %I PARTITION OF mod_downloads FOR VALUES FROM (%L) TO (%L)',
+    partition_name,
+    day::timestamp AT TIME ZONE 'UTC',
+    (day + 1)::timestamp AT TIME ZONE 'UTC'
+  );
+  RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+ALTER TABLE mod_downloads RENAME TO mod_downloads_unpartitioned;
+
+CREATE TABLE mod_downloads (
+  mod_version_id INTEGER NOT NULL,
+  ip inet NOT NULL,
+  time_downloaded timestamptz NOT NULL DEFAULT now(),
+  FOREIGN KEY (mod_version_id) REFERENCES mod_versions(id) ON DELETE CASCADE
+) PARTITION BY RANGE (time_downloaded);
+
+CREATE INDEX idx_mod_downloads_version_ip ON mod_downloads(mod_version_id, ip);
+
+SELECT create_mod_downloads_partition(day::date)
+FROM generate_series(
+  (now() AT TIME ZONE 'UTC')::date - 31,
+  (now() AT TIME ZONE 'UTC')::date + 14,
+  interval '1 day'
+) AS day;
+
+-- Anything older than the 31 days created above has expired anyway
+INSERT INTO mod_downloads (mod_version_id, ip, time_downloaded)
+SELECT mod_version_id, ip, time_downloaded
+FROM mod_downloads_unpartitioned
+WHERE time_downloaded >= ((now() AT TIME ZONE 'UTC')::date - 31)::timestamp AT TIME ZONE 'UTC'
+AND time_downloaded < ((now() AT TIME ZONE 'UTC')::date + 15)::timestamp AT TIME ZONE 'UTC';
+
+DROP TABLE mod_downloads_unpartitioned;
@@ -0,0 +1,12 @@
+-- Webhook embeds waiting to be delivered, so accepted-mod announcements
+-- survive restarts and Discord outages. Rows are deleted once delivered.
+-- A replica holds the rows it has queued until claimed_until, so other
+-- replicas don't send them too. Rows that failed too many deliveries stay
+-- for inspection but are never claimed again.
+CREATE TABLE IF NOT EXISTS webhook_outbox (
+  id BIGSERIAL PRIMARY KEY NOT NULL,
+  embed JSONB NOT NULL,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  claimed_until TIMESTAMPTZ,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
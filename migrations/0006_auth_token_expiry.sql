@@ -0,0 +1,3 @@
+-- Lets cleanup_tokens expire auth tokens. Existing tokens keep NULL (never expire).
+ALTER TABLE auth_tokens ADD COLUMN IF NOT EXISTS expires_at TIMESTAMPTZ;
+CREATE INDEX IF NOT EXISTS idx_auth_tokens_expires_at ON auth_tokens(expires_at) WHERE expires_at IS NOT NULL;
@@ -0,0 +1,2 @@
+-- Serves keyset pages of a developer's mods (developer_id, mod_id > cursor) from the index
+CREATE INDEX IF NOT EXISTS idx_mods_developers_developer_mod ON mods_developers(developer_id, mod_id);
@@ -0,0 +1,2 @@
+-- Lets uploads be matched against existing versions by content hash before parsing
+CREATE INDEX IF NOT EXISTS idx_mod_versions_hash ON mod_versions(hash);
@@ -0,0 +1,146 @@
+-- Latest accepted version of every mod per (gd, platform, geode major), kept
+-- up to date by triggers in the same transaction that changes a status, a
+-- version or its targets, so update checks are one index lookup per mod.
+-- gd may be '*', lookups for a specific gd consider both rows.
+
+-- Keys order like semver precedence, the same way as version_key in
+-- src/types/version_constraint.py: major, minor and patch, then 2 for a
+-- release or 1 followed by the prerelease identifiers, where numeric ones
+-- sort below alphanumeric ones. Build metadata is ignored. Anything that
+-- isn't a full semver gets a NULL key and never satisfies a constraint,
+-- just like versions the Python resolver can't parse.
+CREATE TYPE semver_identifier AS (alphanumeric BOOLEAN, number NUMERIC, label TEXT COLLATE "C");
+
+DROP FUNCTION semver_key(TEXT);
+CREATE FUNCTION semver_key(TEXT) RETURNS semver_identifier[] AS $$
+DECLARE
+  parts TEXT[] := regexp_match($1,
+    '^v?(0|[1-9][0-9]*)\.(0|[1-9][0-9]*)\.(0|[1-9][0-9]*)'
+    '(?:-((?:0|[1-9][0-9]*|[0-9]*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9][0-9]*|[0-9]*[a-zA-Z-][0-9a-zA-Z-]*))*))?'
+    '(?:\+[0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*)?$');
+  key semver_identifier[];
+  identifier TEXT;
+BEGIN
+  IF parts IS NULL THEN
+    RETURN NULL;
+  END IF;
+  key := ARRAY[
+    ROW(false, parts[1]::NUMERIC, '')::semver_identifier,
+    ROW(false, parts[2]::NUMERIC, '')::semver_identifier,
+    ROW(false, parts[3]::NUMERIC, '')::semver_identifier,
+    ROW(false, CASE WHEN parts[4] IS NULL THEN 2 ELSE 1 END, '')::semver_identifier
+  ];
+  FOREACH identifier IN ARRAY coalesce(string_to_array(parts[4], '.'), '{}') LOOP
+    IF identifier ~ '^[0-9]+$' THEN
+      key := key || ROW(false, identifier::NUMERIC, '')::semver_identifier;
+    ELSE
+      key := key || ROW(true, 0, identifier)::semver_identifier;
+    END IF;
+  END LOOP;
+  RETURN key;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION version_satisfies(TEXT, TEXT, TEXT) RETURNS BOOLEAN AS $$
+    SELECT semver_key($1) IS NOT NULL AND ($2 = '*' OR CASE $3
+        WHEN '=' THEN semver_key($1) = semver_key($2)
+        WHEN '>' THEN semver_key($1) > semver_key($2)
+        WHEN '>=' THEN semver_key($1) >= semver_key($2)
+        WHEN '<' THEN semver_key($1) < semver_key($2)
+        ELSE semver_key($1) <= semver_key($2)
+    END)
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE TABLE mod_latest_versions (
+  mod_id TEXT NOT NULL,
+  gd gd_version NOT NULL,
+  platform gd_ver_platform NOT NULL,
+  geode_major TEXT NOT NULL,
+  mod_version_id INTEGER NOT NULL,
+  version TEXT NOT NULL,
+  version_key semver_identifier[] NOT NULL,
+  prerelease BOOLEAN NOT NULL,
+  PRIMARY KEY (mod_id, platform, geode_major, gd),
+  FOREIGN KEY (mod_id) REFERENCES mods(id) ON DELETE CASCADE,
+  FOREIGN KEY (mod_version_id) REFERENCES mod_versions(id) ON DELETE CASCADE
+);
+
+-- Rows for $1 mods, or for every mod when NULL
+CREATE OR REPLACE FUNCTION latest_version_rows(TEXT[])
+RETURNS SETOF mod_latest_versions AS $$
+  SELECT DISTINCT ON (mv.mod_id, mgv.platform, geode_major, mgv.gd)
+    mv.mod_id,
+    mgv.gd,
+    mgv.platform,
+    split_part(ltrim(mv.geode, 'v'), '.', 1) AS geode_major,
+    mv.id,
+    mv.version,
+    semver_key(mv.version),
+    ((semver_key(mv.version))[4]).number = 1
+  FROM mod_versions mv
+  INNER JOIN mod_version_statuses mvs ON mvs.id = mv.status_id
+  INNER JOIN mod_gd_versions mgv ON mgv.mod_id = mv.id
+  WHERE mvs.status = 'accepted'
+  AND semver_key(mv.version) IS NOT NULL
+  AND ($1 IS NULL OR mv.mod_id = ANY($1))
+  ORDER BY mv.mod_id, mgv.platform, geode_major, mgv.gd,
+    semver_key(mv.version) DESC, mv.version DESC
+$$ LANGUAGE sql STABLE;
+
+-- Concurrent refreshes of one mod are serialized, otherwise both would
+-- delete the same rows and the second insert would hit the primary key
+CREATE OR REPLACE FUNCTION refresh_mod_latest_versions(TEXT) RETURNS VOID AS $$
+  SELECT pg_advisory_xact_lock(hashtext('mod_latest_versions'), hashtext($1));
+  DELETE FROM mod_latest_versions WHERE mod_id = $1;
+  INSERT INTO mod_latest_versions SELECT * FROM latest_version_rows(ARRAY[$1]);
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION rebuild_mod_latest_versions() RETURNS BIGINT AS $$
+DECLARE
+  written BIGINT;
+BEGIN
+  LOCK TABLE mod_latest_versions IN EXCLUSIVE MODE;
+  DELETE FROM mod_latest_versions;
+  INSERT INTO mod_latest_versions SELECT * FROM latest_version_rows(NULL);
+  GET DIAGNOSTICS written = ROW_COUNT;
+  RETURN written;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION mod_version_statuses_refresh_latest() RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM refresh_mod_latest_versions(mv.mod_id)
+  FROM mod_versions mv WHERE mv.id = NEW.mod_version_id;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER mod_version_statuses_latest
+AFTER INSERT OR UPDATE OF status, mod_version_id ON mod_version_statuses
+FOR EACH ROW EXECUTE FUNCTION mod_version_statuses_refresh_latest();
+
+CREATE OR REPLACE FUNCTION mod_gd_versions_refresh_latest() RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM refresh_mod_latest_versions(mv.mod_id)
+  FROM mod_versions mv WHERE mv.id = coalesce(NEW.mod_id, OLD.mod_id);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER mod_gd_versions_latest
+AFTER INSERT OR UPDATE OR DELETE ON mod_gd_versions
+FOR EACH ROW EXECUTE FUNCTION mod_gd_versions_refresh_latest();
+
+CREATE OR REPLACE FUNCTION mod_versions_refresh_latest() RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM refresh_mod_latest_versions(coalesce(NEW.mod_id, OLD.mod_id));
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A version can also change status by pointing at a new status row, or go away
+CREATE TRIGGER mod_versions_latest
+AFTER UPDATE OF status_id OR DELETE ON mod_versions
+FOR EACH ROW EXECUTE FUNCTION mod_versions_refresh_latest();
+
+SELECT rebuild_mod_latest_versions();
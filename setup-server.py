@@ -1,9 +1,13 @@
 import psycopg2
+import asyncpg
+import asyncio
 from dotenv import load_dotenv
 import os
 import argparse
 from pathlib import Path
 
+from src.database.migrations import migrate
+
 load_dotenv()
 
 DB_CONFIG = {
@@ -23,17 +27,25 @@ def connect():
         print(f"Error connecting to database: {e}")
         return None, None
 
+async def run_migrations():
+    conn = await asyncpg.connect(
+        database=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        host=DB_CONFIG["host"],
+        port=DB_CONFIG["port"] or None
+    )
+    try:
+        return await migrate(conn, Path("migrations"))
+    finally:
+        await conn.close()
+
 def setup(cursor, conn):
-    file_path = Path("./default.sql")
-    query = ""
-    
-    if file_path.exists():
-        query = file_path.read_text(encoding="utf-8")
-        cursor.execute(query)
-        conn.commit()
-        print("Table created successfully.")
+    if Path("migrations").exists():
+        applied = asyncio.run(run_migrations())
+        print(f"Applied {applied} migrations.")
     else:
-        print("SQL file not found!")
+        print("Migrations folder not found!")
 
 def clear(cursor, conn):
     # Query to get all table names excluding system tables
@@ -55,6 +67,18 @@ def clear(cursor, conn):
     else:
         print("No tables to drop.")
 
+    # Enum types outlive their tables and would break re-running the initial migration
+    cursor.execute("""
+        SELECT t.typname
+        FROM pg_type t
+        INNER JOIN pg_namespace n ON n.oid = t.typnamespace
+        WHERE n.nspname = 'public' AND t.typtype = 'e';
+    """)
+    for (type_name,) in cursor.fetchall():
+        cursor.execute(f"DROP TYPE IF EXISTS {type_name} CASCADE;")
+        print(f"Dropped type: {type_name}")
+    conn.commit()
+
 def main():
     # Set up argparse
     parser = argparse.ArgumentParser(description="Database setup and management script")
@@ -0,0 +1,68 @@
+import uuid
+from typing import Optional
+
+import asyncpg
+from fastapi import Request
+
+from src.auth.github import GithubClient
+from src.auth.token_cache import get_token_cache
+from src.database import queries, statements
+from src.database.pool import DatabasePool
+from src.env import env_float
+from src.types.api import ApiError
+from src.types.models.developer import Developer
+
+
+async def login_with_github(github_token: str, github: GithubClient, conn: asyncpg.Connection) -> str:
+    """
+    Finds (or creates) the developer behind a GitHub access token and
+    returns a new index auth token for them.
+    """
+    user = await github.get_user(github_token)
+    async with conn.transaction():
+        developer_id = await statements.fetchval(conn, queries.FIND_OR_CREATE_DEVELOPER, user["id"], user["login"])
+        lifetime = env_float("AUTH_TOKEN_LIFETIME", 30 * 24 * 3600)
+        return await statements.fetchval(conn, queries.CREATE_AUTH_TOKEN, developer_id, lifetime)
+
+
+async def authenticate(token: str, pool: DatabasePool) -> Optional[Developer]:
+    """
+    Resolves an auth token to its developer. Cached tokens (valid or not)
+    are a dict lookup; a connection is only acquired on a cache miss.
+    """
+    cache = get_token_cache()
+    if cache is None:
+        return await _lookup(token, pool)
+    key = cache.key(token)
+    found, developer = cache.get(key)
+    if found:
+        return developer
+    generation = cache.generation
+    developer = await _lookup(token, pool)
+    if cache.generation == generation:
+        cache.put(key, developer)
+    return developer
+
+
+async def _lookup(token: str, pool: DatabasePool) -> Optional[Developer]:
+    try:
+        uuid.UUID(token)
+    except ValueError:
+        return None
+    async with pool.acquire() as conn:
+        return await statements.fetchrow(conn, queries.DEVELOPER_FOR_TOKEN, token)
+
+
+def _bearer_token(request: Request) -> str:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise ApiError(error_type="Unauthorized")
+    return token.strip()
+
+
+async def require_developer(request: Request) -> Developer:
+    """FastAPI dependency for endpoints that need an authenticated developer."""
+    developer = await authenticate(_bearer_token(request), request.app.state.data.db())
+    if developer is None:
+        raise ApiError(error_type="Unauthorized")
+    return developer
@@ -0,0 +1,260 @@
+import asyncio
+import heapq
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.auth.github import GithubClient
+from src.env import env_int
+from src.types.api import ApiError
+
+logger = logging.getLogger(__name__)
+
+# GitHub asks for this much extra delay on every slow_down
+SLOW_DOWN_SECONDS = 5
+
+PENDING = "pending"
+COMPLETE = "complete"
+EXPIRED = "expired"
+DENIED = "denied"
+FAILED = "failed"
+
+
+class LoginAttempt:
+    __slots__ = (
+        "uuid", "ip", "device_code", "user_code", "uri", "interval",
+        "expires_at", "finished_at", "status", "token", "done"
+    )
+
+    def __init__(self, ip: str, device_code: str, user_code: str, uri: str, interval: int, expires_in: int):
+        self.uuid = str(uuid.uuid4())
+        self.ip = ip
+        self.device_code = device_code
+        self.user_code = user_code
+        self.uri = uri
+        self.interval = interval
+        self.expires_at = time.monotonic() + expires_in
+        self.finished_at: Optional[float] = None
+        self.status = PENDING
+        self.token: Optional[str] = None
+        self.done = asyncio.Event()
+
+    def is_expired(self) -> bool:
+        return time.monotonic() > self.expires_at
+
+    def finish(self, status: str, token: Optional[str] = None):
+        self.status = status
+        self.token = token
+        self.finished_at = time.monotonic()
+        self.done.set()
+
+
+class DeviceFlowScheduler:
+    """
+    Owns every pending GitHub device-flow login. Each attempt is polled
+    upstream once per interval (backing off on slow_down), however many
+    clients are waiting on it; clients wait on the in-memory attempt.
+
+    When GitHub hands out an access token, `on_authorized` turns it into
+    whatever the client receives (an index auth token). Finished attempts
+    are kept for `retain` seconds so their client can collect the result.
+
+    Attempts live in this process only: with several replicas, the load
+    balancer has to route every login request from a client IP to the same
+    replica (sticky sessions by source IP), or polls will get NotFound.
+    """
+    def __init__(
+        self,
+        github: GithubClient,
+        on_authorized: Callable[[str], Awaitable[str]],
+        max_pending: int = 10_000,
+        max_concurrent_polls: int = 10,
+        retain: float = 120.0
+    ):
+        self.github = github
+        self.on_authorized = on_authorized
+        self.max_pending = max_pending
+        self.retain = retain
+        self._attempts: Dict[str, LoginAttempt] = {}
+        self._by_ip: Dict[str, str] = {}
+        self._schedule: List[Tuple[float, str]] = []
+        self._polls = asyncio.Semaphore(max_concurrent_polls)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Running polls, referenced so they aren't garbage collected mid-flight
+        self._poll_tasks: Set[asyncio.Task] = set()
+        self._last_sweep = 0.0
+        self.upstream_polls = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        tasks = list(self._poll_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def begin(self, ip: str) -> LoginAttempt:
+        """Starts a login for `ip`, or returns the one it already has pending."""
+        existing = self._attempts.get(self._by_ip.get(ip, ""))
+        if existing is not None and existing.status == PENDING and not existing.is_expired():
+            return existing
+        if len(self._attempts) >= self.max_pending:
+            raise ApiError("Too many pending logins, try again later", "TooManyRequests")
+
+        start = await self.github.request_device_code()
+        attempt = LoginAttempt(
+            ip, start.device_code, start.user_code, start.verification_uri, start.interval, start.expires_in
+        )
+        self._attempts[attempt.uuid] = attempt
+        self._by_ip[ip] = attempt.uuid
+        self._schedule_poll(attempt)
+        return attempt
+
+    def get(self, attempt_uuid: str, ip: str) -> LoginAttempt:
+        attempt = self._attempts.get(attempt_uuid)
+        if attempt is None or attempt.ip != ip:
+            raise ApiError("No login attempt found", "NotFound")
+        return attempt
+
+    async def wait(self, attempt: LoginAttempt, timeout: float) -> LoginAttempt:
+        """Long-polls an attempt until it finishes or `timeout` passes."""
+        try:
+            await asyncio.wait_for(attempt.done.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return attempt
+
+    def claim(self, attempt: LoginAttempt) -> Optional[str]:
+        """Hands out the token of a completed attempt, exactly once."""
+        if attempt.status != COMPLETE:
+            return None
+        self._forget(attempt)
+        return attempt.token
+
+    def _forget(self, attempt: LoginAttempt):
+        self._attempts.pop(attempt.uuid, None)
+        if self._by_ip.get(attempt.ip) == attempt.uuid:
+            del self._by_ip[attempt.ip]
+
+    def _schedule_poll(self, attempt: LoginAttempt):
+        heapq.heappush(self._schedule, (time.monotonic() + attempt.interval, attempt.uuid))
+        self._wakeup.set()
+
+    def _sweep(self):
+        now = time.monotonic()
+        for attempt in list(self._attempts.values()):
+            if attempt.status == PENDING and attempt.is_expired():
+                attempt.finish(EXPIRED)
+            if attempt.finished_at is not None and now - attempt.finished_at > self.retain:
+                self._forget(attempt)
+        self._last_sweep = now
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            while self._schedule and self._schedule[0][0] <= now:
+                _, attempt_uuid = heapq.heappop(self._schedule)
+                attempt = self._attempts.get(attempt_uuid)
+                if attempt is not None and attempt.status == PENDING:
+                    task = asyncio.create_task(self._poll(attempt))
+                    self._poll_tasks.add(task)
+                    task.add_done_callback(self._poll_tasks.discard)
+            if now - self._last_sweep > 1.0:
+                self._sweep()
+
+            timeout = self._schedule[0][0] - now if self._schedule else 1.0
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(min(timeout, 1.0), 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, attempt: LoginAttempt):
+        try:
+            await self._poll_once(attempt)
+        except Exception as e:
+            logger.error(f"Polling login {attempt.uuid} failed: {e!r}")
+            if attempt.status == PENDING:
+                attempt.finish(FAILED)
+
+    async def _poll_once(self, attempt: LoginAttempt):
+        if attempt.is_expired():
+            attempt.finish(EXPIRED)
+            return
+        async with self._polls:
+            self.upstream_polls += 1
+            try:
+                body = await self.github.poll_device_code(attempt.device_code)
+            except ApiError as e:
+                logger.warning(f"Polling GitHub for login {attempt.uuid} failed: {e}")
+                self._schedule_poll(attempt)
+                return
+
+        access_token = body.get("access_token")
+        if access_token:
+            try:
+                attempt.finish(COMPLETE, await self.on_authorized(access_token))
+            except Exception as e:
+                logger.error(f"Failed to log in developer for {attempt.uuid}: {e!r}")
+                attempt.finish(FAILED)
+            return
+
+        error = body.get("error")
+        if error == "authorization_pending":
+            self._schedule_poll(attempt)
+        elif error == "slow_down":
+            attempt.interval = int(body.get("interval", attempt.interval + SLOW_DOWN_SECONDS))
+            self._schedule_poll(attempt)
+        elif error == "expired_token":
+            attempt.finish(EXPIRED)
+        elif error == "access_denied":
+            attempt.finish(DENIED)
+        else:
+            logger.warning(f"Unexpected device flow response for {attempt.uuid}: {error}")
+            attempt.finish(FAILED)
+
+    def metrics(self) -> Dict:
+        return {
+            "attempts": len(self._attempts),
+            "pending": sum(1 for a in self._attempts.values() if a.status == PENDING),
+            "upstream_polls": self.upstream_polls,
+        }
+
+
+_scheduler: Optional[DeviceFlowScheduler] = None
+
+
+def init_device_flow(github: GithubClient, on_authorized: Callable[[str], Awaitable[str]]) -> DeviceFlowScheduler:
+    global _scheduler
+    _scheduler = DeviceFlowScheduler(
+        github,
+        on_authorized,
+        max_pending=env_int("LOGIN_MAX_PENDING", 10_000),
+        max_concurrent_polls=env_int("LOGIN_MAX_CONCURRENT_POLLS", 10)
+    )
+    _scheduler.start()
+    return _scheduler
+
+
+def get_device_flow() -> DeviceFlowScheduler:
+    if _scheduler is None:
+        raise ApiError("Logins are not available")
+    return _scheduler
+
+
+async def shutdown_device_flow():
+    global _scheduler
+    if _scheduler is not None:
+        await _scheduler.stop()
+        _scheduler = None
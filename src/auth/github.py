@@ -1,13 +1,18 @@
-import uuid
-import requests
-import json
-from typing import Optional
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import SQLAlchemyError
-
-from src.database.repository.github_login_attempts import get_one_by_ip, create, remove
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from src.env import env_float, env_int, env_str
 from src.types.api import ApiError
 
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "geode_index"
+
 
 class GithubStartAuth:
     def __init__(self, device_code: str, user_code: str, verification_uri: str, expires_in: int, interval: int):
@@ -18,31 +23,141 @@ class GithubStartAuth:
         self.interval = interval
 
 
+class CachedResponse:
+    __slots__ = ("etag", "body", "fetched_at")
+
+    def __init__(self, etag: Optional[str], body: dict, fetched_at: float):
+        self.etag = etag
+        self.body = body
+        self.fetched_at = fetched_at
+
+
+class ResponseCache:
+    """
+    LRU of GitHub API responses keyed by (token hash, path). Raw tokens are
+    never kept in memory. Entries younger than `fresh_for` seconds are served
+    as is; older ones are revalidated with If-None-Match (a 304 doesn't count
+    against the rate limit) until they expire after `ttl` seconds.
+    """
+    def __init__(self, ttl: float, fresh_for: float, max_entries: int):
+        self.ttl = ttl
+        self.fresh_for = fresh_for
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str, path: str) -> Tuple[str, str]:
+        return hashlib.sha256(token.encode()).hexdigest(), path
+
+    def get(self, key: Tuple[str, str]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.fetched_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple[str, str], etag: Optional[str], body: dict):
+        self._entries[key] = CachedResponse(etag, body, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def touch(self, key: Tuple[str, str]):
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.fetched_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._entries)
+
+
 class GithubClient:
-    def __init__(self, client_id: str, client_secret: str):
+    """
+    GitHub OAuth and API client on one pooled async HTTP client. Base URLs
+    are configurable so it can be pointed at a local fake GitHub.
+    """
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        base_url: str = "https://github.com",
+        api_url: str = "https://api.github.com",
+        timeout: float = 10.0,
+        max_connections: int = 20,
+        cache: Optional[ResponseCache] = None,
+        client: Optional[httpx.AsyncClient] = None
+    ):
         self.client_id = client_id
         self.client_secret = client_secret
-
-    async def start_polling_auth(self, ip: str, session: AsyncSession) -> Optional[dict]:
-        login_attempt = await get_one_by_ip(ip, session)
-        if login_attempt:
-            if login_attempt.is_expired():
-                await remove(uuid.UUID(login_attempt.uuid), session)
-            else:
-                return login_attempt
-
-        response = requests.post(
-            "https://github.com/login/device/code",
-            auth=(self.client_id, self.client_secret),
-            json={"client_id": self.client_id},
-            headers={"Accept": "application/json"}
+        self.base_url = base_url.rstrip("/")
+        self.api_url = api_url.rstrip("/")
+        self.cache = cache if cache is not None else ResponseCache(ttl=600, fresh_for=30, max_entries=10_000)
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={"User-Agent": USER_AGENT}
         )
 
-        if not response.ok:
-            raise ApiError("InternalError", "Failed to start OAuth device flow with GitHub")
+    async def aclose(self):
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def _post(self, url: str, payload: dict) -> httpx.Response:
+        try:
+            return await self._client.post(
+                url,
+                auth=(self.client_id, self.client_secret),
+                json=payload,
+                headers={"Accept": "application/json"}
+            )
+        except httpx.HTTPError as e:
+            logger.error(f"Request to {url} failed: {e!r}")
+            raise ApiError("Failed to reach GitHub")
+
+    async def _get_cached(self, path: str, token: str) -> dict:
+        key = self.cache.key(token, path)
+        cached = self.cache.get(key)
+        if cached is not None and time.monotonic() - cached.fetched_at <= self.cache.fresh_for:
+            self.cache.hits += 1
+            return cached.body
+
+        headers = {"Accept": "application/json", "Authorization": f"Bearer {token}"}
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        url = f"{self.api_url}{path}"
+        try:
+            response = await self._client.get(url, headers=headers)
+        except httpx.HTTPError as e:
+            logger.error(f"Request to {url} failed: {e!r}")
+            raise ApiError(f"Request to {url} failed")
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.revalidated += 1
+            self.cache.touch(key)
+            return cached.body
+        if not response.is_success:
+            raise ApiError(f"Request to {url} failed")
+
+        self.cache.misses += 1
+        body = response.json()
+        self.cache.put(key, response.headers.get("ETag"), body)
+        return body
+
+    async def request_device_code(self) -> GithubStartAuth:
+        response = await self._post(f"{self.base_url}/login/device/code", {"client_id": self.client_id})
+
+        if not response.is_success:
+            raise ApiError("Failed to start OAuth device flow with GitHub")
 
         body = response.json()
-        github_start_auth = GithubStartAuth(
+        return GithubStartAuth(
             device_code=body["device_code"],
             user_code=body["user_code"],
             verification_uri=body["verification_uri"],
@@ -50,17 +165,21 @@ class GithubClient:
             interval=body["interval"]
         )
 
-        await create(
-            ip,
-            github_start_auth.device_code,
-            github_start_auth.interval,
-            github_start_auth.expires_in,
-            github_start_auth.verification_uri,
-            github_start_auth.user_code,
-            session
-        )
+    async def poll_device_code(self, device_code: str) -> dict:
+        """
+        One poll of a device flow. Returns GitHub's body as is: either an
+        access_token or an error such as authorization_pending or slow_down.
+        """
+        response = await self._post(f"{self.base_url}/login/oauth/access_token", {
+            "client_id": self.client_id,
+            "device_code": device_code,
+            "grant_type": "urn:ietf:params:oauth:grant-type:device_code"
+        })
+
+        if not response.is_success:
+            raise ApiError("Failed to poll GitHub for developer access token")
 
-        return None
+        return response.json()
 
     async def poll_github(self, code: str, is_device: bool, redirect_uri: Optional[str]) -> str:
         if is_device:
@@ -78,52 +197,71 @@ class GithubClient:
             if redirect_uri:
                 payload["redirect_uri"] = f"{redirect_uri}/login/github/callback"
 
-        response = requests.post(
-            "https://github.com/login/oauth/access_token",
-            headers={"Accept": "application/json", "Content-Type": "application/json"},
-            auth=(self.client_id, self.client_secret),
-            json=payload
-        )
+        response = await self._post(f"{self.base_url}/login/oauth/access_token", payload)
 
-        if not response.ok:
-            raise ApiError("InternalError", "Failed to poll GitHub for developer access token")
+        if not response.is_success:
+            raise ApiError("Failed to poll GitHub for developer access token")
 
         json_response = response.json()
         access_token = json_response.get("access_token")
         if not access_token:
-            raise ApiError("BadRequest", "Request not accepted by user")
+            raise ApiError("Request not accepted by user", "BadRequest")
 
         return access_token
 
     async def get_user(self, token: str) -> dict:
-        response = requests.get(
-            "https://api.github.com/user",
-            headers={"Accept": "application/json", "User-Agent": "geode_index"},
-            auth=("Bearer", token)
-        )
-
-        if not response.ok:
-            raise ApiError("InternalError", "Request to https://api.github.com/user failed")
-
-        return response.json()
+        return await self._get_cached("/user", token)
 
     async def get_installation(self, token: str) -> dict:
-        response = requests.get(
-            "https://api.github.com/installation/repositories",
-            headers={"Accept": "application/json", "User-Agent": "geode_index"},
-            auth=("Bearer", token)
-        )
-
-        if not response.ok:
-            raise ApiError("InternalError", "Failed to fetch installation repositories")
-
-        body = response.json()
+        body = await self._get_cached("/installation/repositories", token)
         repositories = body.get("repositories", [])
         if len(repositories) != 1:
-            raise ApiError("InternalError", "Expected exactly one repository")
+            raise ApiError("Expected exactly one repository")
 
         owner = repositories[0].get("owner")
         if not owner:
-            raise ApiError("InternalError", "Failed to extract owner info from repository")
+            raise ApiError("Failed to extract owner info from repository")
 
         return owner
+
+    def metrics(self) -> Dict:
+        return {
+            "cached": len(self.cache),
+            "hits": self.cache.hits,
+            "revalidated": self.cache.revalidated,
+            "misses": self.cache.misses,
+        }
+
+
+_client: Optional[GithubClient] = None
+
+
+def init_github_client() -> GithubClient:
+    global _client
+    _client = GithubClient(
+        env_str("GH_CLIENT_ID", ""),
+        env_str("GH_CLIENT_SECRET", ""),
+        base_url=env_str("GH_BASE_URL", "https://github.com"),
+        api_url=env_str("GH_API_URL", "https://api.github.com"),
+        timeout=env_float("GH_TIMEOUT", 10),
+        max_connections=env_int("GH_MAX_CONNECTIONS", 20),
+        cache=ResponseCache(
+            ttl=env_float("GH_CACHE_TTL", 600),
+            fresh_for=env_float("GH_CACHE_FRESH_FOR", 30),
+            max_entries=env_int("GH_CACHE_MAX_ENTRIES", 10_000)
+        )
+    )
+    return _client
+
+
+def get_github_client() -> GithubClient:
+    if _client is None:
+        return init_github_client()
+    return _client
+
+
+async def shutdown_github_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
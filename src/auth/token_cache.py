@@ -0,0 +1,135 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+import asyncpg
+
+from src.database.notifications import NotificationListener, notify
+from src.env import env_float, env_int
+from src.types.models.developer import Developer
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel used to evict tokens on every replica. Payloads are
+# "developer:<id>" for one developer, or "all".
+INVALIDATION_CHANNEL = "auth_token_invalidation"
+
+
+class TokenCache:
+    """
+    Token -> Developer LRU with TTLs. Unknown tokens are cached too (as None,
+    for the shorter `negative_ttl`), so repeated bad tokens don't reach
+    Postgres either. Keys are token hashes, raw tokens are never stored.
+    """
+    def __init__(self, ttl: float, negative_ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[Developer], float]]" = OrderedDict()
+        self._by_developer: Dict[int, Set[str]] = {}
+        # Bumped on every invalidation; lookups that raced one aren't cached
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, key: str) -> Tuple[bool, Optional[Developer]]:
+        """Returns (found, developer); a found None is a cached invalid token."""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[0]
+
+    def put(self, key: str, developer: Optional[Developer]):
+        ttl = self.ttl if developer is not None else self.negative_ttl
+        self._remove(key)
+        self._entries[key] = (developer, time.monotonic() + ttl)
+        if developer is not None:
+            self._by_developer.setdefault(developer.id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[0] is not None:
+            keys = self._by_developer.get(entry[0].id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_developer[entry[0].id]
+
+    def evict_developer(self, developer_id: int):
+        self.generation += 1
+        for key in self._by_developer.pop(developer_id, set()):
+            self._entries.pop(key, None)
+            self.evictions += 1
+
+    def clear(self):
+        self.generation += 1
+        self.evictions += len(self._entries)
+        self._entries.clear()
+        self._by_developer.clear()
+
+    def metrics(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def _on_invalidation(payload: str):
+    if _cache is None:
+        return
+    if payload == "all":
+        _cache.clear()
+        return
+    kind, _, value = payload.partition(":")
+    if kind == "developer" and value.isdigit():
+        _cache.evict_developer(int(value))
+    else:
+        logger.warning(f"Ignoring token invalidation {payload!r}")
+
+
+def _on_reset():
+    if _cache is not None:
+        _cache.clear()
+
+
+async def notify_invalidation(conn: asyncpg.Connection, payload: str):
+    await notify(conn, INVALIDATION_CHANNEL, payload)
+
+
+_cache: Optional[TokenCache] = None
+
+
+def init_token_cache(listener: NotificationListener) -> TokenCache:
+    global _cache
+    _cache = TokenCache(
+        ttl=env_float("AUTH_CACHE_TTL", 300),
+        negative_ttl=env_float("AUTH_CACHE_NEGATIVE_TTL", 30),
+        max_entries=env_int("AUTH_CACHE_MAX_ENTRIES", 50_000)
+    )
+    listener.subscribe(INVALIDATION_CHANNEL, _on_invalidation, _on_reset)
+    return _cache
+
+
+def get_token_cache() -> Optional[TokenCache]:
+    return _cache
+
+
+def shutdown_token_cache():
+    global _cache
+    _cache = None
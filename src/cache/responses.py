@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlencode
+
+import asyncpg
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from src.database.notifications import NotificationListener, notify
+from src.env import env_float
+from src.types.api import ApiJSONResponse
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel carrying invalidated tags, e.g. "mod:geode.node-ids"
+INVALIDATION_CHANNEL = "response_cache_invalidation"
+
+# Listings that include every mod, bumped whenever any mod changes
+ALL_MODS_TAG = "mods"
+
+CACHE_CONTROL = "no-cache"
+
+# Query params whose comma-separated items are an unordered set
+SET_PARAMS = frozenset({"tags"})
+
+
+def mod_tag(mod_id: str) -> str:
+    return f"mod:{mod_id}"
+
+
+class CachedResponse:
+    __slots__ = ("body", "media_type", "etag")
+
+    def __init__(self, body: bytes, media_type: str, etag: str):
+        self.body = body
+        self.media_type = media_type
+        self.etag = etag
+
+
+class CacheBackend:
+    """
+    Storage for cached responses. Keys already include the data version, so
+    backends never need to delete anything on invalidation; stale entries
+    are simply never asked for again and age out.
+    """
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raise NotImplementedError
+
+    def set(self, key: str, response: CachedResponse):
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """Byte-bounded in-process LRU."""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._bytes = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: str, response: CachedResponse):
+        size = len(response.body)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous.body)
+            self._entries[key] = response
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.body)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResponseCache:
+    """
+    Caches serialized GET responses keyed by route and normalised query.
+
+    Every cached response depends on a few tags (a mod, or "every mod");
+    invalidating a tag bumps its version. ETags are derived from those
+    versions, so a matching If-None-Match is answered with a 304 before the
+    backend (or the database) is even consulted.
+    """
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self._epoch = secrets.token_hex(8)
+        self._versions: Dict[str, int] = {}
+        self.hits = 0
+        self.not_modified = 0
+        self.misses = 0
+
+    def invalidate(self, tags: Iterable[str]):
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def reset(self):
+        # Invalidations may have been missed, start over with new ETags
+        self._epoch = secrets.token_hex(8)
+        self._versions.clear()
+
+    @staticmethod
+    def normalise(request: Request) -> str:
+        """
+        Orders params by name, keeping repeated params in their original
+        order since the endpoint sees the last one. Values are kept as sent,
+        except for SET_PARAMS, whose comma-separated items are sorted.
+        """
+        params = []
+        for key, value in request.query_params.multi_items():
+            if key in SET_PARAMS:
+                value = ",".join(sorted({item for item in value.split(",") if item}))
+            params.append((key, value))
+        params.sort(key=lambda param: param[0])
+        return request.url.path + "?" + urlencode(params)
+
+    def _key_and_etag(self, route: str, tags: Tuple[str, ...]) -> Tuple[str, str]:
+        versions = ",".join(f"{tag}={self._versions.get(tag, 0)}" for tag in tags)
+        digest = hashlib.sha256(f"{self._epoch}|{route}|{versions}".encode()).hexdigest()[:32]
+        return f"{route}@{digest}", f'"{digest}"'
+
+    async def respond(
+        self,
+        request: Request,
+        tags: Iterable[str],
+        build: Callable[[], Awaitable[BaseModel]]
+    ) -> Response:
+        key, etag = self._key_and_etag(self.normalise(request), tuple(sorted(tags)))
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if request.headers.get("if-none-match") == etag:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        cached = self.backend.get(key)
+        if cached is None:
+            self.misses += 1
+            payload = await build()
+            cached = CachedResponse(payload.__pydantic_serializer__.to_json(payload), "application/json", etag)
+            self.backend.set(key, cached)
+        else:
+            self.hits += 1
+        return Response(content=cached.body, media_type=cached.media_type, headers=headers)
+
+    def metrics(self) -> Dict:
+        metrics = {"hits": self.hits, "not_modified": self.not_modified, "misses": self.misses}
+        if isinstance(self.backend, MemoryBackend):
+            metrics["entries"] = len(self.backend)
+            metrics["bytes"] = self.backend.size_bytes
+        return metrics
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def init_response_cache(listener: NotificationListener, backend: Optional[CacheBackend] = None) -> ResponseCache:
+    global _cache
+    if backend is None:
+        backend = MemoryBackend(int(env_float("RESPONSE_CACHE_MB", 64) * 1024 * 1024))
+    _cache = ResponseCache(backend)
+    listener.subscribe(INVALIDATION_CHANNEL, lambda tag: _cache.invalidate([tag]), _cache.reset)
+    return _cache
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    return _cache
+
+
+async def cached_response(request: Request, tags: Iterable[str], build: Callable[[], Awaitable[BaseModel]]) -> Response:
+    """Serves `build()` through the response cache, or directly when there is none."""
+    if _cache is None:
+        return ApiJSONResponse(await build())
+    return await _cache.respond(request, tags, build)
+
+
+async def invalidate_mod(conn: asyncpg.Connection, mod_id: str):
+    """
+    Invalidates everything cached for a mod, here right away and on the
+    other replicas once the surrounding transaction commits.
+    """
+    tags = [mod_tag(mod_id), ALL_MODS_TAG]
+    if _cache is not None:
+        _cache.invalidate(tags)
+    for tag in tags:
+        await notify(conn, INVALIDATION_CHANNEL, tag)
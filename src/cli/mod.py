@@ -1,8 +1,13 @@
 import argparse
 from typing import Optional
 import asyncio
-from src.jobs import migrate, cleanup_downloads, logout_user, token_cleanup
+from src.jobs.cleanup_downloads import cleanup_downloads
+from src.jobs.logout_user import logout_user
+from src.jobs.rebuild_latest_versions import rebuild_latest_versions
+from src.jobs.token_cleanup import token_cleanup
+from src.jobs.migrate import migrate
 from src.config import AppData
+from src.storage.logos import backfill_logos
 
 def parse_args() -> argparse.Namespace:
     # Create the top-level argument parser
@@ -28,6 +33,12 @@ def parse_args() -> argparse.Namespace:
     logout_parser = job_subparsers.add_parser("logout_developer", help="Emergency logout for a developer")
     logout_parser.add_argument("username", type=str, help="Username of the developer")
     
+    # Backfill logos command
+    job_subparsers.add_parser("backfill_logos", help="Renders stored logo variants for mods that only have mods.image")
+    
+    # Rebuild latest versions command
+    job_subparsers.add_parser("rebuild_latest_versions", help="Rebuilds the latest accepted version table from scratch")
+    
     # Migrate command
     job_subparsers.add_parser("migrate", help="Runs migrations")
     
@@ -57,6 +68,18 @@ async def maybe_cli(data: AppData) -> bool:
                     await logout_user(args.username, conn)
             return True
 
+        elif args.job_command == "backfill_logos":
+            # Render logo variants missing from the logo store
+            async with data.db().acquire() as conn:
+                await backfill_logos(conn)
+            return True
+
+        elif args.job_command == "rebuild_latest_versions":
+            # Rebuild the trigger-maintained latest version table
+            async with data.db().acquire() as conn:
+                await rebuild_latest_versions(conn)
+            return True
+
         elif args.job_command == "cleanup_tokens":
             # Run the token cleanup job
             async with data.db().acquire() as conn:
@@ -0,0 +1,27 @@
+import os
+
+from src.database.pool import DatabasePool
+from src.env import env_int
+
+
+class AppData:
+    """
+    Shared application state, created once at startup and handed to
+    endpoints (via app.state.data) and CLI jobs.
+    """
+    def __init__(self, pool: DatabasePool, app_url: str, max_mod_mb: int):
+        self._pool = pool
+        self.app_url = app_url
+        self.max_mod_mb = max_mod_mb
+
+    def db(self) -> DatabasePool:
+        return self._pool
+
+    @staticmethod
+    async def create() -> "AppData":
+        pool = await DatabasePool.create()
+        return AppData(
+            pool,
+            app_url=os.getenv("APP_URL", "").rstrip("/"),
+            max_mod_mb=env_int("MAX_MOD_MB", 250)
+        )
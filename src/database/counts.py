@@ -0,0 +1,48 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import asyncpg
+
+from src.database import statements
+from src.database.statements import Statement
+from src.env import env_float, env_int
+
+
+class CountCache:
+    """
+    Caches COUNT(*) results of list queries for `ttl` seconds, so paging
+    through a list doesn't recount it on every page. Counts served from
+    here may be slightly stale.
+    """
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[int, float]]" = OrderedDict()
+
+    async def count(self, conn: asyncpg.Connection, statement: Statement, *args) -> Tuple[int, bool]:
+        """Returns (count, cached)."""
+        key = (statement.name, *args)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            self._entries.move_to_end(key)
+            return entry[0], True
+        count = await statements.fetchval(conn, statement, *args)
+        self._entries[key] = (count, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return count, False
+
+
+_counts: Optional[CountCache] = None
+
+
+def get_count_cache() -> CountCache:
+    global _counts
+    if _counts is None:
+        _counts = CountCache(
+            ttl=env_float("COUNT_CACHE_TTL", 30),
+            max_entries=env_int("COUNT_CACHE_MAX_ENTRIES", 10_000)
+        )
+    return _counts
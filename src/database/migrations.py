@@ -0,0 +1,127 @@
+import hashlib
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path("migrations")
+MIGRATION_FILE_REGEX = re.compile(r"^(\d+)_([\w\-]+)\.sql$")
+
+# Arbitrary, but fixed: every replica must use the same advisory lock key
+ADVISORY_LOCK_KEY = 0x6765_6F64_6500
+
+# Schema created by the old "run every file on boot" runner, before the ledger
+BASELINE_VERSION = 1
+
+CREATE_LEDGER = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY NOT NULL,
+    name TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    execution_ms INTEGER NOT NULL DEFAULT 0,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    def __init__(self, version: int, name: str, path: Path):
+        self.version = version
+        self.name = name
+        self.path = path
+        self.sql = path.read_text(encoding="utf-8")
+        self.checksum = hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+    def __repr__(self):
+        return f"<Migration {self.version:04d}_{self.name}>"
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Migration files ordered by their numeric prefix."""
+    migrations = []
+    for path in directory.iterdir():
+        if path.suffix != ".sql":
+            continue
+        match = MIGRATION_FILE_REGEX.match(path.name)
+        if match is None:
+            raise MigrationError(f"Migration file {path.name} must be named NNNN_name.sql")
+        migrations.append(Migration(int(match.group(1)), match.group(2), path))
+    migrations.sort(key=lambda m: m.version)
+    for previous, current in zip(migrations, migrations[1:]):
+        if previous.version == current.version:
+            raise MigrationError(f"Duplicate migration version {current.version}")
+    return migrations
+
+
+async def _read_ledger(conn: asyncpg.Connection) -> Dict[int, str]:
+    rows = await conn.fetch("SELECT version, checksum FROM schema_migrations")
+    return {row["version"]: row["checksum"] for row in rows}
+
+
+def _pending(migrations: List[Migration], applied: Dict[int, str]) -> List[Migration]:
+    pending = []
+    for migration in migrations:
+        checksum = applied.get(migration.version)
+        if checksum is None:
+            pending.append(migration)
+        elif checksum != migration.checksum:
+            raise MigrationError(f"{migration!r} was changed after being applied")
+    return pending
+
+
+async def _baseline(conn: asyncpg.Connection, migrations: List[Migration]):
+    # Databases set up before the ledger existed already have the initial schema
+    if await conn.fetchval("SELECT to_regclass('public.mods') IS NOT NULL"):
+        for migration in migrations:
+            if migration.version == BASELINE_VERSION:
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3) "
+                    "ON CONFLICT DO NOTHING",
+                    migration.version, migration.name, migration.checksum
+                )
+                logger.info(f"Baselined existing schema at {migration!r}")
+
+
+async def migrate(conn: asyncpg.Connection, directory: Path = MIGRATIONS_DIR) -> int:
+    """
+    Applies pending migrations and returns how many ran. When the schema
+    is already up to date this is a single read of the ledger.
+    """
+    migrations = discover(directory)
+    try:
+        if not _pending(migrations, await _read_ledger(conn)):
+            logger.info("Database schema is up to date")
+            return 0
+    except asyncpg.exceptions.UndefinedTableError:
+        pass
+
+    # Only one replica migrates at a time, the others wait and then find nothing to do
+    await conn.execute("SELECT pg_advisory_lock($1)", ADVISORY_LOCK_KEY)
+    try:
+        ledger_exists = await conn.fetchval("SELECT to_regclass('public.schema_migrations') IS NOT NULL")
+        if not ledger_exists:
+            await conn.execute(CREATE_LEDGER)
+            await _baseline(conn, migrations)
+        pending = _pending(migrations, await _read_ledger(conn))
+        for migration in pending:
+            start = time.perf_counter()
+            async with conn.transaction():
+                await conn.execute(migration.sql)
+                elapsed_ms = int((time.perf_counter() - start) * 1000)
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum, execution_ms) VALUES ($1, $2, $3, $4)",
+                    migration.version, migration.name, migration.checksum, elapsed_ms
+                )
+            logger.info(f"Applied {migration!r} in {elapsed_ms}ms")
+        return len(pending)
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", ADVISORY_LOCK_KEY)
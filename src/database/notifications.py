@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+import asyncpg
+
+from src.database.pool import PoolSettings
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 5.0
+
+
+class Subscription:
+    __slots__ = ("on_notify", "on_reset")
+
+    def __init__(self, on_notify: Callable[[str], None], on_reset: Callable[[], None]):
+        self.on_notify = on_notify
+        self.on_reset = on_reset
+
+
+class NotificationListener:
+    """
+    One dedicated connection LISTENing on every subscribed channel, used to
+    fan cache invalidations out to all replicas. Whenever the connection is
+    (re)established or lost, subscribers are reset, since notifications may
+    have been missed in between.
+    """
+    def __init__(self, settings: Optional[PoolSettings] = None):
+        self.settings = settings or PoolSettings()
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, channel: str, on_notify: Callable[[str], None], on_reset: Callable[[], None]):
+        # Channels are only LISTENed on (re)connect, subscribe before start()
+        self._subscriptions.setdefault(channel, []).append(Subscription(on_notify, on_reset))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _reset(self):
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.on_reset()
+
+    def _dispatch(self, conn, pid, channel: str, payload: str):
+        for subscription in self._subscriptions.get(channel, ()):
+            try:
+                subscription.on_notify(payload)
+            except Exception as e:
+                logger.error(f"Handling notification on {channel} failed: {e!r}")
+
+    async def _run(self):
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(**self.settings.dsn_params)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _: lost.set())
+                for channel in self._subscriptions:
+                    await conn.add_listener(channel, self._dispatch)
+                self._reset()
+                await lost.wait()
+                logger.warning("Notification listener lost its connection")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError) as e:
+                logger.error(f"Notification listener failed: {e!r}")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            self._reset()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+
+async def notify(conn: asyncpg.Connection, channel: str, payload: str):
+    """Sent when the surrounding transaction commits (or right away outside one)."""
+    await conn.execute("SELECT pg_notify($1, $2)", channel, payload)
+
+
+_listener: Optional[NotificationListener] = None
+
+
+def get_notification_listener() -> NotificationListener:
+    global _listener
+    if _listener is None:
+        _listener = NotificationListener()
+    return _listener
+
+
+async def shutdown_notification_listener():
+    global _listener
+    if _listener is not None:
+        await _listener.stop()
+        _listener = None
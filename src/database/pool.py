@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+import asyncpg
+
+import src.database.queries  # noqa: F401 (registers the hot statements)
+from src.database.statements import RegistryConnection, init_connection
+from src.env import env_float, env_int
+from src.types.api import ApiError
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (in ms) of the acquire latency histogram buckets
+ACQUIRE_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class PoolSettings:
+    def __init__(self):
+        self.dsn_params = {
+            "database": os.getenv("DB_NAME"),
+            "user": os.getenv("DB_USER"),
+            "password": os.getenv("DB_PASSWORD"),
+            "host": os.getenv("DB_HOST"),
+            "port": os.getenv("DB_PORT") or None,
+        }
+        self.min_size = env_int("DB_POOL_MIN_SIZE", 2)
+        self.max_size = env_int("DB_POOL_MAX_SIZE", 10)
+        self.statement_cache_size = env_int("DB_STATEMENT_CACHE_SIZE", 256)
+        self.acquire_timeout = env_float("DB_ACQUIRE_TIMEOUT", 5)
+        self.drain_timeout = env_float("DB_DRAIN_TIMEOUT", 10)
+
+
+class AcquireHistogram:
+    def __init__(self):
+        self.buckets: List[int] = [0] * (len(ACQUIRE_BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms: float):
+        self.count += 1
+        self.sum_ms += ms
+        for i, bound in enumerate(ACQUIRE_BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def to_dict(self) -> Dict:
+        labels = [f"le_{bound}" for bound in ACQUIRE_BUCKETS_MS] + ["le_inf"]
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class DatabasePool:
+    """
+    Application-scoped asyncpg pool. acquire() enforces the configured
+    timeout (surfaced as a DbAcquireError) and records pool metrics.
+    """
+    def __init__(self, pool: asyncpg.Pool, settings: PoolSettings):
+        self._pool = pool
+        self.settings = settings
+        self.waiting = 0
+        self.acquire_errors = 0
+        self.histogram = AcquireHistogram()
+
+    @staticmethod
+    async def create(settings: Optional[PoolSettings] = None, **kwargs) -> "DatabasePool":
+        settings = settings or PoolSettings()
+        pool = await asyncpg.create_pool(
+            **settings.dsn_params,
+            min_size=settings.min_size,
+            max_size=settings.max_size,
+            statement_cache_size=settings.statement_cache_size,
+            connection_class=RegistryConnection,
+            init=init_connection,
+            **kwargs
+        )
+        logger.info(f"Database pool created (min {settings.min_size}, max {settings.max_size})")
+        return DatabasePool(pool, settings)
+
+    @asynccontextmanager
+    async def acquire(self):
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            conn = await self._pool.acquire(timeout=self.settings.acquire_timeout)
+        except (asyncio.TimeoutError, asyncpg.exceptions.TooManyConnectionsError) as e:
+            self.acquire_errors += 1
+            logger.error(f"Failed to acquire database connection: {e!r}")
+            raise ApiError(error_type="DbAcquireError")
+        finally:
+            self.waiting -= 1
+        self.histogram.observe((time.perf_counter() - start) * 1000)
+        try:
+            yield conn
+        finally:
+            await self._pool.release(conn)
+
+    def metrics(self) -> Dict:
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        return {
+            "size": size,
+            "idle": idle,
+            "in_use": size - idle,
+            "waiting": self.waiting,
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+            "acquire_errors": self.acquire_errors,
+            "acquire_latency": self.histogram.to_dict(),
+        }
+
+    async def close(self):
+        """Waits for checked out connections to be released, then closes."""
+        try:
+            await asyncio.wait_for(self._pool.close(), timeout=self.settings.drain_timeout)
+            logger.info("Database pool drained")
+        except asyncio.TimeoutError:
+            logger.warning("Database pool did not drain in time, terminating connections")
+            self._pool.terminate()
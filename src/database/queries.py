@@ -0,0 +1,487 @@
+"""
+Every hot query in one place. Statements are registered at import time and
+prepared on each pooled connection; decoders turn rows straight into models.
+"""
+from src.database.statements import register
+from src.types.models.dependency import (
+    DependencyImportance,
+    FetchedDependency,
+    ModVersionCompare,
+)
+from src.types.models.developer import Developer
+from src.types.models.incompatibility import (
+    FetchedIncompatibility,
+    IncompatibilityImportance,
+    Replacement,
+)
+from src.types.version_constraint import normalize_compare
+
+
+def decode_dependency_tree_row(row) -> tuple:
+    return row["start_node"], FetchedDependency(
+        mod_version_id=row["dependency_vid"],
+        version=row["dependency_version"],
+        dependency_id=row["dependency"],
+        compare=ModVersionCompare(normalize_compare(row["compare"])),
+        importance=DependencyImportance(row["importance"])
+    )
+
+
+def decode_developer(row) -> Developer:
+    return Developer(
+        id=row["id"],
+        username=row["username"],
+        display_name=row["display_name"],
+        verified=row["verified"],
+        admin=row["admin"],
+        github_id=row["github_user_id"]
+    )
+
+
+def decode_incompatibility(row) -> FetchedIncompatibility:
+    return FetchedIncompatibility(
+        mod_id=row["mod_id"],
+        version=row["version"],
+        incompatibility_id=row["incompatibility_id"],
+        compare=row["compare"],
+        importance=IncompatibilityImportance(row["importance"])
+    )
+
+
+def decode_replacement(row) -> tuple:
+    return row["replaced"], Replacement(
+        id=row["replacement"],
+        version=row["replacement_version"],
+        replacement_id=row["replacement_id"],
+        download_link="",
+        dependencies=[],
+        incompatibilities=[]
+    )
+
+
+# --- Dependencies ---
+
+INSERT_DEPENDENCY = register(
+    "dependencies.insert",
+    """
+    INSERT INTO dependencies (dependent_id, dependency_id, version, compare, importance)
+    VALUES ($1, $2, $3, $4, $5)
+    """
+)
+
+CLEAR_DEPENDENCIES = register(
+    "dependencies.clear",
+    "DELETE FROM dependencies WHERE dependent_id = $1"
+)
+
+# $1 start mod version ids, $2 gd, $3 platform, $4 geode
+DEPENDENCY_TREE = register(
+    "dependencies.tree",
+    """
+    WITH RECURSIVE dep_tree AS (
+        SELECT
+            dp.dependent_id AS start_node,
+            dp.dependency_id AS dependency,
+            pick.id AS dependency_vid,
+            pick.version AS dependency_version,
+            dp.version AS needs_version,
+            dp.compare::text AS compare,
+            dp.importance::text AS importance
+        FROM dependencies dp
+        CROSS JOIN LATERAL latest_compatible_version(
+            dp.dependency_id, dp.version, dp.compare::text, $2, $3, $4
+        ) pick
+        WHERE dp.dependent_id = ANY($1::int[])
+        UNION
+        SELECT
+            dt.start_node,
+            dp.dependency_id,
+            pick.id,
+            pick.version,
+            dp.version,
+            dp.compare::text,
+            dp.importance::text
+        FROM dep_tree dt
+        INNER JOIN dependencies dp ON dp.dependent_id = dt.dependency_vid
+        CROSS JOIN LATERAL latest_compatible_version(
+            dp.dependency_id, dp.version, dp.compare::text, $2, $3, $4
+        ) pick
+    )
+    SELECT * FROM dep_tree
+    """,
+    decode_dependency_tree_row
+)
+
+ALL_DEPENDENCIES = register(
+    "dependencies.all",
+    """
+    SELECT dependent_id, dependency_id, version, compare::text AS compare, importance::text AS importance
+    FROM dependencies
+    """
+)
+
+# $1 dependent mod version ids
+DEPENDENCIES_FOR_VERSIONS = register(
+    "dependencies.for_versions",
+    """
+    SELECT dependent_id, dependency_id, version, compare::text AS compare, importance::text AS importance
+    FROM dependencies
+    WHERE dependent_id = ANY($1::int[])
+    """
+)
+
+# $1 mod ids to load, NULL for all of them
+ACCEPTED_VERSION_TARGETS = register(
+    "mod_versions.accepted_targets",
+    """
+    SELECT mv.id, mv.mod_id, mv.version, mv.geode, mgv.gd::text AS gd, mgv.platform::text AS platform
+    FROM mod_versions mv
+    INNER JOIN mod_version_statuses mvs ON mvs.id = mv.status_id
+    INNER JOIN mod_gd_versions mgv ON mgv.mod_id = mv.id
+    WHERE mvs.status = 'accepted'
+    AND ($1::text[] IS NULL OR mv.mod_id = ANY($1::text[]))
+    """
+)
+
+# $1 mod ids, $2 gd, $3 platform, $4 geode. Reads the trigger-maintained
+# mod_latest_versions table, a few index entries per mod. Every matching
+# row is returned, newest first per mod, so a caller can skip versions it
+# can't parse.
+LATEST_COMPATIBLE_VERSIONS = register(
+    "mod_versions.latest_compatible",
+    """
+    SELECT mlv.mod_id, mlv.mod_version_id AS id, mlv.version
+    FROM mod_latest_versions mlv
+    WHERE mlv.mod_id = ANY($1::text[])
+    AND ($2::text IS NULL OR mlv.gd::text = $2 OR mlv.gd = '*')
+    AND ($3::text IS NULL OR mlv.platform::text = $3)
+    AND ($4::text IS NULL OR mlv.geode_major = split_part(ltrim($4, 'v'), '.', 1))
+    ORDER BY mlv.mod_id, mlv.version_key DESC, mlv.version DESC
+    """
+)
+
+REBUILD_LATEST_VERSIONS = register(
+    "mod_latest_versions.rebuild",
+    "SELECT rebuild_mod_latest_versions()"
+)
+
+# --- Incompatibilities ---
+
+INCOMPATIBILITIES_FOR_VERSIONS = register(
+    "incompatibilities.for_versions",
+    """
+    SELECT mod_id, version, incompatibility_id, compare::text AS compare, importance::text AS importance
+    FROM incompatibilities
+    WHERE mod_id = ANY($1::int[])
+    """,
+    decode_incompatibility
+)
+
+# $1 superseded mod ids, $2 gd, $3 platform, $4 geode
+SUPERSEDES_FOR = register(
+    "incompatibilities.supersedes",
+    """
+    SELECT DISTINCT ON (replaced.incompatibility_id)
+        replaced.incompatibility_id AS replaced,
+        replacement.mod_id AS replacement,
+        replacement.version AS replacement_version,
+        replacement.id AS replacement_id
+    FROM incompatibilities replaced
+    INNER JOIN mod_versions replacement ON replacement.id = replaced.mod_id
+    INNER JOIN mod_version_statuses mvs ON mvs.id = replacement.status_id
+    WHERE replaced.importance = 'superseded'
+    AND replaced.incompatibility_id = ANY($1::text[])
+    AND mvs.status = 'accepted'
+    AND ($4::text IS NULL OR split_part(ltrim(replacement.geode, 'v'), '.', 1) = split_part(ltrim($4, 'v'), '.', 1))
+    AND EXISTS (
+        SELECT 1 FROM mod_gd_versions mgv
+        WHERE mgv.mod_id = replacement.id
+        AND ($2::text IS NULL OR mgv.gd::text = $2 OR mgv.gd = '*')
+        AND ($3::text IS NULL OR mgv.platform::text = $3)
+    )
+    ORDER BY replaced.incompatibility_id, semver_key(replacement.version) DESC NULLS LAST
+    """,
+    decode_replacement
+)
+
+# --- Downloads ---
+
+CREATE_PENDING_DOWNLOADS = register(
+    "mod_downloads.create_pending",
+    """
+    CREATE TEMP TABLE IF NOT EXISTS pending_downloads (
+        mod_version_id INTEGER NOT NULL,
+        ip INET NOT NULL,
+        time_downloaded TIMESTAMPTZ NOT NULL
+    ) ON COMMIT DELETE ROWS
+    """
+)
+
+# Moves pending_downloads into mod_downloads; only (mod_version_id, ip) pairs
+# not seen within the last $1 days bump the counters. The time bound also lets
+# the planner prune expired partitions. Returns the number of new downloads.
+FLUSH_PENDING_DOWNLOADS = register(
+    "mod_downloads.flush_pending",
+    """
+    WITH inserted AS (
+        INSERT INTO mod_downloads (mod_version_id, ip, time_downloaded)
+        SELECT DISTINCT ON (p.mod_version_id, p.ip) p.mod_version_id, p.ip, p.time_downloaded
+        FROM pending_downloads p
+        WHERE NOT EXISTS (
+            SELECT 1 FROM mod_downloads d
+            WHERE d.mod_version_id = p.mod_version_id
+            AND d.ip = p.ip
+            AND d.time_downloaded >= now() - make_interval(days => $1)
+        )
+        ORDER BY p.mod_version_id, p.ip, p.time_downloaded
+        RETURNING mod_version_id
+    ),
+    per_version AS (
+        SELECT mod_version_id, count(*) AS n FROM inserted GROUP BY mod_version_id
+    ),
+    version_counts AS (
+        INSERT INTO mod_version_download_counts (mod_version_id, download_count)
+        SELECT mod_version_id, n FROM per_version
+        ON CONFLICT (mod_version_id) DO UPDATE
+        SET download_count = mod_version_download_counts.download_count + EXCLUDED.download_count
+    ),
+    mod_counts AS (
+        INSERT INTO mod_download_counts (mod_id, download_count)
+        SELECT mv.mod_id, sum(pv.n)
+        FROM per_version pv
+        INNER JOIN mod_versions mv ON mv.id = pv.mod_version_id
+        GROUP BY mv.mod_id
+        ON CONFLICT (mod_id) DO UPDATE
+        SET download_count = mod_download_counts.download_count + EXCLUDED.download_count
+    )
+    SELECT coalesce(sum(n), 0)::bigint FROM per_version
+    """
+)
+
+DOWNLOAD_COUNTS_FOR_MODS = register(
+    "mod_download_counts.for_mods",
+    "SELECT mod_id, download_count FROM mod_download_counts WHERE mod_id = ANY($1::text[])"
+)
+
+# Any version uploaded from exactly these bytes: $1 sha256
+MOD_VERSION_BY_HASH = register(
+    "mod_versions.by_hash",
+    "SELECT mod_id, version FROM mod_versions WHERE hash = $1 LIMIT 1"
+)
+
+# Accepted version to download: $1 mod id, $2 version
+MOD_VERSION_DOWNLOAD = register(
+    "mod_versions.download",
+    """
+    SELECT mv.id, mv.hash, mv.download_link
+    FROM mod_versions mv
+    INNER JOIN mod_version_statuses mvs ON mvs.id = mv.status_id
+    WHERE mv.mod_id = $1 AND mv.version = $2 AND mvs.status = 'accepted'
+    """
+)
+
+# name, day (parsed from the name) and estimated row count of each partition
+MOD_DOWNLOADS_PARTITIONS = register(
+    "mod_downloads.partitions",
+    """
+    SELECT c.relname AS name, to_date(substring(c.relname FROM 16), 'YYYYMMDD') AS day, c.reltuples
+    FROM pg_inherits i
+    INNER JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'mod_downloads'::regclass
+    AND c.relname ~ '^mod_downloads_p[0-9]{8}$'
+    ORDER BY c.relname
+    """
+)
+
+CREATE_MOD_DOWNLOADS_PARTITION = register(
+    "mod_downloads.create_partition",
+    "SELECT create_mod_downloads_partition($1::date)"
+)
+
+# --- Webhook outbox ---
+
+# $1 embed, $2 seconds the inserting replica holds the row
+INSERT_WEBHOOK_OUTBOX = register(
+    "webhook_outbox.insert",
+    """
+    INSERT INTO webhook_outbox (embed, claimed_until)
+    VALUES ($1::jsonb, now() + make_interval(secs => $2))
+    RETURNING id
+    """
+)
+
+# Claims up to $1 unclaimed rows for $2 seconds, skipping rows with $3 or
+# more failed deliveries. Rows another replica is claiming are skipped.
+CLAIM_WEBHOOK_OUTBOX = register(
+    "webhook_outbox.claim",
+    """
+    UPDATE webhook_outbox SET claimed_until = now() + make_interval(secs => $2)
+    WHERE id IN (
+        SELECT id FROM webhook_outbox
+        WHERE attempts < $3
+        AND (claimed_until IS NULL OR claimed_until < now())
+        ORDER BY id
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, embed::text AS embed
+    """
+)
+
+DELETE_WEBHOOK_OUTBOX = register(
+    "webhook_outbox.delete",
+    "DELETE FROM webhook_outbox WHERE id = ANY($1::bigint[])"
+)
+
+BUMP_WEBHOOK_OUTBOX_ATTEMPTS = register(
+    "webhook_outbox.bump_attempts",
+    "UPDATE webhook_outbox SET attempts = attempts + 1, claimed_until = NULL WHERE id = ANY($1::bigint[])"
+)
+
+# --- Developers ---
+
+# $1 github user id, $2 github login; creates the developer on first login
+FIND_OR_CREATE_DEVELOPER = register(
+    "developers.find_or_create",
+    """
+    WITH existing AS (
+        SELECT id FROM developers WHERE github_user_id = $1
+    ),
+    created AS (
+        INSERT INTO developers (username, display_name, github_user_id)
+        SELECT $2, $2, $1
+        WHERE NOT EXISTS (SELECT 1 FROM existing)
+        RETURNING id
+    )
+    SELECT id FROM existing
+    UNION ALL
+    SELECT id FROM created
+    """
+)
+
+CREATE_AUTH_TOKEN = register(
+    "auth_tokens.create",
+    """
+    INSERT INTO auth_tokens (developer_id, expires_at)
+    VALUES ($1, now() + make_interval(secs => $2))
+    RETURNING token::text
+    """
+)
+
+DEVELOPER_FOR_TOKEN = register(
+    "auth_tokens.developer",
+    """
+    SELECT d.id, d.username, d.display_name, d.verified, d.admin, d.github_user_id
+    FROM auth_tokens a
+    INNER JOIN developers d ON d.id = a.developer_id
+    WHERE a.token = $1::uuid
+    AND (a.expires_at IS NULL OR a.expires_at > now())
+    """,
+    decode_developer
+)
+
+# Returns the developer id, or NULL if there is no such developer
+LOGOUT_DEVELOPER = register(
+    "auth_tokens.logout_developer",
+    """
+    WITH developer AS (
+        SELECT id FROM developers WHERE username = $1
+    ),
+    auth AS (
+        DELETE FROM auth_tokens WHERE developer_id IN (SELECT id FROM developer)
+    ),
+    refresh AS (
+        DELETE FROM refresh_tokens WHERE developer_id IN (SELECT id FROM developer)
+    )
+    SELECT id FROM developer
+    """
+)
+
+# Returns the developers whose auth tokens were removed
+CLEANUP_EXPIRED_TOKENS = register(
+    "auth_tokens.cleanup_expired",
+    """
+    WITH auth AS (
+        DELETE FROM auth_tokens WHERE expires_at IS NOT NULL AND expires_at <= now()
+        RETURNING developer_id
+    ),
+    refresh AS (
+        DELETE FROM refresh_tokens WHERE expires_at <= now()
+    )
+    SELECT DISTINCT developer_id FROM auth
+    """
+)
+
+# --- Mod listing ---
+
+# Latest accepted version of each mod with everything listings filter on.
+# $1 mod ids to load, NULL for all of them
+MOD_LISTING = register(
+    "mods.listing",
+    """
+    SELECT
+        m.id,
+        mv.name,
+        mv.description,
+        mv.version,
+        m.created_at,
+        m.updated_at,
+        coalesce(dc.download_count, 0) AS download_count,
+        coalesce(tags.ids, '{}') AS tag_ids,
+        targets.gds,
+        targets.platforms
+    FROM mods m
+    CROSS JOIN LATERAL (
+        SELECT v.id, v.name, v.description, v.version
+        FROM mod_versions v
+        INNER JOIN mod_version_statuses mvs ON mvs.id = v.status_id
+        WHERE v.mod_id = m.id AND mvs.status = 'accepted'
+        ORDER BY semver_key(v.version) DESC NULLS LAST
+        LIMIT 1
+    ) mv
+    CROSS JOIN LATERAL (
+        SELECT
+            coalesce(array_agg(mgv.gd::text), '{}') AS gds,
+            coalesce(array_agg(mgv.platform::text), '{}') AS platforms
+        FROM mod_gd_versions mgv
+        WHERE mgv.mod_id = mv.id
+    ) targets
+    LEFT JOIN LATERAL (
+        SELECT array_agg(mmt.tag_id) AS ids FROM mods_mod_tags mmt WHERE mmt.mod_id = m.id
+    ) tags ON true
+    LEFT JOIN mod_download_counts dc ON dc.mod_id = m.id
+    WHERE $1::text[] IS NULL OR m.id = ANY($1::text[])
+    """
+)
+
+ALL_MOD_TAGS = register(
+    "mod_tags.all",
+    "SELECT id, name FROM mod_tags"
+)
+
+# --- Developer mods ---
+
+# Keyset page: $1 developer id, $2 last mod id of the previous page (or NULL), $3 limit
+DEVELOPER_MODS_PAGE = register(
+    "mods_developers.page",
+    """
+    SELECT m.id, mv.name, mv.version, md.is_owner
+    FROM mods_developers md
+    INNER JOIN mods m ON m.id = md.mod_id
+    CROSS JOIN LATERAL (
+        SELECT v.name, v.version FROM mod_versions v
+        WHERE v.mod_id = m.id
+        ORDER BY semver_key(v.version) DESC NULLS LAST
+        LIMIT 1
+    ) mv
+    WHERE md.developer_id = $1
+    AND ($2::text IS NULL OR md.mod_id > $2)
+    ORDER BY md.mod_id
+    LIMIT $3
+    """
+)
+
+DEVELOPER_MODS_COUNT = register(
+    "mods_developers.count",
+    "SELECT count(*) FROM mods_developers WHERE developer_id = $1"
+)
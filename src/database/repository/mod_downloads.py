@@ -0,0 +1,115 @@
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Tuple
+
+import asyncpg
+
+from src.database import queries, statements
+
+logger = logging.getLogger(__name__)
+
+# Downloads are counted once per (mod version, ip) within this many days
+DOWNLOAD_RETENTION_DAYS = 30
+
+# Daily partitions created ahead of time, so inserts never hit a missing one
+PRECREATE_DAYS = 14
+
+# Serializes flushes across replicas, so two of them can't count the same download
+FLUSH_LOCK_KEY = 0x6765_6F64_6501
+
+# (mod_version_id, ip, time_downloaded)
+DownloadRow = Tuple[int, str, datetime]
+
+
+class CleanupResult:
+    def __init__(self):
+        self.partitions_removed = 0
+        self.partitions_created = 0
+        # Estimated from planner statistics, counting rows would scan every partition
+        self.rows_removed = 0
+        self.elapsed_ms = 0.0
+
+    def __repr__(self):
+        return (
+            f"<CleanupResult removed {self.partitions_removed} partitions (~{self.rows_removed} rows), "
+            f"created {self.partitions_created} in {self.elapsed_ms:.1f}ms>"
+        )
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+async def _insert(conn: asyncpg.Connection, rows: List[DownloadRow]) -> int:
+    async with conn.transaction():
+        await conn.execute("SELECT pg_advisory_xact_lock($1)", FLUSH_LOCK_KEY)
+        await statements.execute(conn, queries.CREATE_PENDING_DOWNLOADS)
+        await conn.copy_records_to_table(
+            "pending_downloads",
+            records=rows,
+            columns=["mod_version_id", "ip", "time_downloaded"]
+        )
+        return await statements.fetchval(conn, queries.FLUSH_PENDING_DOWNLOADS, DOWNLOAD_RETENTION_DAYS)
+
+
+async def insert_batch(conn: asyncpg.Connection, rows: List[DownloadRow]) -> int:
+    """
+    Writes a batch of downloads in one transaction: COPY into a temporary
+    staging table, then a single statement moves new rows into mod_downloads
+    and bumps the aggregate counters. Returns how many downloads were new.
+    """
+    if not rows:
+        return 0
+    try:
+        return await _insert(conn, rows)
+    except asyncpg.exceptions.CheckViolationError:
+        # No partition for some row (the cleanup job hasn't run in a while)
+        days = {row[2].astimezone(timezone.utc).date() for row in rows}
+        for day in sorted(days):
+            await statements.fetchval(conn, queries.CREATE_MOD_DOWNLOADS_PARTITION, day)
+        logger.warning(f"Created missing mod_downloads partitions for {len(days)} days")
+        return await _insert(conn, rows)
+
+
+async def get_counts(conn: asyncpg.Connection, mod_ids: Iterable[str]) -> Dict[str, int]:
+    rows = await statements.fetch(conn, queries.DOWNLOAD_COUNTS_FOR_MODS, list(mod_ids))
+    return {row["mod_id"]: row["download_count"] for row in rows}
+
+
+async def create_partitions(conn: asyncpg.Connection, start: date, days: int) -> int:
+    created = 0
+    for offset in range(days):
+        if await statements.fetchval(conn, queries.CREATE_MOD_DOWNLOADS_PARTITION, start + timedelta(days=offset)):
+            created += 1
+    return created
+
+
+async def cleanup(conn: asyncpg.Connection) -> CleanupResult:
+    """
+    Drops whole daily partitions that fall out of the retention window and
+    creates the upcoming ones. Partitions are detached CONCURRENTLY, which
+    does not block inserts; the aggregate counters are left untouched.
+    """
+    start = time.perf_counter()
+    result = CleanupResult()
+    cutoff = _today() - timedelta(days=DOWNLOAD_RETENTION_DAYS)
+
+    for partition in await statements.fetch(conn, queries.MOD_DOWNLOADS_PARTITIONS):
+        # Partitions from the cutoff day onwards still hold live rows
+        if partition["day"] >= cutoff:
+            continue
+        name = partition["name"]
+        try:
+            # Must run outside a transaction block
+            await conn.execute(f'ALTER TABLE mod_downloads DETACH PARTITION "{name}" CONCURRENTLY')
+        except asyncpg.exceptions.ObjectNotInPrerequisiteStateError:
+            # An earlier detach was interrupted
+            await conn.execute(f'ALTER TABLE mod_downloads DETACH PARTITION "{name}" FINALIZE')
+        await conn.execute(f'DROP TABLE "{name}"')
+        result.partitions_removed += 1
+        result.rows_removed += max(int(partition["reltuples"]), 0)
+
+    result.partitions_created = await create_partitions(conn, _today(), PRECREATE_DAYS + 1)
+    result.elapsed_ms = (time.perf_counter() - start) * 1000
+    return result
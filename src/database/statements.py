@@ -0,0 +1,116 @@
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+
+class Statement:
+    """A named SQL statement with an optional row decoder."""
+    __slots__ = ("name", "sql", "decoder")
+
+    def __init__(self, name: str, sql: str, decoder: Optional[Callable[[asyncpg.Record], Any]] = None):
+        self.name = name
+        self.sql = sql
+        self.decoder = decoder
+
+    def __repr__(self):
+        return f"<Statement {self.name}>"
+
+
+_registry: Dict[str, Statement] = {}
+
+
+def register(name: str, sql: str, decoder: Optional[Callable[[asyncpg.Record], Any]] = None) -> Statement:
+    if name in _registry:
+        raise ValueError(f"Statement {name} is already registered")
+    statement = Statement(name, sql, decoder)
+    _registry[name] = statement
+    return statement
+
+
+def registered() -> List[Statement]:
+    return list(_registry.values())
+
+
+class RegistryConnection(asyncpg.Connection):
+    """
+    Connection class for the pool that keeps every registered statement
+    prepared, so hot queries are parsed and planned once per connection.
+    """
+    __slots__ = ("_prepared",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._prepared: Dict[str, asyncpg.prepared_stmt.PreparedStatement] = {}
+
+    async def prepare_registry(self):
+        for statement in _registry.values():
+            try:
+                self._prepared[statement.name] = await self.prepare(statement.sql)
+            except asyncpg.PostgresError as e:
+                # Schema may not exist yet (e.g. before migrations); prepare lazily later
+                logger.warning(f"Could not prepare {statement.name}: {e}")
+
+    async def registered_statement(self, statement: Statement) -> asyncpg.prepared_stmt.PreparedStatement:
+        prepared = self._prepared.get(statement.name)
+        if prepared is None:
+            prepared = await self.prepare(statement.sql)
+            self._prepared[statement.name] = prepared
+        return prepared
+
+    def forget_statement(self, statement: Statement):
+        self._prepared.pop(statement.name, None)
+
+
+async def init_connection(conn: RegistryConnection):
+    """Pool init hook, runs once for each new pooled connection."""
+    await conn.prepare_registry()
+
+
+async def _prepared(conn, statement: Statement):
+    if hasattr(conn, "registered_statement"):
+        return await conn.registered_statement(statement)
+    # Plain connections (e.g. ones opened outside the pool)
+    return await conn.prepare(statement.sql)
+
+
+async def _run(conn, statement: Statement, method: str, *args):
+    prepared = await _prepared(conn, statement)
+    try:
+        return await getattr(prepared, method)(*args)
+    except asyncpg.exceptions.InvalidCachedStatementError:
+        # Schema changed under the prepared plan, prepare it again once
+        if hasattr(conn, "forget_statement"):
+            conn.forget_statement(statement)
+        prepared = await _prepared(conn, statement)
+        return await getattr(prepared, method)(*args)
+
+
+async def fetch(conn, statement: Statement, *args) -> List[Any]:
+    rows = await _run(conn, statement, "fetch", *args)
+    if statement.decoder is None:
+        return rows
+    decoder = statement.decoder
+    return [decoder(row) for row in rows]
+
+
+async def fetchrow(conn, statement: Statement, *args) -> Optional[Any]:
+    row = await _run(conn, statement, "fetchrow", *args)
+    if row is None or statement.decoder is None:
+        return row
+    return statement.decoder(row)
+
+
+async def fetchval(conn, statement: Statement, *args) -> Any:
+    return await _run(conn, statement, "fetchval", *args)
+
+
+async def execute(conn, statement: Statement, *args) -> None:
+    # PreparedStatement has no execute(); fetch the (empty) result instead
+    await _run(conn, statement, "fetch", *args)
+
+
+async def executemany(conn, statement: Statement, args: Iterable[tuple]):
+    await _run(conn, statement, "executemany", args)
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from src.database.pool import DatabasePool
+from src.database.repository import mod_downloads
+from src.env import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+# A batch is dropped once it has failed to flush this many times in a row
+MAX_FLUSH_ATTEMPTS = 5
+
+
+class DownloadPipeline:
+    """
+    Collects download events off the request path. record() never touches
+    the database: events are de-duplicated per (mod version, ip) within
+    `dedup_window` seconds and flushed in bulk every `flush_interval`
+    seconds, or as soon as `batch_size` events are waiting.
+
+    Dropping an event only loses a download count, so when the queue is
+    full new events are discarded instead of applying backpressure. A batch
+    that fails to flush is held aside and retried before anything else, so
+    at most `max_queue + batch_size` events are kept in memory.
+    """
+    def __init__(
+        self,
+        pool: DatabasePool,
+        flush_interval: float,
+        batch_size: int,
+        max_queue: int,
+        dedup_window: float
+    ):
+        self._pool = pool
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dedup_window = dedup_window
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._seen: Dict[Tuple[int, str], float] = {}
+        self._retry: List[mod_downloads.DownloadRow] = []
+        self._retry_attempts = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.recorded = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed_flushes = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops the background task and writes out whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._drain()
+        lost = len(self._retry) + self._queue.qsize()
+        if lost:
+            logger.error(f"Shutting down with {lost} downloads that could not be flushed")
+
+    def record(self, mod_version_id: int, ip: str):
+        now = time.monotonic()
+        key = (mod_version_id, ip)
+        expires = self._seen.get(key)
+        if expires is not None and expires > now:
+            self.deduplicated += 1
+            return
+        try:
+            self._queue.put_nowait((mod_version_id, ip, datetime.now(timezone.utc)))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return
+        self._seen[key] = now + self.dedup_window
+        self.recorded += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> Optional[int]:
+        """
+        Writes one batch and returns the number of rows inserted, or None
+        when the write failed and the batch was kept for a retry or dropped.
+        """
+        if self._retry:
+            batch, self._retry = self._retry, []
+        else:
+            batch = []
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._retry_attempts = 0
+        if not batch:
+            return 0
+        try:
+            async with self._pool.acquire() as conn:
+                inserted = await mod_downloads.insert_batch(conn, batch)
+        except Exception as e:
+            self.failed_flushes += 1
+            self._retry_attempts += 1
+            if self._retry_attempts < MAX_FLUSH_ATTEMPTS:
+                self._retry = batch
+                logger.error(f"Failed to flush {len(batch)} downloads, retrying later: {e!r}")
+            else:
+                self.dropped += len(batch)
+                logger.error(f"Dropping {len(batch)} downloads after {self._retry_attempts} failed flushes: {e!r}")
+            return None
+        self.flushed += len(batch)
+        return inserted
+
+    async def _drain(self):
+        # A failure ends the drain, the held batch waits for the next interval
+        while self._retry or not self._queue.empty():
+            if await self.flush() is None:
+                return
+
+    def _prune_seen(self):
+        now = time.monotonic()
+        self._seen = {key: expires for key, expires in self._seen.items() if expires > now}
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._drain()
+            self._prune_seen()
+
+    def metrics(self) -> Dict:
+        return {
+            "queued": self._queue.qsize(),
+            "retrying": len(self._retry),
+            "recorded": self.recorded,
+            "deduplicated": self.deduplicated,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+_pipeline: Optional[DownloadPipeline] = None
+
+
+def init_download_pipeline(pool: DatabasePool) -> DownloadPipeline:
+    global _pipeline
+    _pipeline = DownloadPipeline(
+        pool,
+        flush_interval=env_float("DOWNLOAD_FLUSH_INTERVAL", 5),
+        batch_size=env_int("DOWNLOAD_BATCH_SIZE", 5000),
+        max_queue=env_int("DOWNLOAD_MAX_QUEUE", 100_000),
+        dedup_window=env_float("DOWNLOAD_DEDUP_WINDOW", 3600)
+    )
+    _pipeline.start()
+    logger.info(f"Download pipeline started, flushing every {_pipeline.flush_interval}s")
+    return _pipeline
+
+
+def get_download_pipeline() -> Optional[DownloadPipeline]:
+    return _pipeline
+
+
+async def shutdown_download_pipeline():
+    global _pipeline
+    if _pipeline is not None:
+        await _pipeline.stop()
+        _pipeline = None
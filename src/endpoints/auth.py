@@ -0,0 +1,87 @@
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from src.auth.device_flow import COMPLETE, PENDING, LoginAttempt, get_device_flow
+from src.env import env_float
+from src.types.api import ApiError, ApiResponse
+
+router = APIRouter()
+
+# Interval between SSE keep-alive comments
+SSE_KEEPALIVE_SECONDS = 15
+
+
+class LoginAttemptResponse(BaseModel):
+    uuid: str
+    interval: int
+    uri: str
+    code: str
+
+
+class PollRequest(BaseModel):
+    uuid: str
+
+
+class LoginStatus(BaseModel):
+    status: str
+    token: Optional[str] = None
+
+
+def _client_ip(request: Request) -> str:
+    if request.client is None:
+        raise ApiError("Could not determine client address", "BadRequest")
+    return request.client.host
+
+
+def _long_poll_seconds() -> float:
+    """How long a poll request is held open waiting for the login to finish."""
+    return env_float("LOGIN_LONG_POLL_SECONDS", 25)
+
+
+def _status(attempt: LoginAttempt) -> LoginStatus:
+    if attempt.status == COMPLETE:
+        return LoginStatus(status=COMPLETE, token=get_device_flow().claim(attempt))
+    return LoginStatus(status=attempt.status)
+
+
+@router.post("/v1/login/github")
+async def start_github_login(request: Request) -> ApiResponse[LoginAttemptResponse]:
+    attempt = await get_device_flow().begin(_client_ip(request))
+    return ApiResponse(error="", payload=LoginAttemptResponse(
+        uuid=attempt.uuid,
+        interval=attempt.interval,
+        uri=attempt.uri,
+        code=attempt.user_code
+    ))
+
+
+@router.post("/v1/login/github/poll")
+async def poll_github_login(request: Request, payload: PollRequest) -> ApiResponse[LoginStatus]:
+    scheduler = get_device_flow()
+    attempt = scheduler.get(payload.uuid, _client_ip(request))
+    await scheduler.wait(attempt, _long_poll_seconds())
+    return ApiResponse(error="", payload=_status(attempt))
+
+
+@router.get("/v1/login/github/{uuid}/events")
+async def github_login_events(request: Request, uuid: str):
+    scheduler = get_device_flow()
+    attempt = scheduler.get(uuid, _client_ip(request))
+
+    async def events():
+        yield f"event: status\ndata: {json.dumps({'status': attempt.status})}\n\n"
+        while attempt.status == PENDING:
+            try:
+                await asyncio.wait_for(attempt.done.wait(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+        yield f"event: status\ndata: {_status(attempt).model_dump_json()}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-store"})
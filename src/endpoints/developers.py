@@ -0,0 +1,26 @@
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request
+
+from src.cache.responses import ALL_MODS_TAG, cached_response
+from src.types.api import ApiResponse, PaginatedData
+from src.types.models.developer_mods import DeveloperModItem, get_developer_mods
+
+router = APIRouter()
+
+MAX_PER_PAGE = 100
+
+
+@router.get("/v1/developers/{id}/mods")
+async def developer_mods(
+    request: Request,
+    id: int,
+    per_page: int = Query(10, ge=1, le=MAX_PER_PAGE),
+    cursor: Optional[str] = None
+) -> ApiResponse[PaginatedData[DeveloperModItem]]:
+    async def build() -> ApiResponse[PaginatedData[DeveloperModItem]]:
+        async with request.app.state.data.db().acquire() as conn:
+            page = await get_developer_mods(id, per_page, cursor, conn)
+        return ApiResponse(error="", payload=page)
+
+    return await cached_response(request, [ALL_MODS_TAG], build)
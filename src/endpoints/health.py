@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Request
+
+from src.auth.token_cache import get_token_cache
+from src.cache.responses import get_response_cache
+from src.downloads.pipeline import get_download_pipeline
+from src.ingest.metrics import get_ingest_metrics
+from src.ingest.recent import get_recent_uploads
+from src.storage.artifacts import get_artifact_store
+from src.types.api import ApiResponse
+from src.webhook.dispatcher import get_webhook_dispatcher
+
+router = APIRouter()
+
+
+@router.get("/v1/health/db")
+async def db_health(request: Request) -> ApiResponse[dict]:
+    return ApiResponse(error="", payload=request.app.state.data.db().metrics())
+
+
+@router.get("/v1/health/downloads")
+async def downloads_health() -> ApiResponse[dict]:
+    pipeline = get_download_pipeline()
+    payload = pipeline.metrics() if pipeline else {}
+    store = get_artifact_store()
+    if store is not None:
+        payload["artifacts"] = store.metrics()
+    return ApiResponse(error="", payload=payload)
+
+
+@router.get("/v1/health/webhooks")
+async def webhooks_health() -> ApiResponse[dict]:
+    dispatcher = get_webhook_dispatcher()
+    return ApiResponse(error="", payload=dispatcher.metrics() if dispatcher else {})
+
+
+@router.get("/v1/health/auth")
+async def auth_health() -> ApiResponse[dict]:
+    cache = get_token_cache()
+    return ApiResponse(error="", payload=cache.metrics() if cache else {})
+
+
+@router.get("/v1/health/responses")
+async def responses_health() -> ApiResponse[dict]:
+    cache = get_response_cache()
+    return ApiResponse(error="", payload=cache.metrics() if cache else {})
+
+
+@router.get("/v1/health/ingest")
+async def ingest_health() -> ApiResponse[dict]:
+    return ApiResponse(error="", payload={
+        "stages": get_ingest_metrics().metrics(),
+        "recent_uploads": get_recent_uploads().metrics(),
+    })
@@ -0,0 +1,50 @@
+import re
+
+from fastapi import APIRouter, Request, Response
+
+from src.storage.logos import (
+    DEFAULT_FORMAT,
+    DEFAULT_SIZE,
+    LOGO_FORMATS,
+    LOGO_SIZES,
+    MEDIA_TYPES,
+    etag_for,
+    get_logo_store,
+)
+from src.types.api import ApiError
+
+router = APIRouter()
+
+# Mod logo URLs can change target when a new logo is uploaded, hashed ones can't
+MOD_LOGO_CACHE_CONTROL = "public, max-age=300"
+HASHED_LOGO_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+DIGEST_REGEX = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _logo_response(request: Request, digest: str, size: int, fmt: str, cache_control: str) -> Response:
+    if size not in LOGO_SIZES or fmt not in LOGO_FORMATS:
+        raise ApiError("Unsupported logo size or format", "BadRequest")
+    etag = etag_for(digest, size, fmt)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    data = get_logo_store().get(digest, size, fmt)
+    if data is None:
+        raise ApiError("Logo not found", "NotFound")
+    return Response(content=data, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+
+@router.get("/v1/mods/{id}/logo")
+async def get_mod_logo(request: Request, id: str, size: int = DEFAULT_SIZE, format: str = DEFAULT_FORMAT):
+    digest = get_logo_store().hash_for(id)
+    if digest is None:
+        raise ApiError("Logo not found", "NotFound")
+    return _logo_response(request, digest, size, format, MOD_LOGO_CACHE_CONTROL)
+
+
+@router.get("/v1/logos/{digest}/{size}.{format}")
+async def get_hashed_logo(request: Request, digest: str, size: int, format: str):
+    if not DIGEST_REGEX.match(digest):
+        raise ApiError("Logo not found", "NotFound")
+    return _logo_response(request, digest, size, format, HASHED_LOGO_CACHE_CONTROL)
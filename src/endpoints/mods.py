@@ -0,0 +1,77 @@
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request, Response
+from fastapi.responses import RedirectResponse
+
+from src.cache.responses import ALL_MODS_TAG, cached_response
+from src.database import queries, statements
+from src.downloads.pipeline import get_download_pipeline
+from src.index.mod_listing import DEFAULT_SORT, get_mod_listing_index
+from src.storage.artifacts import CACHE_CONTROL, MEDIA_TYPE, ArtifactResponse, get_artifact_store
+from src.types.api import ApiError, ApiResponse
+from src.types.models.mod_listing import ModSearchPage, search_mods
+
+router = APIRouter()
+
+MAX_PER_PAGE = 100
+
+
+@router.get("/v1/mods")
+async def list_mods(
+    request: Request,
+    query: Optional[str] = None,
+    tags: Optional[str] = None,
+    platform: Optional[str] = None,
+    gd: Optional[str] = None,
+    sort: str = DEFAULT_SORT,
+    per_page: int = Query(10, ge=1, le=MAX_PER_PAGE),
+    cursor: Optional[str] = None
+) -> ApiResponse[ModSearchPage]:
+    index = get_mod_listing_index()
+    if index is None:
+        raise ApiError("Mod index is not loaded yet")
+
+    async def build() -> ApiResponse[ModSearchPage]:
+        page = search_mods(
+            index,
+            query=query,
+            tags=[tag for tag in tags.split(",") if tag] if tags else None,
+            platform=platform,
+            gd=gd,
+            sort=sort,
+            per_page=per_page,
+            cursor=cursor
+        )
+        return ApiResponse(error="", payload=page)
+
+    return await cached_response(request, [ALL_MODS_TAG], build)
+
+
+@router.api_route("/v1/mods/{id}/versions/{version}/download", methods=["GET", "HEAD"])
+async def download_mod_version(request: Request, id: str, version: str) -> Response:
+    async with request.app.state.data.db().acquire() as conn:
+        row = await statements.fetchrow(conn, queries.MOD_VERSION_DOWNLOAD, id, version)
+    if row is None:
+        raise ApiError("Mod version not found", "NotFound")
+
+    store = get_artifact_store()
+    local = store is not None and store.has(row["hash"])
+    etag = f'"{row["hash"]}"'
+    if local and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+    pipeline = get_download_pipeline()
+    if request.method == "GET" and pipeline is not None and request.client is not None:
+        pipeline.record(row["id"], request.client.host)
+
+    if not local:
+        return RedirectResponse(row["download_link"], status_code=302)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    filename = f"{id}.geode"
+    accel_path = store.accel_path(row["hash"])
+    if accel_path is not None:
+        # The proxy serves the file (and any Range) straight from disk
+        headers["X-Accel-Redirect"] = accel_path
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return Response(media_type=MEDIA_TYPE, headers=headers)
+    return ArtifactResponse(store.path_for(row["hash"]), media_type=MEDIA_TYPE, filename=filename, headers=headers)
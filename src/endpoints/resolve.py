@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Request
+
+from src.types.api import ApiError, ApiJSONResponse, ApiResponse
+from src.types.models.install_set import ResolveRequest, ResolvedInstallSet, resolve_install_set
+
+router = APIRouter()
+
+# Upper bound on mods in one resolve request
+MAX_RESOLVE_MODS = 500
+
+
+@router.post("/v1/mods/resolve")
+async def resolve_mods(request: Request, payload: ResolveRequest) -> ApiResponse[ResolvedInstallSet]:
+    if not payload.mods:
+        raise ApiError("No mods given", "BadRequest")
+    if len(payload.mods) > MAX_RESOLVE_MODS:
+        raise ApiError(f"Too many mods (max {MAX_RESOLVE_MODS})", "BadRequest")
+    data = request.app.state.data
+    app_url = data.app_url or str(request.base_url).rstrip("/")
+    async with data.db().acquire() as conn:
+        install_set = await resolve_install_set(payload, app_url, conn)
+    # Install sets can be large; serialize the model directly
+    return ApiJSONResponse(ApiResponse(error="", payload=install_set))
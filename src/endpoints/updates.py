@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Request
+
+from src.types.api import ApiError, ApiJSONResponse, ApiResponse
+from src.types.models.update_check import UpdateCheck, UpdateCheckRequest, check_updates
+
+router = APIRouter()
+
+# Upper bound on installed mods in one update check
+MAX_UPDATE_CHECK_MODS = 1000
+
+
+@router.post("/v1/mods/updates")
+async def check_mod_updates(request: Request, payload: UpdateCheckRequest) -> ApiResponse[UpdateCheck]:
+    if not payload.mods:
+        raise ApiError("No mods given", "BadRequest")
+    if len(payload.mods) > MAX_UPDATE_CHECK_MODS:
+        raise ApiError(f"Too many mods (max {MAX_UPDATE_CHECK_MODS})", "BadRequest")
+    data = request.app.state.data
+    app_url = data.app_url or str(request.base_url).rstrip("/")
+    async with data.db().acquire() as conn:
+        update_check = await check_updates(payload, app_url, conn)
+    return ApiJSONResponse(ApiResponse(error="", payload=update_check))
@@ -0,0 +1,22 @@
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    """
+    Integer setting from the environment. Empty values count as unset,
+    since example.env ships every variable with an empty value.
+    """
+    value = os.getenv(name, "").strip()
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    """Like env_int, for settings that may be fractional."""
+    value = os.getenv(name, "").strip()
+    return float(value) if value else default
+
+
+def env_str(name: str, default: str) -> str:
+    """Like env_int, for string settings such as URLs and paths."""
+    value = os.getenv(name, "").strip()
+    return value or default
@@ -0,0 +1,25 @@
+import asyncpg
+
+from src.cache.responses import invalidate_mod
+from src.index.dependency_graph import invalidate_dependency_graph
+from src.index.mod_listing import invalidate_mod_listing
+from src.storage.logos import accept_mod_logo
+from src.webhook.dispatcher import get_webhook_dispatcher
+
+
+async def mod_status_changed(mod_id: str, conn: asyncpg.Connection, event=None, logo_hash=None):
+    """
+    Everything that has to follow a mod version being accepted, rejected or
+    unlisted. Call it in the transaction that changes the status; `event`
+    (NewModAcceptedEvent / NewModVersionAcceptedEvent) is announced, if given.
+    `logo_hash` is the logo of an accepted version (ModJson.logo_hash), which
+    becomes the mod's logo on commit.
+    """
+    await invalidate_mod(conn, mod_id)
+    await invalidate_mod_listing(conn, mod_id)
+    await invalidate_dependency_graph(conn, mod_id)
+    if logo_hash is not None:
+        await accept_mod_logo(conn, mod_id, logo_hash)
+    dispatcher = get_webhook_dispatcher()
+    if event is not None and dispatcher is not None:
+        await dispatcher.dispatch(event)
@@ -0,0 +1,379 @@
+import asyncio
+import bisect
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import asyncpg
+
+from src.database import queries, statements
+from src.database.notifications import NotificationListener, notify
+from src.database.pool import DatabasePool
+from src.types.models.dependency import (
+    DependencyImportance,
+    FetchedDependency,
+    ModVersionCompare,
+)
+from src.types.version_constraint import (
+    VersionConstraint,
+    VersionKey,
+    normalize_compare,
+    satisfying_range,
+    try_version_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def geode_major(geode: str) -> str:
+    return geode.lstrip("v").split(".", 1)[0]
+
+
+class VersionNode:
+    __slots__ = ("id", "version", "key", "geode_major", "targets")
+
+    def __init__(self, id: int, version: str, key: VersionKey, geode: str):
+        self.id = id
+        self.version = version
+        self.key = key
+        self.geode_major = geode_major(geode)
+        # (gd, platform) pairs from mod_gd_versions
+        self.targets: Set[Tuple[str, str]] = set()
+
+    def matches(self, platform: Optional[str], gd: Optional[str], geode: Optional[str]) -> bool:
+        if geode is not None and geode_major(geode) != self.geode_major:
+            return False
+        if platform is None and gd is None:
+            return bool(self.targets)
+        for target_gd, target_platform in self.targets:
+            if (gd is None or target_gd == gd or target_gd == "*") and (
+                platform is None or target_platform == platform
+            ):
+                return True
+        return False
+
+
+class Edge:
+    __slots__ = ("mod", "constraint", "compare", "importance")
+
+    def __init__(self, mod: int, version: str, compare: ModVersionCompare, importance: DependencyImportance):
+        self.mod = mod
+        self.constraint = VersionConstraint.of(version, compare)
+        self.compare = compare
+        self.importance = importance
+
+
+class DependencyGraph:
+    """
+    In-memory copy of the dependency graph. Mod ids are interned to ints,
+    accepted versions of every mod are kept sorted by semver (newest last)
+    and each mod version has an adjacency array of dependency edges.
+    """
+    def __init__(self):
+        self._mod_index: Dict[str, int] = {}
+        self._mod_ids: List[str] = []
+        # Accepted versions per interned mod, oldest first, with their keys
+        # kept in a parallel list for bisecting
+        self._versions: List[List[VersionNode]] = []
+        self._keys: List[List[VersionKey]] = []
+        self._version_mod: Dict[int, int] = {}
+        self._edges: Dict[int, List[Edge]] = {}
+
+    def intern(self, mod_id: str) -> int:
+        index = self._mod_index.get(mod_id)
+        if index is None:
+            index = len(self._mod_ids)
+            self._mod_index[mod_id] = index
+            self._mod_ids.append(mod_id)
+            self._versions.append([])
+            self._keys.append([])
+        return index
+
+    def add_version(self, id: int, mod_id: str, version: str, geode: str, targets: Iterable[Tuple[str, str]]):
+        key = try_version_key(version)
+        if key is None:
+            logger.warning(f"Skipping mod version {id} with invalid version {version}")
+            return
+        self.remove_version(id)
+        mod = self.intern(mod_id)
+        node = VersionNode(id, version, key, geode)
+        node.targets.update(targets)
+        position = bisect.bisect_right(self._keys[mod], key)
+        self._versions[mod].insert(position, node)
+        self._keys[mod].insert(position, key)
+        self._version_mod[id] = mod
+
+    def remove_version(self, id: int):
+        mod = self._version_mod.pop(id, None)
+        if mod is not None:
+            versions = self._versions[mod]
+            for i, node in enumerate(versions):
+                if node.id == id:
+                    del versions[i]
+                    del self._keys[mod][i]
+                    break
+
+    def set_edges(self, id: int, edges: Iterable[Tuple[str, str, ModVersionCompare, DependencyImportance]]):
+        adjacency = []
+        for dependency_id, version, compare, importance in edges:
+            try:
+                adjacency.append(Edge(self.intern(dependency_id), version, compare, importance))
+            except ValueError:
+                logger.warning(f"Skipping dependency {dependency_id} of mod version {id} with invalid version {version}")
+        self._edges[id] = adjacency
+
+    def clear_edges(self, id: int):
+        self._edges.pop(id, None)
+
+    def mod_id(self, mod: int) -> str:
+        return self._mod_ids[mod]
+
+    def known_mod_ids(self) -> List[str]:
+        """Every mod that has versions loaded or is named by an edge."""
+        return list(self._mod_ids)
+
+    def latest(
+        self, mod_id: str, platform: Optional[str], gd: Optional[str], geode: Optional[str]
+    ) -> Optional[VersionNode]:
+        mod = self._mod_index.get(mod_id)
+        if mod is None:
+            return None
+        for node in reversed(self._versions[mod]):
+            if node.matches(platform, gd, geode):
+                return node
+        return None
+
+    def install_set(
+        self, roots: List[VersionNode], platform: Optional[str], gd: Optional[str], geode: Optional[str]
+    ) -> Tuple[Dict[int, VersionNode], Dict[int, Set[int]], Set[int]]:
+        """
+        Picks one version per mod for the roots and all of their required
+        dependencies. Every mod gets the newest version satisfying all
+        constraints seen on it. Returns the chosen nodes and the mods that
+        required them, both keyed by interned mod, and the set of mods
+        that no version satisfies.
+        """
+        chosen: Dict[int, VersionNode] = {}
+        required_by: Dict[int, Set[int]] = {}
+        constraints: Dict[int, List[VersionConstraint]] = {}
+        unsatisfied: Set[int] = set()
+        stack = []
+        for node in roots:
+            mod = self._version_mod[node.id]
+            chosen[mod] = node
+            required_by.setdefault(mod, set())
+            stack.append(node)
+        while stack:
+            node = stack.pop()
+            for edge in self._edges.get(node.id, ()):
+                if edge.importance != DependencyImportance.required:
+                    continue
+                required_by.setdefault(edge.mod, set()).add(self._version_mod[node.id])
+                constraints.setdefault(edge.mod, []).append(edge.constraint)
+                current = chosen.get(edge.mod)
+                if current is not None and edge.constraint.matches(current.key):
+                    continue
+                picked = self._newest_in(edge.mod, constraints[edge.mod], platform, gd, geode)
+                if picked is None:
+                    unsatisfied.add(edge.mod)
+                    continue
+                chosen[edge.mod] = picked
+                stack.append(picked)
+        for mod in unsatisfied:
+            chosen.pop(mod, None)
+        return chosen, required_by, unsatisfied
+
+    def _newest_in(
+        self,
+        mod: int,
+        constraints: List[VersionConstraint],
+        platform: Optional[str],
+        gd: Optional[str],
+        geode: Optional[str]
+    ) -> Optional[VersionNode]:
+        versions = self._versions[mod]
+        lo, hi = satisfying_range(self._keys[mod], constraints)
+        for i in range(hi - 1, lo - 1, -1):
+            if versions[i].matches(platform, gd, geode):
+                return versions[i]
+        return None
+
+    def resolve(
+        self, ids: List[int], platform: Optional[str], gd: Optional[str], geode: Optional[str]
+    ) -> Dict[int, List[FetchedDependency]]:
+        """
+        Transitive dependencies of every start mod version, picking the newest
+        compatible accepted version of each dependency. Version choices are
+        shared between start nodes, so overlapping trees are only walked once.
+        """
+        chosen: Dict[tuple, Optional[VersionNode]] = {}
+        result: Dict[int, List[FetchedDependency]] = {}
+        for start in ids:
+            visited = {start}
+            stack = [start]
+            seen_rows = set()
+            while stack:
+                vid = stack.pop()
+                for edge in self._edges.get(vid, ()):
+                    key = (edge.mod, edge.constraint)
+                    if key not in chosen:
+                        chosen[key] = self._newest_in(edge.mod, [edge.constraint], platform, gd, geode)
+                    node = chosen[key]
+                    if node is None:
+                        continue
+                    row = (node.id, edge.constraint, edge.importance)
+                    if row not in seen_rows:
+                        seen_rows.add(row)
+                        result.setdefault(start, []).append(FetchedDependency(
+                            mod_version_id=node.id,
+                            version=node.version,
+                            dependency_id=self._mod_ids[edge.mod],
+                            compare=edge.compare,
+                            importance=edge.importance
+                        ))
+                    if node.id not in visited:
+                        visited.add(node.id)
+                        stack.append(node.id)
+        return result
+
+    @staticmethod
+    def _group_versions(rows) -> Tuple[Dict[int, tuple], Dict[int, list]]:
+        info: Dict[int, tuple] = {}
+        targets: Dict[int, list] = {}
+        for row in rows:
+            info[row["id"]] = (row["mod_id"], row["version"], row["geode"])
+            targets.setdefault(row["id"], []).append((row["gd"], row["platform"]))
+        return info, targets
+
+    @staticmethod
+    def _group_edges(rows) -> Dict[int, list]:
+        edges: Dict[int, list] = {}
+        for row in rows:
+            edges.setdefault(row["dependent_id"], []).append((
+                row["dependency_id"],
+                row["version"],
+                ModVersionCompare(normalize_compare(row["compare"])),
+                DependencyImportance(row["importance"])
+            ))
+        return edges
+
+    async def load(self, pool: asyncpg.Connection):
+        info, targets = self._group_versions(await statements.fetch(pool, queries.ACCEPTED_VERSION_TARGETS, None))
+        for id, (mod_id, version, geode) in info.items():
+            self.add_version(id, mod_id, version, geode, targets[id])
+
+        rows = await statements.fetch(pool, queries.ALL_DEPENDENCIES)
+        for id, dependency_edges in self._group_edges(rows).items():
+            self.set_edges(id, dependency_edges)
+        logger.info(f"Loaded dependency graph: {len(info)} versions, {len(rows)} dependencies")
+
+    async def refresh(self, conn: asyncpg.Connection, mod_ids: List[str]):
+        """
+        Re-reads the accepted versions of the given mods (and their edges),
+        dropping versions that are no longer accepted.
+        """
+        info, targets = self._group_versions(await statements.fetch(conn, queries.ACCEPTED_VERSION_TARGETS, mod_ids))
+        edges = self._group_edges(await statements.fetch(conn, queries.DEPENDENCIES_FOR_VERSIONS, list(info)))
+        # Both reads are done, apply everything without yielding to readers
+        for mod_id in mod_ids:
+            mod = self._mod_index.get(mod_id)
+            if mod is None:
+                continue
+            for node in list(self._versions[mod]):
+                if node.id not in info:
+                    self.remove_version(node.id)
+                    self.clear_edges(node.id)
+        for id, (mod_id, version, geode) in info.items():
+            self.add_version(id, mod_id, version, geode, targets[id])
+            self.set_edges(id, edges.get(id, ()))
+
+
+# NOTIFY channel carrying ids of mods whose accepted versions changed
+INVALIDATION_CHANNEL = "dependency_graph_invalidation"
+
+_graph: Optional[DependencyGraph] = None
+_tasks: Set[asyncio.Task] = set()
+_refresh_task: Optional[asyncio.Task] = None
+# Held by full loads and per-mod refreshes, so a refresh never lands on a
+# graph that is about to be replaced by a load that started before it
+_lock = asyncio.Lock()
+
+
+async def load_dependency_graph(pool: asyncpg.Connection) -> DependencyGraph:
+    global _graph
+    async with _lock:
+        graph = DependencyGraph()
+        await graph.load(pool)
+        _graph = graph
+    return graph
+
+
+def get_dependency_graph() -> Optional[DependencyGraph]:
+    """Returns the loaded graph, or None when callers should fall back to SQL."""
+    return _graph
+
+
+async def invalidate_dependency_graph(conn: asyncpg.Connection, mod_id: str):
+    """
+    Refreshes the mod on every replica, this one included, once the
+    surrounding transaction commits; a rolled back change is never applied.
+    """
+    await notify(conn, INVALIDATION_CHANNEL, mod_id)
+
+
+def watch_dependency_graph(listener: NotificationListener, pool: DatabasePool):
+    """Keeps the loaded graph in sync with invalidations from any replica."""
+    async def refresh(mod_id: str):
+        try:
+            async with _lock:
+                graph = _graph
+                if graph is None:
+                    return
+                async with pool.acquire() as conn:
+                    await graph.refresh(conn, [mod_id])
+        except Exception as e:
+            logger.error(f"Failed to refresh {mod_id} in the dependency graph: {e!r}")
+
+    async def reload():
+        # Before the initial load there is nothing to catch up on
+        if _graph is None:
+            return
+        try:
+            async with pool.acquire() as conn:
+                await load_dependency_graph(conn)
+        except Exception as e:
+            logger.error(f"Failed to reload the dependency graph: {e!r}")
+
+    def spawn(coro):
+        task = asyncio.create_task(coro)
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+    listener.subscribe(INVALIDATION_CHANNEL, lambda mod_id: spawn(refresh(mod_id)), lambda: spawn(reload()))
+
+
+async def _rebuild_periodically(pool: DatabasePool, interval: float):
+    # Catches status changes made outside mod_status_changed, which never notify
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with pool.acquire() as conn:
+                await load_dependency_graph(conn)
+        except Exception as e:
+            logger.error(f"Failed to rebuild the dependency graph: {e!r}")
+
+
+def start_dependency_graph_refresh(pool: DatabasePool, interval: float):
+    global _refresh_task
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_rebuild_periodically(pool, interval))
+
+
+async def stop_dependency_graph_refresh():
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
@@ -0,0 +1,410 @@
+import asyncio
+import heapq
+import logging
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import asyncpg
+
+from src.cache.responses import ALL_MODS_TAG, get_response_cache, mod_tag
+from src.database import queries, statements
+from src.database.notifications import NotificationListener, notify
+from src.database.pool import DatabasePool
+from src.types.api import ApiError, decode_cursor, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Facet/match results kept per filter combination, dropped on any change
+FILTER_CACHE_SIZE = 256
+
+SortKey = Tuple
+
+
+class ListedMod:
+    """Latest accepted version of a mod, as listings see it."""
+    __slots__ = (
+        "slot", "id", "name", "description", "version", "download_count",
+        "created_at", "updated_at", "tag_ids", "targets", "haystack"
+    )
+
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        description: Optional[str],
+        version: str,
+        download_count: int,
+        created_at: datetime,
+        updated_at: datetime,
+        tag_ids: Sequence[int],
+        targets: Iterable[Tuple[str, str]]
+    ):
+        self.slot = -1
+        self.id = id
+        self.name = name
+        self.description = description
+        self.version = version
+        self.download_count = download_count
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.tag_ids = tuple(sorted(tag_ids))
+        self.targets = frozenset(targets)
+        self.haystack = f"{id}\n{name}\n{description or ''}".lower()
+
+
+SORTS: Dict[str, Callable[[ListedMod], SortKey]] = {
+    "downloads": lambda mod: (-mod.download_count, mod.id),
+    "recently_updated": lambda mod: (-mod.updated_at.timestamp(), mod.id),
+    "recently_published": lambda mod: (-mod.created_at.timestamp(), mod.id),
+    "name": lambda mod: (mod.name.lower(), mod.id),
+}
+DEFAULT_SORT = "downloads"
+# Value types of every sort key, which cursors are checked against
+NUMBER = (int, float)
+CURSOR_TYPES: Dict[str, Tuple] = {
+    "downloads": (NUMBER, str),
+    "recently_updated": (NUMBER, str),
+    "recently_published": (NUMBER, str),
+    "name": (str, str),
+}
+
+
+def _bits(slots: Iterable[int]) -> int:
+    bits = 0
+    for slot in slots:
+        bits |= 1 << slot
+    return bits
+
+
+class Facets:
+    __slots__ = ("tags", "platforms", "gd")
+
+    def __init__(self, tags: Dict[str, int], platforms: Dict[str, int], gd: Dict[str, int]):
+        self.tags = tags
+        self.platforms = platforms
+        self.gd = gd
+
+
+class SearchResult:
+    __slots__ = ("mods", "count", "next_cursor", "facets")
+
+    def __init__(self, mods: List[ListedMod], count: int, next_cursor: Optional[str], facets: Facets):
+        self.mods = mods
+        self.count = count
+        self.next_cursor = next_cursor
+        self.facets = facets
+
+
+class ModListingIndex:
+    """
+    In-memory index behind mod listing and search.
+
+    Every mod gets a slot, and each tag, platform and GD version keeps a
+    bitset (a Python int) of the slots it covers, so filtering is a few
+    big-int ANDs and a facet count is one bit_count(). Each sort order is a
+    sorted list of keys: when most mods match, a page is a bisect to the
+    cursor plus a short walk; otherwise only the matching mods are sorted.
+    Matches and facets are cached per filter combination until the index
+    changes.
+    """
+    def __init__(self):
+        self._mods: Dict[str, ListedMod] = {}
+        self._by_slot: List[Optional[ListedMod]] = []
+        self._free_slots: List[int] = []
+        self._all = 0
+        self._by_tag: Dict[int, int] = {}
+        self._by_platform: Dict[str, int] = {}
+        self._by_gd: Dict[str, int] = {}
+        self._orders: Dict[str, List[Tuple[SortKey, str]]] = {sort: [] for sort in SORTS}
+        self._tag_names: Dict[int, str] = {}
+        self._tag_ids: Dict[str, int] = {}
+        self._cache: "OrderedDict[tuple, Tuple[int, Facets]]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._mods)
+
+    def set_tags(self, tags: Dict[int, str]):
+        self._tag_names = dict(tags)
+        self._tag_ids = {name: id for id, name in tags.items()}
+        self._cache.clear()
+
+    def upsert(self, mod: ListedMod):
+        self.remove(mod.id)
+        mod.slot = self._free_slots.pop() if self._free_slots else len(self._by_slot)
+        if mod.slot == len(self._by_slot):
+            self._by_slot.append(mod)
+        else:
+            self._by_slot[mod.slot] = mod
+        self._mods[mod.id] = mod
+
+        bit = 1 << mod.slot
+        self._all |= bit
+        for tag_id in mod.tag_ids:
+            self._by_tag[tag_id] = self._by_tag.get(tag_id, 0) | bit
+        for gd, platform in mod.targets:
+            self._by_platform[platform] = self._by_platform.get(platform, 0) | bit
+            self._by_gd[gd] = self._by_gd.get(gd, 0) | bit
+        for sort, key in SORTS.items():
+            insort(self._orders[sort], (key(mod), mod.id))
+        self._cache.clear()
+
+    def remove(self, mod_id: str):
+        mod = self._mods.pop(mod_id, None)
+        if mod is None:
+            return
+        mask = ~(1 << mod.slot)
+        self._all &= mask
+        for postings in (self._by_tag, self._by_platform, self._by_gd):
+            for key in list(postings):
+                postings[key] &= mask
+                if not postings[key]:
+                    del postings[key]
+        for sort, key in SORTS.items():
+            order = self._orders[sort]
+            entry = (key(mod), mod.id)
+            i = bisect_left(order, entry)
+            if i < len(order) and order[i] == entry:
+                del order[i]
+        self._by_slot[mod.slot] = None
+        self._free_slots.append(mod.slot)
+        self._cache.clear()
+
+    def get(self, mod_id: str) -> Optional[ListedMod]:
+        return self._mods.get(mod_id)
+
+    def tag_names(self, mod: ListedMod) -> List[str]:
+        return [self._tag_names[id] for id in mod.tag_ids if id in self._tag_names]
+
+    def _matches(self, query: Optional[str], tags: Tuple[str, ...], platform: Optional[str], gd: Optional[str]) -> Tuple[int, Facets]:
+        cache_key = (query, tags, platform, gd)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            return cached
+
+        bits = self._all
+        for tag in tags:
+            tag_id = self._tag_ids.get(tag)
+            if tag_id is None:
+                raise ApiError(f"Unknown tag {tag}", "BadRequest")
+            bits &= self._by_tag.get(tag_id, 0)
+        if platform is not None:
+            bits &= self._by_platform.get(platform, 0)
+        if gd is not None:
+            bits &= self._by_gd.get(gd, 0) | self._by_gd.get("*", 0)
+        if platform is not None and gd is not None:
+            # The masks only say the mod has both; check it has them together
+            bits &= _bits(
+                slot for slot in self._slots(bits)
+                if any(p == platform and g in (gd, "*") for g, p in self._by_slot[slot].targets)
+            )
+        if query:
+            needle = query.lower()
+            bits &= _bits(slot for slot in self._slots(bits) if needle in self._by_slot[slot].haystack)
+
+        facets = Facets(
+            tags={
+                self._tag_names[tag_id]: count
+                for tag_id, postings in self._by_tag.items()
+                if tag_id in self._tag_names and (count := (bits & postings).bit_count())
+            },
+            platforms={p: count for p, postings in self._by_platform.items() if (count := (bits & postings).bit_count())},
+            gd={g: count for g, postings in self._by_gd.items() if (count := (bits & postings).bit_count())}
+        )
+        self._cache[cache_key] = (bits, facets)
+        while len(self._cache) > FILTER_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return bits, facets
+
+    @staticmethod
+    def _slots(bits: int) -> Iterable[int]:
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        tags: Sequence[str] = (),
+        platform: Optional[str] = None,
+        gd: Optional[str] = None,
+        sort: str = DEFAULT_SORT,
+        limit: int = 10,
+        cursor: Optional[str] = None
+    ) -> SearchResult:
+        if sort not in SORTS:
+            raise ApiError(f"Unknown sort {sort}", "BadRequest")
+        bits, facets = self._matches(query or None, tuple(sorted(set(tags))), platform, gd)
+
+        after = None if cursor is None else decode_cursor(sort, cursor, CURSOR_TYPES[sort])
+        count = bits.bit_count()
+        order = self._orders[sort]
+        # A walk over the sort order visits about (limit + 1) * len / count
+        # entries to fill a page, sorting the matches costs about count
+        if count * count > (limit + 1) * len(order):
+            page = self._walk_order(order, bits, after, limit + 1)
+        else:
+            page = self._sort_matches(sort, bits, after, limit + 1)
+
+        next_cursor = None
+        if len(page) > limit:
+            page.pop()
+            next_cursor = encode_cursor(sort, SORTS[sort](page[-1]))
+        return SearchResult(page, count, next_cursor, facets)
+
+    def _walk_order(self, order: List[Tuple[SortKey, str]], bits: int, after: Optional[SortKey], n: int) -> List[ListedMod]:
+        # Entries are (key, id) and the id is already part of the key
+        i = 0 if after is None else bisect_right(order, (after, "\uffff"))
+        page: List[ListedMod] = []
+        while i < len(order) and len(page) < n:
+            mod = self._mods[order[i][1]]
+            if bits >> mod.slot & 1:
+                page.append(mod)
+            i += 1
+        return page
+
+    def _sort_matches(self, sort: str, bits: int, after: Optional[SortKey], n: int) -> List[ListedMod]:
+        key = SORTS[sort]
+        entries = ((key(mod), mod) for mod in (self._by_slot[slot] for slot in self._slots(bits)))
+        if after is not None:
+            entries = (entry for entry in entries if entry[0] > after)
+        return [mod for _, mod in heapq.nsmallest(n, entries, key=lambda entry: entry[0])]
+
+    @staticmethod
+    def _from_row(row) -> ListedMod:
+        return ListedMod(
+            id=row["id"],
+            name=row["name"],
+            description=row["description"],
+            version=row["version"],
+            download_count=row["download_count"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+            tag_ids=row["tag_ids"],
+            targets=zip(row["gds"], row["platforms"])
+        )
+
+    async def load(self, conn: asyncpg.Connection):
+        tags = await statements.fetch(conn, queries.ALL_MOD_TAGS)
+        self.set_tags({row["id"]: row["name"] for row in tags})
+        for row in await statements.fetch(conn, queries.MOD_LISTING, None):
+            self.upsert(self._from_row(row))
+        logger.info(f"Loaded mod listing index: {len(self)} mods")
+
+    async def refresh(self, conn: asyncpg.Connection, mod_ids: List[str]):
+        """Re-reads the given mods, e.g. after a version was accepted or a mod was delisted."""
+        rows = await statements.fetch(conn, queries.MOD_LISTING, mod_ids)
+        found = set()
+        for row in rows:
+            self.upsert(self._from_row(row))
+            found.add(row["id"])
+        for mod_id in mod_ids:
+            if mod_id not in found:
+                self.remove(mod_id)
+
+
+# NOTIFY channel carrying ids of mods whose listing changed
+INVALIDATION_CHANNEL = "mod_listing_invalidation"
+
+_index: Optional[ModListingIndex] = None
+_tasks: Set[asyncio.Task] = set()
+_refresh_task: Optional[asyncio.Task] = None
+# Held by full loads and per-mod refreshes, so a refresh never lands on an
+# index that is about to be replaced by a load that started before it
+_lock = asyncio.Lock()
+
+
+async def load_mod_listing_index(conn: asyncpg.Connection) -> ModListingIndex:
+    global _index
+    async with _lock:
+        index = ModListingIndex()
+        await index.load(conn)
+        _index = index
+    return index
+
+
+def get_mod_listing_index() -> Optional[ModListingIndex]:
+    return _index
+
+
+async def invalidate_mod_listing(conn: asyncpg.Connection, mod_id: str):
+    """
+    Re-reads the mod on every replica, this one included, once the
+    surrounding transaction commits, so uncommitted state is never indexed.
+    """
+    await notify(conn, INVALIDATION_CHANNEL, mod_id)
+
+
+def watch_mod_listing(listener: NotificationListener, pool: DatabasePool):
+    """Keeps the loaded index in sync with invalidations from any replica."""
+    def invalidate_responses(tags: List[str]):
+        # Responses may have been cached between the commit and the refresh
+        cache = get_response_cache()
+        if cache is not None:
+            cache.invalidate(tags)
+
+    async def refresh(mod_id: str):
+        try:
+            async with _lock:
+                index = _index
+                if index is None:
+                    return
+                async with pool.acquire() as conn:
+                    await index.refresh(conn, [mod_id])
+            invalidate_responses([ALL_MODS_TAG, mod_tag(mod_id)])
+        except Exception as e:
+            logger.error(f"Failed to refresh {mod_id} in the mod listing index: {e!r}")
+
+    async def reload():
+        # Before the initial load there is nothing to catch up on
+        if _index is None:
+            return
+        try:
+            async with pool.acquire() as conn:
+                await load_mod_listing_index(conn)
+            invalidate_responses([ALL_MODS_TAG])
+        except Exception as e:
+            logger.error(f"Failed to reload the mod listing index: {e!r}")
+
+    def spawn(coro):
+        task = asyncio.create_task(coro)
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+    listener.subscribe(INVALIDATION_CHANNEL, lambda mod_id: spawn(refresh(mod_id)), lambda: spawn(reload()))
+
+
+async def _rebuild_periodically(pool: DatabasePool, interval: float):
+    # Download counts move constantly; rebuilding picks them up without
+    # touching the index on every flush
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with pool.acquire() as conn:
+                await load_mod_listing_index(conn)
+            # Every replica rebuilds on its own, so only local responses are stale
+            cache = get_response_cache()
+            if cache is not None:
+                cache.invalidate([ALL_MODS_TAG])
+        except Exception as e:
+            logger.error(f"Failed to rebuild mod listing index: {e!r}")
+
+
+def start_mod_listing_refresh(pool: DatabasePool, interval: float):
+    global _refresh_task
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_rebuild_periodically(pool, interval))
+
+
+async def stop_mod_listing_refresh():
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
@@ -0,0 +1,122 @@
+import struct
+import zipfile
+from typing import Optional, Tuple
+
+from src.types.api import ApiError
+
+# Every header we parse fits in this; binaries are never decompressed past it
+HEADER_READ_BYTES = 4096
+
+# Platform flags as named on ModJson
+WINDOWS = "windows"
+IOS = "ios"
+ANDROID32 = "android32"
+ANDROID64 = "android64"
+MAC_ARM = "mac_arm"
+MAC_INTEL = "mac_intel"
+
+MACHO_FAT_MAGIC = 0xCAFEBABE
+MACHO_FAT_MAGIC_64 = 0xCAFEBABF
+MACHO_MAGIC_64 = 0xFEEDFACF
+CPU_TYPE_X86_64 = 0x01000007
+CPU_TYPE_ARM64 = 0x0100000C
+# Java class files share the fat magic; real fat binaries have a handful of arches
+MAX_FAT_ARCHES = 32
+
+PE_MACHINES = (0x014C, 0x8664)  # i386, AMD64
+ELF_CLASS_32 = 1
+ELF_CLASS_64 = 2
+ELF_MACHINE_ARM = 40
+ELF_MACHINE_AARCH64 = 183
+
+
+def binary_kind(name: str) -> Optional[str]:
+    """Which check a member gets, from its name; None for anything else."""
+    if name.endswith(".dll"):
+        return "pe"
+    if name.endswith(".ios.dylib"):
+        return "ios"
+    if name.endswith(".android32.so"):
+        return "elf32"
+    if name.endswith(".android64.so"):
+        return "elf64"
+    if name.endswith(".dylib"):
+        return "macho"
+    return None
+
+
+def macho_cpu_types(header: bytes) -> Tuple[int, ...]:
+    """CPU types of a thin or fat (32 or 64-bit fat table) Mach-O binary."""
+    if len(header) < 8:
+        raise ApiError("Invalid MacOS binary", "BadRequest")
+    (magic,) = struct.unpack_from(">I", header)
+    if magic in (MACHO_FAT_MAGIC, MACHO_FAT_MAGIC_64):
+        (count,) = struct.unpack_from(">I", header, 4)
+        entry_size = 20 if magic == MACHO_FAT_MAGIC else 32
+        if not 0 < count <= MAX_FAT_ARCHES or 8 + count * entry_size > len(header):
+            raise ApiError("Invalid MacOS binary", "BadRequest")
+        return tuple(
+            struct.unpack_from(">I", header, 8 + i * entry_size)[0] for i in range(count)
+        )
+    # Thin binaries are little-endian
+    (magic, cpu_type) = struct.unpack_from("<II", header)
+    if magic == MACHO_MAGIC_64:
+        return (cpu_type,)
+    raise ApiError("Invalid MacOS binary", "BadRequest")
+
+
+def check_pe(header: bytes):
+    if len(header) < 0x40 or header[:2] != b"MZ":
+        raise ApiError("Invalid Windows binary", "BadRequest")
+    (pe_offset,) = struct.unpack_from("<I", header, 0x3C)
+    if pe_offset + 6 > len(header) or header[pe_offset:pe_offset + 4] != b"PE\0\0":
+        raise ApiError("Invalid Windows binary", "BadRequest")
+    (machine,) = struct.unpack_from("<H", header, pe_offset + 4)
+    if machine not in PE_MACHINES:
+        raise ApiError("Unsupported Windows binary architecture", "BadRequest")
+
+
+def check_elf(header: bytes, elf_class: int, machine: int, platform: str):
+    if len(header) < 20 or header[:4] != b"\x7fELF":
+        raise ApiError(f"Invalid {platform} binary", "BadRequest")
+    # e_machine is little-endian on every Android ABI
+    if header[4] != elf_class or header[5] != 1 or struct.unpack_from("<H", header, 18)[0] != machine:
+        raise ApiError(f"Wrong architecture for {platform} binary", "BadRequest")
+
+
+def classify_header(kind: str, header: bytes) -> Tuple[str, ...]:
+    if kind == "pe":
+        check_pe(header)
+        return (WINDOWS,)
+    if kind == "elf32":
+        check_elf(header, ELF_CLASS_32, ELF_MACHINE_ARM, ANDROID32)
+        return (ANDROID32,)
+    if kind == "elf64":
+        check_elf(header, ELF_CLASS_64, ELF_MACHINE_AARCH64, ANDROID64)
+        return (ANDROID64,)
+    cpu_types = macho_cpu_types(header)
+    if kind == "ios":
+        if CPU_TYPE_ARM64 not in cpu_types:
+            raise ApiError("iOS binary has no arm64 slice", "BadRequest")
+        return (IOS,)
+    platforms = tuple(
+        platform for platform, cpu_type in ((MAC_ARM, CPU_TYPE_ARM64), (MAC_INTEL, CPU_TYPE_X86_64))
+        if cpu_type in cpu_types
+    )
+    if not platforms:
+        raise ApiError("MacOS binary has no arm64 or x86_64 slice", "BadRequest")
+    return platforms
+
+
+def classify_binary(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> Tuple[str, ...]:
+    """
+    Platforms a binary member provides, judged from its first few KB only.
+    Results aren't cached: the CRC and size in the central directory are
+    whatever the uploader wrote, and the CRC is only verified on a full read.
+    """
+    kind = binary_kind(info.filename)
+    if kind is None:
+        return ()
+    with archive.open(info) as file:
+        header = file.read(HEADER_READ_BYTES)
+    return classify_header(kind, header)
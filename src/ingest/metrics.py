@@ -0,0 +1,59 @@
+from typing import Dict, Optional
+
+
+class StageStats:
+    __slots__ = ("count", "total", "max", "rejected")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rejected = 0
+
+
+class IngestMetrics:
+    """
+    Per-stage timings of upload validation and parsing. Stages run partly in
+    the ingest workers, which hand their timings back with the parsed mod;
+    rejections are counted against the stage that raised them, or "parse"
+    for anything raised inside a worker.
+    """
+    def __init__(self):
+        self._stages: Dict[str, StageStats] = {}
+
+    def _stage(self, stage: str) -> StageStats:
+        stats = self._stages.get(stage)
+        if stats is None:
+            stats = self._stages[stage] = StageStats()
+        return stats
+
+    def observe(self, timings: Dict[str, float]):
+        for stage, seconds in timings.items():
+            stats = self._stage(stage)
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+
+    def reject(self, stage: str):
+        self._stage(stage).rejected += 1
+
+    def metrics(self) -> Dict:
+        return {
+            stage: {
+                "count": stats.count,
+                "avg_ms": round(stats.total / stats.count * 1000, 3) if stats.count else 0.0,
+                "max_ms": round(stats.max * 1000, 3),
+                "rejected": stats.rejected,
+            }
+            for stage, stats in self._stages.items()
+        }
+
+
+_metrics: Optional[IngestMetrics] = None
+
+
+def get_ingest_metrics() -> IngestMetrics:
+    global _metrics
+    if _metrics is None:
+        _metrics = IngestMetrics()
+    return _metrics
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from src.env import env_float, env_int
+from src.types.api import ApiError
+
+logger = logging.getLogger(__name__)
+
+# Extra seconds the event loop waits beyond job_timeout, for the worker-side
+# alarm to fire and the result (or error) to come back
+TIMEOUT_MARGIN = 5.0
+
+
+class JobTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise JobTimeout()
+
+
+def _run_with_timeout(timeout: float, fn: Callable, *args):
+    # Runs inside the worker process; the alarm interrupts CPU-bound work
+    # (zip decompression, Pillow) so a single job can't hog a worker forever
+    if not hasattr(signal, "setitimer"):
+        return fn(*args)
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class IngestPool:
+    """
+    Process pool for CPU-bound mod ingestion (archive hashing, decompression,
+    logo processing). At most `workers + max_queue` jobs are accepted at once;
+    anything beyond that is rejected with a TooManyRequests error. Queued
+    jobs wait here rather than in the executor, so `job_timeout` only counts
+    time spent running.
+    """
+    def __init__(self, workers: int, max_queue: int, job_timeout: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.job_timeout = job_timeout
+        self.in_flight = 0
+        self._running = asyncio.Semaphore(workers)
+        self._executor = ProcessPoolExecutor(max_workers=workers)
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    async def submit(self, fn: Callable, *args):
+        if self.in_flight >= self.capacity:
+            raise ApiError("Too many uploads are being processed, try again later", "TooManyRequests")
+        self.in_flight += 1
+        try:
+            async with self._running:
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(self._executor, _run_with_timeout, self.job_timeout, fn, *args)
+                return await asyncio.wait_for(future, timeout=self.job_timeout + TIMEOUT_MARGIN)
+        except (JobTimeout, asyncio.TimeoutError):
+            raise ApiError("Processing the mod took too long", "BadRequest")
+        finally:
+            self.in_flight -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool: Optional[IngestPool] = None
+
+
+def init_pool() -> IngestPool:
+    global _pool
+    workers = env_int("INGEST_WORKERS", os.cpu_count() or 1)
+    max_queue = env_int("INGEST_MAX_QUEUE", workers * 2)
+    job_timeout = env_float("INGEST_JOB_TIMEOUT", 60)
+    _pool = IngestPool(workers, max_queue, job_timeout)
+    logger.info(f"Ingest pool started with {workers} workers, queue depth {max_queue}")
+    return _pool
+
+
+def get_pool() -> IngestPool:
+    if _pool is None:
+        return init_pool()
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
@@ -0,0 +1,53 @@
+import copy
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from src.env import env_float, env_int
+
+
+class RecentUploads:
+    """
+    Parsed archives by content hash, kept for `ttl` seconds so that
+    resubmitting the same bytes (CI reruns, retried uploads) skips zip and
+    image work entirely. Entries parsed without logo variants don't satisfy
+    a request that needs them.
+    """
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[object, bool, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: str, store_image: bool):
+        entry = self._entries.get(digest)
+        if entry is None or entry[2] < time.monotonic() or (store_image and not entry[1]):
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        # Callers adjust their copy (download URL, timings), never the cached one
+        return copy.copy(entry[0])
+
+    def put(self, digest: str, mod_json, store_image: bool):
+        self._entries.pop(digest, None)
+        self._entries[digest] = (copy.copy(mod_json), store_image, time.monotonic() + self.ttl)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def metrics(self) -> Dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_recent: Optional[RecentUploads] = None
+
+
+def get_recent_uploads() -> RecentUploads:
+    global _recent
+    if _recent is None:
+        _recent = RecentUploads(
+            ttl=env_float("INGEST_DEDUP_TTL", 600),
+            max_entries=env_int("INGEST_DEDUP_MAX_ENTRIES", 256)
+        )
+    return _recent
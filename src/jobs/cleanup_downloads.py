@@ -1,14 +1,21 @@
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import SQLAlchemyError
+import logging
 from typing import Union
 
-import src.database.repository.mod_downloads
+import asyncpg
+
+from src.database.repository import mod_downloads
 from src.types.api import ApiError
 
-async def cleanup_downloads(session: AsyncSession) -> Union[None, ApiError]:
+logger = logging.getLogger(__name__)
+
+async def cleanup_downloads(conn: asyncpg.Connection) -> Union[None, ApiError]:
     try:
-        await mod_downloads.cleanup(session)
+        result = await mod_downloads.cleanup(conn)
+        logger.info(
+            f"Removed {result.partitions_removed} download partitions (~{result.rows_removed} rows), "
+            f"created {result.partitions_created} upcoming in {result.elapsed_ms:.1f}ms"
+        )
         return None
-    except SQLAlchemyError as e:
-        print(f"Error cleaning up downloads: {e}")
-        return ApiError.db_error()
+    except asyncpg.PostgresError as e:
+        logger.error(f"Error cleaning up downloads: {e}")
+        return ApiError(error_type="DbError")
@@ -0,0 +1,25 @@
+import logging
+from typing import Union
+
+import asyncpg
+
+from src.auth.token_cache import notify_invalidation
+from src.database import queries, statements
+from src.types.api import ApiError
+
+logger = logging.getLogger(__name__)
+
+async def logout_user(username: str, conn: asyncpg.Connection) -> Union[None, ApiError]:
+    try:
+        async with conn.transaction():
+            developer_id = await statements.fetchval(conn, queries.LOGOUT_DEVELOPER, username)
+            if developer_id is None:
+                logger.error(f"No developer named {username}")
+                return ApiError(f"No developer named {username}", "NotFound")
+            # Delivered on commit, so replicas evict only once the tokens are gone
+            await notify_invalidation(conn, f"developer:{developer_id}")
+        logger.info(f"Logged out developer {username}")
+        return None
+    except asyncpg.PostgresError as e:
+        logger.error(f"Error logging out developer: {e}")
+        return ApiError(error_type="DbError")
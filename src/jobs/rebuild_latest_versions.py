@@ -0,0 +1,19 @@
+import logging
+from typing import Union
+
+import asyncpg
+
+from src.database import queries, statements
+from src.types.api import ApiError
+
+logger = logging.getLogger(__name__)
+
+async def rebuild_latest_versions(conn: asyncpg.Connection) -> Union[None, ApiError]:
+    try:
+        async with conn.transaction():
+            written = await statements.fetchval(conn, queries.REBUILD_LATEST_VERSIONS)
+        logger.info(f"Rebuilt mod_latest_versions with {written} rows")
+        return None
+    except asyncpg.PostgresError as e:
+        logger.error(f"Error rebuilding latest versions: {e}")
+        return ApiError(error_type="DbError")
@@ -0,0 +1,22 @@
+import logging
+from typing import Union
+
+import asyncpg
+
+from src.auth.token_cache import notify_invalidation
+from src.database import queries, statements
+from src.types.api import ApiError
+
+logger = logging.getLogger(__name__)
+
+async def token_cleanup(conn: asyncpg.Connection) -> Union[None, ApiError]:
+    try:
+        async with conn.transaction():
+            rows = await statements.fetch(conn, queries.CLEANUP_EXPIRED_TOKENS)
+            for row in rows:
+                await notify_invalidation(conn, f"developer:{row['developer_id']}")
+        logger.info(f"Cleaned up expired tokens of {len(rows)} developers")
+        return None
+    except asyncpg.PostgresError as e:
+        logger.error(f"Error cleaning up tokens: {e}")
+        return ApiError(error_type="DbError")
@@ -0,0 +1,116 @@
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+from src.env import env_str
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPE = "application/octet-stream"
+# Artifacts are addressed by their hash, so a URL never changes content
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+DIGEST_REGEX = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ArtifactStore:
+    """
+    Content-addressed storage for uploaded .geode files, laid out as
+    `{root}/{hash[:2]}/{hash}.geode`. The hash is the SHA-256 computed while
+    the upload was spooled, so identical uploads are stored once and a file
+    never changes after it has been written.
+    """
+    def __init__(self, root: Path, accel_prefix: Optional[str] = None):
+        self.root = root
+        # When set, downloads are handed to the reverse proxy (X-Accel-Redirect)
+        self.accel_prefix = accel_prefix.rstrip("/") if accel_prefix else None
+        self.stored = 0
+        self.deduplicated = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, digest: str) -> Path:
+        if not DIGEST_REGEX.match(digest):
+            raise ValueError(f"Invalid artifact digest {digest!r}")
+        return self.root / digest[:2] / f"{digest}.geode"
+
+    def has(self, digest: str) -> bool:
+        return bool(DIGEST_REGEX.match(digest)) and self.path_for(digest).is_file()
+
+    def put_file(self, digest: str, source: str) -> Path:
+        """Copies an already hashed file into the store, unless it's there already."""
+        return self._put(digest, lambda tmp: shutil.copyfile(source, tmp))
+
+    def put_bytes(self, digest: str, data: bytes) -> Path:
+        return self._put(digest, lambda tmp: tmp.write_bytes(data))
+
+    def _put(self, digest: str, write: Callable[[Path], object]) -> Path:
+        path = self.path_for(digest)
+        if path.is_file():
+            self.deduplicated += 1
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        self.stored += 1
+        return path
+
+    def accel_path(self, digest: str) -> Optional[str]:
+        if self.accel_prefix is None:
+            return None
+        return f"{self.accel_prefix}/{digest[:2]}/{digest}.geode"
+
+    def metrics(self) -> Dict:
+        return {"stored": self.stored, "deduplicated": self.deduplicated}
+
+
+class ArtifactResponse(FileResponse):
+    """
+    FileResponse that lets the server send the file itself when it supports
+    the ASGI pathsend extension, so whole-file downloads never pass through
+    Python. Range requests (resumed downloads) keep Starlette's handling.
+    """
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        headers = {k.lower(): v for k, v in scope.get("headers", ())}
+        if (
+            "http.response.pathsend" not in extensions
+            or scope.get("method") == "HEAD"
+            or b"range" in headers
+        ):
+            await super().__call__(scope, receive, send)
+            return
+        if self.stat_result is None:
+            self.set_stat_headers(os.stat(self.path))
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.pathsend", "path": str(self.path)})
+        if self.background is not None:
+            await self.background()
+
+
+_store: Optional[ArtifactStore] = None
+
+
+def init_artifact_store() -> Optional[ArtifactStore]:
+    """The store is optional; without ARTIFACT_STORE_DIR downloads redirect to the uploaded URL."""
+    global _store
+    root = env_str("ARTIFACT_STORE_DIR", "")
+    if not root:
+        _store = None
+        return None
+    _store = ArtifactStore(Path(root), env_str("ARTIFACT_ACCEL_PREFIX", "") or None)
+    logger.info(f"Serving mod artifacts from {root}")
+    return _store
+
+
+def get_artifact_store() -> Optional[ArtifactStore]:
+    return _store
@@ -0,0 +1,251 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+import asyncpg
+from PIL import Image
+
+from src.database.notifications import NotificationListener, notify
+from src.env import env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+# Every logo is rendered to these sizes and formats once, at upload time
+LOGO_SIZES = (336, 128, 64)
+LOGO_FORMATS = ("png", "webp")
+DEFAULT_SIZE = 336
+DEFAULT_FORMAT = "png"
+
+MEDIA_TYPES = {"png": "image/png", "webp": "image/webp"}
+# Pointers are re-read from disk after this many seconds, so logos written
+# by other replicas show up
+POINTER_TTL = 60
+# Pointers (and misses) kept in memory; ids come from request paths
+MAX_POINTERS = 50_000
+# Same rule as ModJson.validate; ids are used as file names
+MOD_ID_REGEX = re.compile(r"[a-z0-9_\-]+\.[a-z0-9_\-]+")
+MAX_MOD_ID_LENGTH = 64
+# NOTIFY channel carrying "{mod_id} {hash}" when a version's logo goes live
+POINTER_CHANNEL = "mod_logo_pointers"
+
+
+def valid_mod_id(mod_id: str) -> bool:
+    return len(mod_id) <= MAX_MOD_ID_LENGTH and MOD_ID_REGEX.fullmatch(mod_id) is not None
+
+
+def render_logo_variants(image: Image.Image) -> Dict[str, bytes]:
+    """
+    Renders every (size, format) variant of an already validated square logo.
+    Keys are variant file names, e.g. "128.webp".
+    """
+    variants = {}
+    for size in LOGO_SIZES:
+        resized = image if image.size == (size, size) else image.resize((size, size), Image.LANCZOS)
+        for fmt in LOGO_FORMATS:
+            with BytesIO() as output:
+                resized.save(output, format=fmt.upper())
+                variants[variant_name(size, fmt)] = output.getvalue()
+    return variants
+
+
+def variant_name(size: int, fmt: str) -> str:
+    return f"{size}.{fmt}"
+
+
+def logo_hash(variants: Dict[str, bytes]) -> str:
+    return hashlib.sha256(variants[variant_name(DEFAULT_SIZE, DEFAULT_FORMAT)]).hexdigest()
+
+
+class LogoStore:
+    """
+    Content-addressed logo storage. Variants live on disk under
+    `{root}/{hash}/{size}.{format}`, and `{root}/mods/{mod_id}` points at the
+    current hash of a mod. Uploads only add variants; a pointer moves once a
+    version carrying the logo is accepted. Up to MAX_POINTERS pointers are
+    kept in memory for POINTER_TTL and file contents go through a
+    byte-bounded LRU, so serving a logo never touches Postgres or Pillow.
+    """
+    def __init__(self, root: Path, cache_bytes: int):
+        self.root = root
+        self.cache_bytes = cache_bytes
+        self._cached_bytes = 0
+        self._cache: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        # Pointer (or None when there is no logo) and when it was read
+        self._by_mod: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        (self.root / "mods").mkdir(parents=True, exist_ok=True)
+        self._load_pointers()
+
+    def _load_pointers(self):
+        now = time.monotonic()
+        for pointer in (self.root / "mods").iterdir():
+            if len(self._by_mod) >= MAX_POINTERS:
+                break
+            if valid_mod_id(pointer.name):
+                self._by_mod[pointer.name] = (pointer.read_text().strip(), now)
+        logger.info(f"Loaded {len(self._by_mod)} logo pointers")
+
+    def _read_pointer(self, mod_id: str) -> Optional[str]:
+        try:
+            return (self.root / "mods" / mod_id).read_text().strip() or None
+        except OSError:
+            return None
+
+    def _remember(self, mod_id: str, digest: Optional[str], now: float):
+        with self._lock:
+            self._by_mod[mod_id] = (digest, now)
+            self._by_mod.move_to_end(mod_id)
+            while len(self._by_mod) > MAX_POINTERS:
+                self._by_mod.popitem(last=False)
+
+    def put(self, variants: Dict[str, bytes]) -> str:
+        """Stores the variants of a logo without pointing any mod at them."""
+        digest = logo_hash(variants)
+        directory = self.root / digest
+        if not directory.exists():
+            directory.mkdir(parents=True, exist_ok=True)
+            for name, data in variants.items():
+                _write_atomic(directory / name, data)
+        return digest
+
+    def point(self, mod_id: str, digest: str):
+        """Makes a stored logo the current logo of a mod."""
+        if not valid_mod_id(mod_id):
+            raise ValueError(f"Invalid mod id {mod_id!r}")
+        if not (self.root / digest / variant_name(DEFAULT_SIZE, DEFAULT_FORMAT)).is_file():
+            raise ValueError(f"Logo {digest!r} is not stored")
+        _write_atomic(self.root / "mods" / mod_id, digest.encode())
+        self._remember(mod_id, digest, time.monotonic())
+
+    def hash_for(self, mod_id: str) -> Optional[str]:
+        if not valid_mod_id(mod_id):
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._by_mod.get(mod_id)
+        if entry is not None and now - entry[1] < POINTER_TTL:
+            return entry[0]
+        digest = self._read_pointer(mod_id)
+        self._remember(mod_id, digest, now)
+        return digest
+
+    def get(self, digest: str, size: int, fmt: str) -> Optional[bytes]:
+        key = (digest, variant_name(size, fmt))
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+                return data
+        path = self.root / digest / key[1]
+        if not path.is_file():
+            return None
+        data = path.read_bytes()
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = data
+                self._cached_bytes += len(data)
+                while self._cached_bytes > self.cache_bytes and self._cache:
+                    _, evicted = self._cache.popitem(last=False)
+                    self._cached_bytes -= len(evicted)
+        return data
+
+
+def _write_atomic(path: Path, data: bytes):
+    # Unique per writer; other workers and replicas may write the same file
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def etag_for(digest: str, size: int, fmt: str) -> str:
+    return f'"{digest}-{size}-{fmt}"'
+
+
+async def backfill_logos(conn) -> int:
+    """
+    Renders variants for mods whose logo only exists in `mods.image`.
+    Returns the number of logos written.
+    """
+    store = get_logo_store()
+    rows = await conn.fetch("SELECT id, image FROM mods WHERE image IS NOT NULL")
+    written = 0
+    for row in rows:
+        if store.hash_for(row["id"]) is not None:
+            continue
+        try:
+            image = Image.open(BytesIO(row["image"]))
+            image.load()
+        except Exception as e:
+            logger.error(f"Failed to decode logo for {row['id']}: {e}")
+            continue
+        store.point(row["id"], store.put(render_logo_variants(image)))
+        written += 1
+    logger.info(f"Backfilled {written} logos")
+    return written
+
+
+_store: Optional[LogoStore] = None
+_tasks: Set[asyncio.Task] = set()
+
+
+def init_logo_store() -> LogoStore:
+    global _store
+    root = Path(env_str("LOGO_STORE_DIR", "storage/logos"))
+    cache_mb = env_int("LOGO_CACHE_MB", 64)
+    _store = LogoStore(root, cache_mb * 1024 * 1024)
+    return _store
+
+
+async def accept_mod_logo(conn: asyncpg.Connection, mod_id: str, digest: str):
+    """
+    Points the mod at a logo stored at upload time, on every replica, once
+    the transaction accepting the version commits.
+    """
+    if not valid_mod_id(mod_id):
+        raise ValueError(f"Invalid mod id {mod_id!r}")
+    await notify(conn, POINTER_CHANNEL, f"{mod_id} {digest}")
+
+
+def watch_logo_pointers(listener: NotificationListener):
+    """
+    Writes pointers for accepted logos. Every replica writes them, so with a
+    shared LOGO_STORE_DIR one that missed the notification still picks the
+    new pointer up after POINTER_TTL.
+    """
+    async def point(mod_id: str, digest: str):
+        try:
+            await asyncio.to_thread(get_logo_store().point, mod_id, digest)
+        except Exception as e:
+            logger.error(f"Failed to point {mod_id} at logo {digest}: {e!r}")
+
+    def on_notify(payload: str):
+        mod_id, _, digest = payload.partition(" ")
+        task = asyncio.create_task(point(mod_id, digest))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+    listener.subscribe(POINTER_CHANNEL, on_notify, lambda: None)
+
+
+def current_logo_hash(mod_id: str) -> Optional[str]:
+    """Hash of a mod's current logo, None without one or without a store."""
+    if _store is None:
+        return None
+    return _store.hash_for(mod_id)
+
+
+def get_logo_store() -> LogoStore:
+    if _store is None:
+        return init_logo_store()
+    return _store
@@ -1,17 +1,22 @@
 # api.py
 
 from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from starlette.status import (
     HTTP_400_BAD_REQUEST,
     HTTP_404_NOT_FOUND,
     HTTP_401_UNAUTHORIZED,
     HTTP_403_FORBIDDEN,
+    HTTP_409_CONFLICT,
+    HTTP_429_TOO_MANY_REQUESTS,
+    HTTP_503_SERVICE_UNAVAILABLE,
     HTTP_500_INTERNAL_SERVER_ERROR,
 )
 from pydantic import BaseModel
-from typing import Generic, TypeVar, List
-from pydantic import BaseModel
+from typing import Generic, Optional, Sequence, TypeVar, List
+import base64
+import json
+import orjson
 
 # Generic type for paginated data and responses.
 T = TypeVar("T")
@@ -19,6 +24,36 @@ T = TypeVar("T")
 class PaginatedData(BaseModel, Generic[T]):
     data: List[T]
     count: int
+    # Keyset pagination: pass next_cursor back as `cursor` to get the next page
+    next_cursor: Optional[str] = None
+    # Set when count comes from a cache or an estimate rather than an exact COUNT(*)
+    count_is_estimate: bool = False
+
+def encode_cursor(scope: str, key: Sequence) -> str:
+    """
+    Opaque cursor for keyset pagination: the sort key (ending with the id)
+    of the last row on a page. `scope` ties the cursor to one listing/sort.
+    """
+    raw = json.dumps([scope, *key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(scope: str, cursor: str, types: Sequence) -> tuple:
+    """
+    Sort key of a cursor from encode_cursor. `types` holds the expected type
+    (or tuple of types) of every key value; anything else is a BadRequest.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ApiError("Invalid cursor", "BadRequest")
+    if not isinstance(values, list) or len(values) != len(types) + 1 or values[0] != scope:
+        raise ApiError("Invalid cursor", "BadRequest")
+    key = tuple(values[1:])
+    for value, expected in zip(key, types):
+        # JSON true/false would pass as ints
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise ApiError("Invalid cursor", "BadRequest")
+    return key
 
 class ApiResponse(BaseModel, Generic[T]):
     error: str
@@ -50,9 +85,26 @@ class ApiError(Exception):
             return "You need to be authenticated to perform this action"
         elif self.error_type == "Forbidden":
             return "You cannot perform this action"
+        elif self.error_type == "Conflict":
+            return self.message or "Conflict"
+        elif self.error_type == "TooManyRequests":
+            return self.message or "Too many requests"
         else:
             return "Internal server error"
 
+class ApiJSONResponse(ORJSONResponse):
+    """
+    Default response class. A Pydantic model passed in is serialized
+    straight to JSON bytes by pydantic-core; anything else goes through
+    orjson. A model an endpoint returns is first validated against the
+    response model and turned into a dict by FastAPI, so hot endpoints
+    return an ApiJSONResponse (or go through cached_response) instead.
+    """
+    def render(self, content) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
 def api_exception_handler(request: Request, exc: ApiError):
     """
     FastAPI exception handler for ApiError.
@@ -67,8 +119,14 @@ def api_exception_handler(request: Request, exc: ApiError):
         status_code = HTTP_401_UNAUTHORIZED
     elif exc.error_type == "Forbidden":
         status_code = HTTP_403_FORBIDDEN
+    elif exc.error_type == "Conflict":
+        status_code = HTTP_409_CONFLICT
+    elif exc.error_type == "TooManyRequests":
+        status_code = HTTP_429_TOO_MANY_REQUESTS
+    elif exc.error_type == "DbAcquireError":
+        status_code = HTTP_503_SERVICE_UNAVAILABLE
 
-    return JSONResponse(
+    return ApiJSONResponse(
         status_code=status_code,
         content={"error": str(exc), "payload": ""}
     )
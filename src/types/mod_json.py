@@ -2,14 +2,24 @@
 
 import re
 import json
+import time
+import struct
+import asyncio
 import hashlib
+import tempfile
 import zipfile
+from contextlib import contextmanager
 from io import BytesIO, BufferedReader
+from typing import AsyncIterable, BinaryIO, Dict, List, Optional, Union
 from urllib.parse import urlparse
 
-import semver
 from PIL import Image
 
+from src.ingest.binaries import classify_binary
+from src.storage.logos import DEFAULT_FORMAT, DEFAULT_SIZE, get_logo_store, render_logo_variants, variant_name
+from src.types.api import ApiError
+from src.types.version_constraint import VersionConstraint
+
 # --- Placeholder Classes for Domain Types ---
 # In your Rust code these are defined elsewhere.
 # Replace these with your actual implementations if available.
@@ -48,10 +58,190 @@ class DetailedGDVersion:
     def __init__(self, data):
         self.data = data
 
-class ApiError(Exception):
-    def __init__(self, message: str):
-        super().__init__(message)
-        self.message = message
+# --- Upload Spooling ---
+
+# Uploads are read and hashed in chunks of this size
+CHUNK_SIZE = 1024 * 1024
+# Spooled uploads stay in memory up to this size, then roll over to a temp file
+SPOOL_MEMORY_BYTES = 1024 * 1024
+
+class SpooledUpload:
+    """
+    An upload body spooled to a temporary file, hashed while the bytes arrive.
+    Memory use is bounded by SPOOL_MEMORY_BYTES regardless of the upload size.
+    """
+    def __init__(self, max_size_bytes: int, named: bool = False):
+        self.max_size_bytes = max_size_bytes
+        self.size = 0
+        # Named uploads always live on disk so other processes can open them
+        if named:
+            self.file = tempfile.NamedTemporaryFile()
+        else:
+            self.file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_BYTES)
+        self._hasher = hashlib.sha256()
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_size_bytes:
+            raise ApiError("File size exceeds maximum allowed size", "BadRequest")
+        self._hasher.update(chunk)
+        self.file.write(chunk)
+
+    def write_from(self, source: BinaryIO):
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            self.write(chunk)
+
+    async def write_from_stream(self, stream: AsyncIterable[bytes]):
+        async for chunk in stream:
+            self.write(chunk)
+
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
+    @property
+    def path(self) -> str:
+        self.file.flush()
+        return self.file.name
+
+    def rewind(self) -> BinaryIO:
+        self.file.seek(0)
+        return self.file
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def hash_file(file: BinaryIO, max_size_bytes: int) -> str:
+    """
+    Computes the SHA-256 of a seekable file in chunks and rewinds it.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    while True:
+        chunk = file.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_size_bytes:
+            raise ApiError("File size exceeds maximum allowed size", "BadRequest")
+        hasher.update(chunk)
+    file.seek(0)
+    return hasher.hexdigest()
+
+# --- Archive Validation ---
+
+# Checked against the zip central directory before anything is decompressed
+MAX_ARCHIVE_ENTRIES = 20_000
+# Declared uncompressed size of the whole archive, relative to the upload limit
+MAX_UNCOMPRESSED_FACTOR = 4
+# Large entries may not expand more than this; small ones are exempt since
+# tiny repetitive files legitimately compress very well
+MAX_COMPRESSION_RATIO = 100
+COMPRESSION_RATIO_MIN_SIZE = 1024 * 1024
+# Members read into memory, and the most we ever read of each
+MEMBER_READ_LIMITS = {
+    "mod.json": 256 * 1024,
+    "about.md": 1024 * 1024,
+    "changelog.md": 1024 * 1024,
+    "logo.png": 4 * 1024 * 1024,
+}
+MAX_LOGO_PIXELS = 4096 * 4096
+
+EOCD_SIGNATURE = b"PK\x05\x06"
+# End of central directory record plus the longest possible comment
+EOCD_SEARCH_BYTES = 22 + 0xFFFF
+
+def check_content_length(content_length: Optional[int], max_size_bytes: int):
+    """Rejects an upload from its declared size, before any of it is read."""
+    if content_length is not None and content_length > max_size_bytes:
+        raise ApiError("File size exceeds maximum allowed size", "BadRequest")
+
+def declared_entry_count(file: BinaryIO) -> Optional[int]:
+    """
+    Entry count from the end of central directory record, read without
+    parsing the directory. None for zip64 archives or when there is no
+    record, ZipFile has the final say then.
+    """
+    file.seek(0, 2)
+    size = file.tell()
+    file.seek(max(0, size - EOCD_SEARCH_BYTES))
+    tail = file.read()
+    file.seek(0)
+    offset = tail.rfind(EOCD_SIGNATURE)
+    if offset < 0 or len(tail) - offset < 22:
+        return None
+    (count,) = struct.unpack_from("<H", tail, offset + 10)
+    return None if count == 0xFFFF else count
+
+def validate_central_directory(infos: List[zipfile.ZipInfo], max_size_bytes: int):
+    if len(infos) > MAX_ARCHIVE_ENTRIES:
+        raise ApiError(f"Archive has too many entries (max {MAX_ARCHIVE_ENTRIES})", "BadRequest")
+    total = 0
+    for info in infos:
+        total += info.file_size
+        if info.file_size >= COMPRESSION_RATIO_MIN_SIZE and info.file_size > info.compress_size * MAX_COMPRESSION_RATIO:
+            raise ApiError(f"{info.filename} has a suspicious compression ratio", "BadRequest")
+        limit = MEMBER_READ_LIMITS.get(info.filename)
+        if limit is not None and info.file_size > limit:
+            raise ApiError(f"{info.filename} is too large (max {limit // 1024} KB)", "BadRequest")
+    if total > max_size_bytes * MAX_UNCOMPRESSED_FACTOR:
+        raise ApiError("Archive is too large when uncompressed", "BadRequest")
+
+def open_archive(file: BinaryIO, max_size_bytes: int) -> zipfile.ZipFile:
+    """Opens an archive only if its central directory passes validation."""
+    count = declared_entry_count(file)
+    if count is not None and count > MAX_ARCHIVE_ENTRIES:
+        raise ApiError(f"Archive has too many entries (max {MAX_ARCHIVE_ENTRIES})", "BadRequest")
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise ApiError("Invalid zip archive", "BadRequest")
+    try:
+        validate_central_directory(archive.infolist(), max_size_bytes)
+    except ApiError:
+        archive.close()
+        raise
+    return archive
+
+def read_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+    """Reads a member into memory, capped at its read limit."""
+    limit = MEMBER_READ_LIMITS[info.filename]
+    with archive.open(info) as file:
+        data = file.read(limit + 1)
+    if len(data) > limit:
+        raise ApiError(f"{info.filename} is too large (max {limit // 1024} KB)", "BadRequest")
+    return data
+
+@contextmanager
+def stage(timings: Dict[str, float], name: str, metrics=None):
+    """
+    Times one ingestion stage. Errors raised in it are counted as rejections
+    of the stage in `metrics` (an IngestMetrics), if given.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        if metrics is not None:
+            metrics.reject(name)
+        raise
+    finally:
+        timings[name] = time.perf_counter() - start
+
+def decode_text_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> str:
+    try:
+        return read_member(archive, info).decode("utf-8")
+    except UnicodeDecodeError:
+        raise ApiError(f"{info.filename} is not valid UTF-8", "BadRequest")
 
 # --- ModJson and Related Types ---
 
@@ -78,50 +268,207 @@ class ModJson:
         self.api = data.get("api")
         self.gd = DetailedGDVersion(data.get("gd", {}))
         self.logo = data.get("logo", b"")
+        self.logo_variants = data.get("logo_variants", {})
+        # Set once the variants are in the logo store
+        self.logo_hash = data.get("logo_hash")
         self.about = data.get("about")
         self.changelog = data.get("changelog")
         self.dependencies = data.get("dependencies")
         self.incompatibilities = data.get("incompatibilities")
         self.links = data.get("links")
+        # Seconds spent in each ingestion stage
+        self.timings: Dict[str, float] = {}
 
     @staticmethod
-    def from_zip(zip_bytes: bytes, download_url: str, store_image: bool, max_size_mb: int) -> "ModJson":
+    def from_zip(
+        upload: Union[bytes, BinaryIO, SpooledUpload], download_url: str, store_image: bool, max_size_mb: int
+    ) -> "ModJson":
+        """
+        Parses a .geode archive. Accepts raw bytes, a seekable file or an
+        already spooled upload; the archive is never copied into memory.
+        """
         max_size_bytes = max_size_mb * 1_000_000
-        if len(zip_bytes) > max_size_bytes:
-            raise ApiError("File size exceeds maximum allowed size")
-        # Calculate SHA256 hash
-        file_hash = hashlib.sha256(zip_bytes).hexdigest()
-        with zipfile.ZipFile(BytesIO(zip_bytes)) as archive:
-            if "mod.json" not in archive.namelist():
-                raise ApiError("mod.json not found")
-            with archive.open("mod.json") as json_file:
-                data = json.load(json_file)
-        data["version"] = data.get("version", "").lstrip("v")
-        data["hash"] = file_hash
-        data["download_url"] = parse_download_url(download_url)
-        mod_json = ModJson(data)
-        # Process other files in the archive
-        with zipfile.ZipFile(BytesIO(zip_bytes)) as archive:
-            for name in archive.namelist():
-                with archive.open(name) as file:
-                    if name.endswith(".dll"):
-                        mod_json.windows = True
-                    elif name.endswith(".ios.dylib"):
-                        mod_json.ios = True
-                    elif name.endswith(".dylib"):
-                        arm, intel = check_mac_binary(file)
-                        mod_json.mac_arm = arm
-                        mod_json.mac_intel = intel
-                    elif name.endswith(".android32.so"):
-                        mod_json.android32 = True
-                    elif name.endswith(".android64.so"):
-                        mod_json.android64 = True
-                    elif name == "about.md":
-                        mod_json.about = file.read().decode("utf-8")
+        if isinstance(upload, SpooledUpload):
+            file_hash = upload.hexdigest()
+            file = upload.rewind()
+        else:
+            file = BytesIO(upload) if isinstance(upload, (bytes, bytearray)) else upload
+            file_hash = hash_file(file, max_size_bytes)
+        return ModJson._from_archive(file, file_hash, download_url, store_image, max_size_bytes)
+
+    @staticmethod
+    async def from_stream(
+        stream: AsyncIterable[bytes],
+        download_url: str,
+        store_image: bool,
+        max_size_mb: int,
+        content_length: Optional[int] = None
+    ) -> "ModJson":
+        """
+        Spools an async byte stream (e.g. a request body) to a temp file,
+        hashing it incrementally, then parses the archive.
+        """
+        check_content_length(content_length, max_size_mb * 1_000_000)
+        with SpooledUpload(max_size_mb * 1_000_000) as upload:
+            await upload.write_from_stream(stream)
+            return ModJson.from_zip(upload, download_url, store_image, max_size_mb)
+
+    @staticmethod
+    async def from_zip_async(
+        upload: Union[bytes, BinaryIO, AsyncIterable[bytes]],
+        download_url: str,
+        store_image: bool,
+        max_size_mb: int,
+        content_length: Optional[int] = None,
+        conn=None
+    ) -> "ModJson":
+        """
+        Same as from_zip, but the archive is spooled to disk here and parsed
+        in the ingest worker pool so the event loop is never blocked by
+        hashing, decompression or logo processing.
+        Archives that parse are kept in the artifact store, when there is one,
+        and their logo variants in the logo store. The logo only becomes the
+        mod's logo once the version is accepted (see accept_mod_logo).
+
+        Uploads are rejected as early as possible: from `content_length`
+        before reading, while spooling, then from the central directory
+        before anything is decompressed. Every stage is timed.
+
+        Once hashed, bytes that are already a mod version (checked when a
+        `conn` is given) are rejected with a Conflict, and bytes parsed
+        recently are answered from the recent uploads cache without parsing.
+        """
+        from src.database import queries, statements
+        from src.ingest.metrics import get_ingest_metrics
+        from src.ingest.pool import get_pool
+        from src.ingest.recent import get_recent_uploads
+        from src.storage.artifacts import get_artifact_store
+
+        pool = get_pool()
+        store = get_artifact_store()
+        metrics = get_ingest_metrics()
+        recent = get_recent_uploads()
+        max_size_bytes = max_size_mb * 1_000_000
+        timings: Dict[str, float] = {}
+
+        async def find_duplicate(digest: str) -> Optional["ModJson"]:
+            with stage(timings, "dedup", metrics):
+                if conn is not None:
+                    existing = await statements.fetchrow(conn, queries.MOD_VERSION_BY_HASH, digest)
+                    if existing is not None:
+                        raise ApiError(
+                            f"This file was already uploaded as {existing['mod_id']} {existing['version']}",
+                            "Conflict"
+                        )
+                duplicate = recent.get(digest, store_image)
+                if duplicate is not None:
+                    duplicate.timings = {}
+                return duplicate
+
+        if isinstance(upload, (bytes, bytearray)):
+            content_length = len(upload)
+        with stage(timings, "content_length", metrics):
+            check_content_length(content_length, max_size_bytes)
+        if isinstance(upload, (bytes, bytearray)):
+            upload = bytes(upload)
+            with stage(timings, "hash", metrics):
+                digest = await asyncio.to_thread(lambda: hashlib.sha256(upload).hexdigest())
+            mod_json = await find_duplicate(digest)
+            if mod_json is None:
+                with stage(timings, "parse", metrics):
+                    mod_json = await pool.submit(
+                        parse_archive_bytes, upload, download_url, store_image, max_size_mb
+                    )
+                recent.put(digest, mod_json, store_image)
+                if store is not None:
+                    with stage(timings, "store", metrics):
+                        await asyncio.to_thread(store.put_bytes, digest, upload)
+        else:
+            with SpooledUpload(max_size_bytes, named=True) as spooled:
+                with stage(timings, "spool", metrics):
+                    if hasattr(upload, "__aiter__"):
+                        await spooled.write_from_stream(upload)
+                    else:
+                        await asyncio.to_thread(spooled.write_from, upload)
+                digest = spooled.hexdigest()
+                mod_json = await find_duplicate(digest)
+                if mod_json is None:
+                    with stage(timings, "parse", metrics):
+                        mod_json = await pool.submit(
+                            parse_archive_file, spooled.path, digest, download_url, store_image, max_size_mb
+                        )
+                    recent.put(digest, mod_json, store_image)
+                    if store is not None:
+                        with stage(timings, "store", metrics):
+                            await asyncio.to_thread(store.put_file, digest, spooled.path)
+        if mod_json.logo_variants:
+            with stage(timings, "logo", metrics):
+                mod_json.logo_hash = await asyncio.to_thread(get_logo_store().put, mod_json.logo_variants)
+        # A recent result may come from a submission with another URL
+        mod_json.download_url = parse_download_url(download_url)
+        # "parse" includes queueing for a worker; the worker's own stages follow
+        timings.update(mod_json.timings)
+        mod_json.timings = timings
+        metrics.observe(timings)
+        return mod_json
+
+    @staticmethod
+    def _from_archive(
+        file: BinaryIO, file_hash: str, download_url: str, store_image: bool, max_size_bytes: int
+    ) -> "ModJson":
+        timings: Dict[str, float] = {}
+        with stage(timings, "central_directory"):
+            archive = open_archive(file, max_size_bytes)
+        with archive:
+            # Single walk over the central directory; only members we care
+            # about are ever opened (and so decompressed)
+            mod_json_info = None
+            logo_info = None
+            members = []
+            for info in archive.infolist():
+                name = info.filename
+                if name == "mod.json":
+                    mod_json_info = info
+                elif name == "logo.png":
+                    logo_info = info
+                elif name in ("about.md", "changelog.md") or name.endswith((".dll", ".dylib", ".so")):
+                    members.append(info)
+
+            with stage(timings, "mod_json"):
+                if mod_json_info is None:
+                    raise ApiError("mod.json not found", "BadRequest")
+                try:
+                    data = json.loads(read_member(archive, mod_json_info))
+                except ValueError as e:
+                    raise ApiError(f"Invalid mod.json: {e}", "BadRequest")
+                if not isinstance(data, dict):
+                    raise ApiError("mod.json must be a JSON object", "BadRequest")
+                if not isinstance(data.get("version", ""), str):
+                    raise ApiError("mod.json version must be a string", "BadRequest")
+                data["version"] = data.get("version", "").lstrip("v")
+                data["hash"] = file_hash
+                data["download_url"] = parse_download_url(download_url)
+                mod_json = ModJson(data)
+
+            with stage(timings, "members"):
+                for info in members:
+                    name = info.filename
+                    if name == "about.md":
+                        mod_json.about = decode_text_member(archive, info)
                     elif name == "changelog.md":
-                        mod_json.changelog = file.read().decode("utf-8")
-                    elif name == "logo.png":
-                        mod_json.logo = validate_mod_logo(file, store_image)
+                        mod_json.changelog = decode_text_member(archive, info)
+                    else:
+                        for platform in classify_binary(archive, info):
+                            setattr(mod_json, platform, True)
+
+            if logo_info is not None:
+                with stage(timings, "logo"):
+                    image = load_mod_logo(BytesIO(read_member(archive, logo_info)))
+                    if store_image:
+                        variants = render_logo_variants(image)
+                        mod_json.logo = variants[variant_name(DEFAULT_SIZE, DEFAULT_FORMAT)]
+                        mod_json.logo_variants = variants
+        mod_json.timings = timings
         return mod_json
 
     def prepare_dependencies_for_create(self):
@@ -213,11 +560,11 @@ class ModJson:
     def validate(self):
         id_regex = re.compile(r"^[a-z0-9_\-]+\.[a-z0-9_\-]+$")
         if not id_regex.match(self.id):
-            raise ApiError(f"Invalid mod id {self.id} (lowercase and numbers only, needs to look like 'dev.mod')")
+            raise ApiError(f"Invalid mod id {self.id} (lowercase and numbers only, needs to look like 'dev.mod')", "BadRequest")
         if not self.developer and not self.developers:
-            raise ApiError("No developer specified on mod.json")
+            raise ApiError("No developer specified on mod.json", "BadRequest")
         if len(self.id) > 64:
-            raise ApiError("Mod id too long (max 64 characters)")
+            raise ApiError("Mod id too long (max 64 characters)", "BadRequest")
         if self.links:
             for key in ["community", "homepage", "source"]:
                 url = self.links.get(key)
@@ -225,83 +572,56 @@ class ModJson:
                     try:
                         urlparse(url)
                     except Exception as e:
-                        raise ApiError(f"Invalid {key} URL: {url}. Reason: {e}")
+                        raise ApiError(f"Invalid {key} URL: {url}. Reason: {e}", "BadRequest")
 
-def validate_mod_logo(file, return_bytes: bool) -> bytes:
+def parse_archive_bytes(zip_bytes: bytes, download_url: str, store_image: bool, max_size_mb: int) -> ModJson:
+    """Worker pool entry point for in-memory archives."""
+    return ModJson.from_zip(zip_bytes, download_url, store_image, max_size_mb)
+
+def parse_archive_file(path: str, file_hash: str, download_url: str, store_image: bool, max_size_mb: int) -> ModJson:
+    """Worker pool entry point for archives spooled to disk, already hashed."""
+    with open(path, "rb") as file:
+        return ModJson._from_archive(file, file_hash, download_url, store_image, max_size_mb * 1_000_000)
+
+def load_mod_logo(file) -> Image.Image:
     try:
         data = file.read()
         image = Image.open(BytesIO(data))
         width, height = image.size
+        # Only the header has been read so far, check before decoding
+        if width * height > MAX_LOGO_PIXELS:
+            raise ApiError(f"Mod logo is too large ({width}x{height})", "BadRequest")
         if width != height:
-            raise ApiError(f"Mod logo must have 1:1 aspect ratio. Current size is {width}x{height}")
+            raise ApiError(f"Mod logo must have 1:1 aspect ratio. Current size is {width}x{height}", "BadRequest")
         if width > 336 or height > 336:
             image = image.resize((336, 336), Image.LANCZOS)
-        if return_bytes:
-            with BytesIO() as output:
-                image.save(output, format="PNG")
-                return output.getvalue()
-        return b""
+        return image
     except Exception as e:
-        raise ApiError(f"Invalid logo.png: {str(e)}")
+        raise ApiError(f"Invalid logo.png: {str(e)}", "BadRequest")
+
+def validate_mod_logo(file, return_bytes: bool) -> bytes:
+    image = load_mod_logo(file)
+    if return_bytes:
+        with BytesIO() as output:
+            image.save(output, format="PNG")
+            return output.getvalue()
+    return b""
+
+# Maps compiled constraint operators onto this module's compare names
+COMPARE_NAMES = {
+    "<=": ModVersionCompare.LessEq,
+    ">=": ModVersionCompare.MoreEq,
+    "=": ModVersionCompare.Exact,
+    "<": ModVersionCompare.Less,
+    ">": ModVersionCompare.More,
+}
 
 def split_version_and_compare(ver: str):
-    copy = ver
-    compare = ModVersionCompare.MoreEq
-    if ver.startswith("<="):
-        copy = ver[2:]
-        compare = ModVersionCompare.LessEq
-    elif ver.startswith(">="):
-        copy = ver[2:]
-        compare = ModVersionCompare.MoreEq
-    elif ver.startswith("="):
-        copy = ver[1:]
-        compare = ModVersionCompare.Exact
-    elif ver.startswith("<"):
-        copy = ver[1:]
-        compare = ModVersionCompare.Less
-    elif ver.startswith(">"):
-        copy = ver[1:]
-        compare = ModVersionCompare.More
-    copy = copy.lstrip("v")
     try:
-        v = semver.VersionInfo.parse(copy)
-        return (v, compare)
+        constraint = VersionConstraint.parse(ver)
     except ValueError:
-        raise ApiError(f"Invalid semver {ver}")
+        raise ApiError(f"Invalid semver {ver}", "BadRequest")
+    return (constraint.version, COMPARE_NAMES[constraint.compare])
 
 def parse_download_url(url: str) -> str:
     return url.rstrip("\\/")
-
-def check_mac_binary(file) -> (bool, bool):
-    try:
-        file.seek(0)
-        b = file.read(12)
-        if len(b) < 12:
-            raise ApiError("Invalid MacOS binary")
-        is_fat_arch = b[0] == 0xCA and b[1] == 0xFE and b[2] == 0xBA and b[3] == 0xBE
-        is_single_platform = b[0] == 0xCF and b[1] == 0xFA and b[2] == 0xED and b[3] == 0xFE
-        if is_fat_arch:
-            num_arches = b[7]
-            if num_arches == 0x1:
-                first = b[8]
-                second = b[11]
-                if first == 0x1 and second == 0x7:
-                    return (False, True)
-                elif first == 0x1 and second == 0xC:
-                    return (True, False)
-                else:
-                    raise ApiError("Invalid MacOS binary")
-            elif num_arches == 0x2:
-                return (True, True)
-            else:
-                raise ApiError("Invalid MacOS binary")
-        elif is_single_platform:
-            first = b[4]
-            second = b[7]
-            if first == 0x7 and second == 0x1:
-                return (False, True)
-            elif first == 0xC and second == 0x1:
-                return (True, False)
-        raise ApiError("Invalid MacOS binary")
-    except Exception as e:
-        raise ApiError(str(e))
@@ -8,6 +8,10 @@ from sqlalchemy.orm import declarative_base
 import asyncpg
 import sqlalchemy as sa
 
+from src.database import statements
+from src.types.api import ApiError
+from src.types.version_constraint import VersionConstraint
+
 Base = declarative_base()
 
 class DependencyImportance(str, Enum):
@@ -25,6 +29,10 @@ class ModVersionCompare(str, Enum):
     def __str__(self):
         return self.value
 
+def db_compare(compare: ModVersionCompare) -> str:
+    """The version_compare enum spells <= as =<."""
+    return "=<" if compare == ModVersionCompare.less_eq else compare.value
+
 class Dependency(Base):
     __tablename__ = "dependencies"
 
@@ -52,62 +60,87 @@ class FetchedDependency:
         self.compare = compare
         self.importance = importance
 
+    def constraint(self) -> VersionConstraint:
+        return VersionConstraint.of(self.version, self.compare)
+
     def to_response(self) -> ResponseDependency:
-        version_str = self.version if self.version != "*" else "*"
-        return ResponseDependency(mod_id=self.dependency_id, version=f"{self.compare}{version_str}", importance=self.importance)
+        return ResponseDependency(mod_id=self.dependency_id, version=self.constraint().text, importance=self.importance)
 
 async def create_for_mod_version(id: int, deps: List[DependencyCreate], pool: asyncpg.Connection) -> None:
+    """
+    The dependency graph only holds accepted versions; it picks these edges
+    up once mod_status_changed notifies it after the accepting commit.
+    """
+    from src.database import queries
     try:
         async with pool.transaction():
             values = [
-                (id, dep.dependency_id, dep.version, dep.compare.value, dep.importance.value)
+                (id, dep.dependency_id, dep.version, db_compare(dep.compare), dep.importance.value)
                 for dep in deps
             ]
-            query = """
-            INSERT INTO dependencies (dependent_id, dependency_id, version, compare, importance)
-            VALUES ($1, $2, $3, $4, $5)
-            """
-            await pool.executemany(query, values)
+            await statements.executemany(pool, queries.INSERT_DEPENDENCY, values)
     except Exception as e:
         logging.error(f"Error inserting dependencies: {e}")
-        raise ApiError("DbError")
+        raise ApiError("Failed to insert dependencies", "DbError")
 
 async def clear_for_mod_version(id: int, pool: asyncpg.Connection) -> None:
+    from src.database import queries
     try:
-        await pool.execute("DELETE FROM dependencies WHERE dependent_id = $1", id)
+        await statements.execute(pool, queries.CLEAR_DEPENDENCIES, id)
     except Exception as e:
         logging.error(f"Failed to remove dependencies for mod version {id}: {e}")
-        raise ApiError("DbError")
+        raise ApiError("Failed to remove dependencies", "DbError")
 
 async def get_for_mod_versions(
     ids: List[int], platform: Optional[str], gd: Optional[str], geode: Optional[str], pool: asyncpg.Connection
 ) -> Dict[int, List[FetchedDependency]]:
+    """
+    Resolves transitive dependencies from the in-memory dependency graph,
+    falling back to the recursive SQL query when the graph isn't loaded.
+    """
+    from src.index.dependency_graph import get_dependency_graph
+    graph = get_dependency_graph()
+    if graph is not None:
+        return graph.resolve(ids, platform, gd, geode)
+    return await get_for_mod_versions_sql(ids, platform, gd, geode, pool)
+
+async def get_for_mod_versions_sql(
+    ids: List[int], platform: Optional[str], gd: Optional[str], geode: Optional[str], pool: asyncpg.Connection
+) -> Dict[int, List[FetchedDependency]]:
+    from src.database import queries
     try:
-        query = """
-        WITH RECURSIVE dep_tree AS (
-            -- Your recursive SQL query logic here
-        )
-        SELECT * FROM dep_tree
-        """
-        result = await pool.fetch(query, *ids, gd, platform, geode)
-        
+        rows = await statements.fetch(pool, queries.DEPENDENCY_TREE, ids, gd, platform, geode)
         dependencies = {}
-        for row in result:
-            dependency = FetchedDependency(
-                mod_version_id=row['dependency_vid'],
-                version=row['dependency_version'],
-                dependency_id=row['dependency'],
-                compare=ModVersionCompare(row['compare']),
-                importance=DependencyImportance(row['importance'])
-            )
-            dependencies.setdefault(row['start_node'], []).append(dependency)
+        for start_node, dependency in rows:
+            dependencies.setdefault(start_node, []).append(dependency)
         return dependencies
     except Exception as e:
         logging.error(f"Error fetching dependencies: {e}")
-        raise ApiError("DbError")
+        raise ApiError("Failed to fetch dependencies", "DbError")
+
+async def check_resolver_consistency(
+    ids: List[int], platform: Optional[str], gd: Optional[str], geode: Optional[str], pool: asyncpg.Connection
+) -> List[str]:
+    """
+    Resolves the same request through the dependency graph and through SQL
+    and returns a description of every row where the two disagree.
+    """
+    from src.index.dependency_graph import get_dependency_graph
+    graph = get_dependency_graph()
+    if graph is None:
+        return ["Dependency graph is not loaded"]
 
-class ApiError(Exception):
-    def __init__(self, message: str):
-        self.message = message
-        super().__init__(self.message)
+    def rows(resolved: Dict[int, List[FetchedDependency]]) -> set:
+        return {
+            (start, dep.dependency_id, dep.mod_version_id, str(dep.compare), dep.importance.value)
+            for start, deps in resolved.items()
+            for dep in deps
+        }
 
+    from_sql = rows(await get_for_mod_versions_sql(ids, platform, gd, geode, pool))
+    from_graph = rows(graph.resolve(ids, platform, gd, geode))
+    problems = [f"Only in SQL: {row}" for row in sorted(from_sql - from_graph)]
+    problems += [f"Only in graph: {row}" for row in sorted(from_graph - from_sql)]
+    for problem in problems:
+        logging.warning(f"Dependency resolver mismatch: {problem}")
+    return problems
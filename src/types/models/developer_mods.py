@@ -0,0 +1,43 @@
+from typing import Optional
+
+import asyncpg
+from pydantic import BaseModel
+
+from src.database import queries, statements
+from src.database.counts import get_count_cache
+from src.types.api import PaginatedData, decode_cursor, encode_cursor
+
+CURSOR_SCOPE = "developer_mods"
+
+
+class DeveloperModItem(BaseModel):
+    id: str
+    name: str
+    version: str
+    is_owner: bool
+
+
+async def get_developer_mods(
+    developer_id: int,
+    per_page: int,
+    cursor: Optional[str],
+    conn: asyncpg.Connection
+) -> PaginatedData[DeveloperModItem]:
+    after = decode_cursor(CURSOR_SCOPE, cursor, (str,))[0] if cursor else None
+    # One extra row tells us whether there's a next page
+    rows = await statements.fetch(conn, queries.DEVELOPER_MODS_PAGE, developer_id, after, per_page + 1)
+    count, cached = await get_count_cache().count(conn, queries.DEVELOPER_MODS_COUNT, developer_id)
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(CURSOR_SCOPE, (rows[-1]["id"],))
+    return PaginatedData(
+        data=[
+            DeveloperModItem(id=row["id"], name=row["name"], version=row["version"], is_owner=row["is_owner"])
+            for row in rows
+        ],
+        count=count,
+        next_cursor=next_cursor,
+        count_is_estimate=cached
+    )
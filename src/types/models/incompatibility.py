@@ -4,12 +4,16 @@ from datetime import datetime
 from enum import Enum
 import ipaddress
 
+import asyncpg
 import sqlalchemy
 from sqlalchemy import Column, Integer, String, Enum as SQLEnum, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.future import select
 
+from src.database import statements
+from src.types.version_constraint import VersionConstraint
+
 Base = declarative_base()
 
 class IncompatibilityImportance(str, Enum):
@@ -27,11 +31,13 @@ class FetchedIncompatibility(BaseModel):
     class Config:
         orm_mode = True
 
+    def constraint(self) -> VersionConstraint:
+        return VersionConstraint.of(self.version, self.compare)
+
     def to_response(self) -> 'ResponseIncompatibility':
-        version = self.version if self.version != "*" else "*"
         return ResponseIncompatibility(
             mod_id=self.incompatibility_id,
-            version=f"{self.compare}{self.version}" if self.version != "*" else version,
+            version=self.constraint().text,
             importance=self.importance
         )
 
@@ -92,34 +98,10 @@ class Incompatibility(Base):
         return grouped
 
     @classmethod
-    async def get_supersedes_for(cls, session, ids: List[str], platform: str, gd: str, geode: str) -> Dict[str, 'Replacement']:
-        query = """
-        SELECT
-            replaced.incompatibility_id AS replaced, 
-            replacement.mod_id AS replacement, 
-            replacement.version AS replacement_version,
-            replacement.id AS replacement_id
-        FROM incompatibilities replaced
-        INNER JOIN mod_versions replacement ON replacement.id = replaced.mod_id
-        WHERE replaced.importance = 'superseded'
-        AND replaced.incompatibility_id = ANY(:ids)
-        AND replacement.gd = :gd
-        AND replacement.platform = :platform
-        """
-        result = await session.execute(query, {'ids': ids, 'gd': gd, 'platform': platform})
-        rows = result.fetchall()
-
-        supersedes = {}
-        for row in rows:
-            supersedes[row.replaced] = Replacement(
-                id=row.replacement,
-                version=row.replacement_version,
-                replacement_id=row.replacement_id,
-                download_link="",
-                dependencies=[],
-                incompatibilities=[]
-            )
-        return supersedes
+    async def get_supersedes_for(
+        cls, conn: asyncpg.Connection, ids: List[str], platform: str, gd: str, geode: str
+    ) -> Dict[str, 'Replacement']:
+        return await fetch_supersedes_for(ids, platform, gd, geode, conn)
 
 
 class IncompatibilityCreate(BaseModel):
@@ -141,4 +123,21 @@ class Replacement(BaseModel):
     replacement_id: int
     download_link: str
     dependencies: List[str]
-    incompatibilities: List[str]
\ No newline at end of file
+    incompatibilities: List[str]
+
+async def fetch_for_mod_versions(ids: List[int], pool: asyncpg.Connection) -> Dict[int, List[FetchedIncompatibility]]:
+    from src.database import queries
+    grouped = {}
+    for incompat in await statements.fetch(pool, queries.INCOMPATIBILITIES_FOR_VERSIONS, ids):
+        grouped.setdefault(incompat.mod_id, []).append(incompat)
+    return grouped
+
+
+async def fetch_supersedes_for(
+    ids: List[str], platform: Optional[str], gd: Optional[str], geode: Optional[str], pool: asyncpg.Connection
+) -> Dict[str, Replacement]:
+    """
+    Newest accepted, compatible mod version superseding each of the given mods.
+    """
+    from src.database import queries
+    return dict(await statements.fetch(pool, queries.SUPERSEDES_FOR, ids, gd, platform, geode))
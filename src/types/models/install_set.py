@@ -0,0 +1,128 @@
+from typing import Dict, List, Optional, Tuple
+
+import asyncpg
+from pydantic import BaseModel
+
+from src.index.dependency_graph import DependencyGraph, get_dependency_graph
+from src.types.api import create_download_link
+from src.types.models.incompatibility import (
+    IncompatibilityImportance,
+    Replacement,
+    fetch_for_mod_versions,
+    fetch_supersedes_for,
+)
+
+
+class ResolveRequest(BaseModel):
+    mods: List[str]
+    platform: Optional[str] = None
+    gd: Optional[str] = None
+    geode: Optional[str] = None
+
+
+class ResolvedMod(BaseModel):
+    id: str
+    version: str
+    mod_version_id: int
+    download_link: str
+    required_by: List[str]
+
+
+class ResolveConflict(BaseModel):
+    mod_id: str
+    conflicts_with: str
+    version: str
+    importance: IncompatibilityImportance
+
+
+class ResolvedInstallSet(BaseModel):
+    mods: List[ResolvedMod]
+    conflicts: List[ResolveConflict]
+    replacements: Dict[str, Replacement]
+    missing: List[str]
+
+
+# (mod_version_id, version, required_by) per mod id
+Chosen = Dict[str, Tuple[int, str, List[str]]]
+
+
+def _from_graph(request: ResolveRequest, graph: DependencyGraph) -> Tuple[Chosen, List[str]]:
+    roots = []
+    missing = []
+    for mod_id in dict.fromkeys(request.mods):
+        node = graph.latest(mod_id, request.platform, request.gd, request.geode)
+        if node is None:
+            missing.append(mod_id)
+        else:
+            roots.append(node)
+    nodes, required_by, unsatisfied = graph.install_set(roots, request.platform, request.gd, request.geode)
+    chosen = {
+        graph.mod_id(mod): (node.id, node.version, sorted(graph.mod_id(m) for m in required_by.get(mod, ())))
+        for mod, node in nodes.items()
+    }
+    missing.extend(graph.mod_id(mod) for mod in unsatisfied)
+    return chosen, missing
+
+
+async def _partial_graph(mod_ids: List[str], pool: asyncpg.Connection) -> DependencyGraph:
+    """
+    A graph of just the requested mods and everything they can depend on,
+    read level by level, for when the full graph isn't loaded.
+    """
+    graph = DependencyGraph()
+    loaded = set()
+    pending = set(mod_ids)
+    while pending:
+        await graph.refresh(pool, sorted(pending))
+        loaded |= pending
+        pending = set(graph.known_mod_ids()) - loaded
+    return graph
+
+
+async def resolve_install_set(request: ResolveRequest, app_url: str, pool: asyncpg.Connection) -> ResolvedInstallSet:
+    """
+    Resolves a whole modpack into one de-duplicated install set, including
+    incompatibility conflicts and replacements for superseded mods.
+    """
+    graph = get_dependency_graph()
+    if graph is None:
+        graph = await _partial_graph(list(dict.fromkeys(request.mods)), pool)
+    chosen, missing = _from_graph(request, graph)
+
+    by_version = {vid: mod_id for mod_id, (vid, _, _) in chosen.items()}
+    incompatibilities = await fetch_for_mod_versions(list(by_version), pool)
+    conflicts = []
+    for vid, incompats in incompatibilities.items():
+        for incompat in incompats:
+            if incompat.importance == IncompatibilityImportance.superseded:
+                continue
+            other = chosen.get(incompat.incompatibility_id)
+            if other is None:
+                continue
+            if incompat.constraint().matches_version(other[1]):
+                conflicts.append(ResolveConflict(
+                    mod_id=by_version[vid],
+                    conflicts_with=incompat.incompatibility_id,
+                    version=other[1],
+                    importance=incompat.importance
+                ))
+
+    replacements = await fetch_supersedes_for(list(chosen), request.platform, request.gd, request.geode, pool)
+    for replacement in replacements.values():
+        replacement.download_link = create_download_link(app_url, replacement.id, replacement.version)
+
+    return ResolvedInstallSet(
+        mods=[
+            ResolvedMod(
+                id=mod_id,
+                version=version,
+                mod_version_id=vid,
+                download_link=create_download_link(app_url, mod_id, version),
+                required_by=sorted(set(required_by))
+            )
+            for mod_id, (vid, version, required_by) in sorted(chosen.items())
+        ],
+        conflicts=conflicts,
+        replacements=replacements,
+        missing=missing
+    )
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from src.index.mod_listing import DEFAULT_SORT, ModListingIndex
+from src.types.api import PaginatedData
+
+
+class ModListItem(BaseModel):
+    id: str
+    name: str
+    description: Optional[str]
+    version: str
+    download_count: int
+    tags: List[str]
+    created_at: datetime
+    updated_at: datetime
+
+
+class ModFacets(BaseModel):
+    tags: Dict[str, int]
+    platforms: Dict[str, int]
+    gd: Dict[str, int]
+
+
+class ModSearchPage(PaginatedData[ModListItem]):
+    facets: ModFacets
+
+
+def search_mods(
+    index: ModListingIndex,
+    query: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    platform: Optional[str] = None,
+    gd: Optional[str] = None,
+    sort: str = DEFAULT_SORT,
+    per_page: int = 10,
+    cursor: Optional[str] = None
+) -> ModSearchPage:
+    result = index.search(query, tags or (), platform, gd, sort, per_page, cursor)
+    return ModSearchPage(
+        data=[
+            ModListItem(
+                id=mod.id,
+                name=mod.name,
+                description=mod.description,
+                version=mod.version,
+                download_count=mod.download_count,
+                tags=index.tag_names(mod),
+                created_at=mod.created_at,
+                updated_at=mod.updated_at
+            )
+            for mod in result.mods
+        ],
+        count=result.count,
+        next_cursor=result.next_cursor,
+        facets=ModFacets(
+            tags=result.facets.tags,
+            platforms=result.facets.platforms,
+            gd=result.facets.gd
+        )
+    )
@@ -0,0 +1,72 @@
+from typing import Dict, List, Optional
+
+import asyncpg
+from pydantic import BaseModel
+
+from src.database import queries, statements
+from src.types.api import create_download_link
+from src.types.models.incompatibility import Replacement, fetch_supersedes_for
+from src.types.version_constraint import try_version_key
+
+
+class InstalledMod(BaseModel):
+    id: str
+    version: str
+
+
+class UpdateCheckRequest(BaseModel):
+    mods: List[InstalledMod]
+    platform: Optional[str] = None
+    gd: Optional[str] = None
+    geode: Optional[str] = None
+
+
+class ModUpdate(BaseModel):
+    id: str
+    version: str
+    download_link: str
+
+
+class UpdateCheck(BaseModel):
+    # Only mods with a newer compatible version are listed
+    updates: List[ModUpdate]
+    # Installed mods that have been superseded, by installed mod id
+    replacements: Dict[str, Replacement]
+
+
+async def check_updates(request: UpdateCheckRequest, app_url: str, conn: asyncpg.Connection) -> UpdateCheck:
+    """
+    Newer compatible versions for a whole installed mod list, plus
+    replacements for superseded mods, in two set-based queries. Latest
+    versions come from the trigger-maintained mod_latest_versions table
+    rather than the dependency graph, which lags commits by a notification.
+    """
+    installed = {mod.id: mod.version.lstrip("v") for mod in request.mods}
+    ids = list(installed)
+    rows = await statements.fetch(
+        conn, queries.LATEST_COMPATIBLE_VERSIONS, ids, request.gd, request.platform, request.geode
+    )
+
+    updates = []
+    checked = set()
+    for row in rows:
+        mod_id, version = row["mod_id"], row["version"]
+        newest = try_version_key(version)
+        # Rows come newest first; the first parseable one is the latest
+        if mod_id in checked or newest is None:
+            continue
+        checked.add(mod_id)
+        current = try_version_key(installed[mod_id])
+        # Anything unparseable on the client's side is worth replacing
+        if current is None or newest > current:
+            updates.append(ModUpdate(
+                id=mod_id,
+                version=version,
+                download_link=create_download_link(app_url, mod_id, version)
+            ))
+
+    replacements = await fetch_supersedes_for(ids, request.platform, request.gd, request.geode, conn)
+    for replacement in replacements.values():
+        replacement.download_link = create_download_link(app_url, replacement.id, replacement.version)
+
+    return UpdateCheck(updates=sorted(updates, key=lambda update: update.id), replacements=replacements)
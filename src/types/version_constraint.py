@@ -0,0 +1,177 @@
+import re
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+# Max distinct versions / constraints kept compiled at once
+CACHE_SIZE = 8192
+
+# Kept in sync with semver_key in migrations/0009_mod_latest_versions.sql.
+# ASCII digits only and no trailing newline, unlike \d and $
+SEMVER_REGEX = re.compile(
+    r"^v?(0|[1-9][0-9]*)\.(0|[1-9][0-9]*)\.(0|[1-9][0-9]*)"
+    r"(?:-((?:0|[1-9][0-9]*|[0-9]*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9][0-9]*|[0-9]*[a-zA-Z-][0-9a-zA-Z-]*))*))?"
+    r"(?:\+([0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?\Z"
+)
+
+EXACT = "="
+MORE = ">"
+MORE_EQ = ">="
+LESS = "<"
+LESS_EQ = "<="
+
+# Compare prefixes, longest first. "=<" is how the version_compare enum spells "<="
+COMPARE_PREFIXES = (
+    ("<=", LESS_EQ),
+    ("=<", LESS_EQ),
+    (">=", MORE_EQ),
+    ("=", EXACT),
+    ("<", LESS),
+    (">", MORE),
+)
+
+# Sorts after any prerelease tuple, since a release outranks its prereleases
+_RELEASE = (2,)
+
+VersionKey = Tuple
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def version_key(version: str) -> VersionKey:
+    """
+    Tuple that orders like semver precedence (build metadata ignored).
+    Raises ValueError for anything that isn't a valid semver.
+    """
+    match = SEMVER_REGEX.match(version)
+    if match is None:
+        raise ValueError(f"Invalid semver {version}")
+    major, minor, patch, prerelease, _ = match.groups()
+    if prerelease is None:
+        pre = _RELEASE
+    else:
+        pre = (1,) + tuple(
+            (0, int(part), "") if part.isdigit() else (1, 0, part)
+            for part in prerelease.split(".")
+        )
+    return (int(major), int(minor), int(patch), pre)
+
+
+def try_version_key(version: str) -> Optional[VersionKey]:
+    try:
+        return version_key(version)
+    except ValueError:
+        return None
+
+
+class VersionConstraint:
+    """
+    A compiled version requirement such as ">=1.2.0". Instances are interned
+    through parse() / of(), so matching a version never re-parses anything.
+    `compare` is the plain operator string, so ModVersionCompare members
+    compare equal to it.
+    """
+    __slots__ = ("compare", "version", "key", "text")
+
+    def __init__(self, compare: str, version: str):
+        self.compare = compare
+        self.version = version
+        self.key = None if version == "*" else version_key(version)
+        self.text = "*" if version == "*" else f"{compare}{version}"
+
+    @staticmethod
+    def parse(text: str) -> "VersionConstraint":
+        return _parse(text)
+
+    @staticmethod
+    def of(version: str, compare) -> "VersionConstraint":
+        return _of(version, normalize_compare(str(compare)))
+
+    @property
+    def is_any(self) -> bool:
+        return self.key is None
+
+    def matches(self, key: VersionKey) -> bool:
+        if self.key is None:
+            return True
+        compare = self.compare
+        if compare == MORE_EQ:
+            return key >= self.key
+        elif compare == EXACT:
+            return key == self.key
+        elif compare == MORE:
+            return key > self.key
+        elif compare == LESS:
+            return key < self.key
+        return key <= self.key
+
+    def matches_version(self, version: str) -> bool:
+        key = try_version_key(version)
+        return key is not None and self.matches(key)
+
+    def range_in(self, keys: List[VersionKey]) -> Tuple[int, int]:
+        """Half-open index range of a sorted key list satisfying this constraint."""
+        if self.key is None:
+            return 0, len(keys)
+        compare = self.compare
+        if compare == MORE_EQ:
+            return bisect_left(keys, self.key), len(keys)
+        elif compare == EXACT:
+            return bisect_left(keys, self.key), bisect_right(keys, self.key)
+        elif compare == MORE:
+            return bisect_right(keys, self.key), len(keys)
+        elif compare == LESS:
+            return 0, bisect_left(keys, self.key)
+        return 0, bisect_right(keys, self.key)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"VersionConstraint({self.text!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, VersionConstraint):
+            return NotImplemented
+        return self.compare == other.compare and self.key == other.key
+
+    def __hash__(self):
+        return hash((self.compare, self.key))
+
+
+def satisfying_range(keys: List[VersionKey], constraints: Iterable[VersionConstraint]) -> Tuple[int, int]:
+    """Intersection of the ranges of a sorted key list matching every constraint."""
+    lo, hi = 0, len(keys)
+    for constraint in constraints:
+        c_lo, c_hi = constraint.range_in(keys)
+        lo = max(lo, c_lo)
+        hi = min(hi, c_hi)
+        if lo >= hi:
+            return lo, lo
+    return lo, hi
+
+
+def normalize_compare(compare: str) -> str:
+    """Operator in its canonical form; the database enum spells <= as =<."""
+    if compare not in (EXACT, MORE, MORE_EQ, LESS, LESS_EQ, "=<"):
+        raise ValueError(f"Invalid version compare {compare}")
+    return LESS_EQ if compare == "=<" else compare
+
+
+def _of(version: str, compare: str) -> VersionConstraint:
+    # "v1.0.0" and "1.0.0" share one instance
+    return _interned(version.lstrip("v") if version != "*" else version, compare)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _interned(version: str, compare: str) -> VersionConstraint:
+    return VersionConstraint(compare, version)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parse(text: str) -> VersionConstraint:
+    if text == "*":
+        return _of("*", MORE_EQ)
+    for prefix, compare in COMPARE_PREFIXES:
+        if text.startswith(prefix):
+            return _of(text[len(prefix):], compare)
+    return _of(text, MORE_EQ)
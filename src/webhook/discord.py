@@ -1,5 +1,7 @@
 import requests
 
+from src.storage.logos import current_logo_hash
+
 class DiscordMessage:
     def __init__(self):
         self.embeds = []
@@ -18,30 +20,40 @@ class DiscordMessage:
         response = requests.post(webhook_url, json=payload)
         response.raise_for_status()
 
+def logo_url(base_url, mod_id, logo_hash=None):
+    # Hashed logo URLs are immutable, so Discord's proxy can cache them forever
+    if logo_hash:
+        return f"{base_url}/v1/logos/{logo_hash}/336.png"
+    return f"{base_url}/v1/mods/{mod_id}/logo"
+
 class NewModAcceptedEvent:
-    def __init__(self, name, version, mod_id, owner, verified_by, base_url):
+    def __init__(self, name, version, mod_id, owner, verified_by, base_url, logo_hash=None):
         self.name = name
         self.version = version
         self.id = mod_id
         self.owner = owner
         self.verified_by = verified_by
         self.base_url = base_url
+        # Pinned when the event is created, the mod's logo may change later
+        self.logo_hash = logo_hash or current_logo_hash(mod_id)
 
     def to_discord_webhook(self):
         return DiscordMessage().embed(
             f"\u2705 New mod: {self.name} {self.version}",
             f"https://geode-sdk.org/mods/{self.id}\n\nOwned by [{self.owner['display_name']}](https://github.com/{self.owner['username']})\nAccepted by [{self.verified_by['display_name']}](https://github.com/{self.verified_by['username']})",
-            f"{self.base_url}/v1/mods/{self.id}/logo"
+            logo_url(self.base_url, self.id, self.logo_hash)
         )
 
 class NewModVersionAcceptedEvent:
-    def __init__(self, name, version, mod_id, owner, verified, base_url):
+    def __init__(self, name, version, mod_id, owner, verified, base_url, logo_hash=None):
         self.name = name
         self.version = version
         self.id = mod_id
         self.owner = owner
         self.verified = verified
         self.base_url = base_url
+        # Pinned when the event is created, the mod's logo may change later
+        self.logo_hash = logo_hash or current_logo_hash(mod_id)
 
     def to_discord_webhook(self):
         accepted_msg = (
@@ -52,5 +64,5 @@ class NewModVersionAcceptedEvent:
         return DiscordMessage().embed(
             f"\u2B06\uFE0F Updated {self.name} to {self.version}",
             f"https://geode-sdk.org/mods/{self.id}\n\nOwned by [{self.owner['display_name']}](https://github.com/{self.owner['username']})\n{accepted_msg}",
-            f"{self.base_url}/v1/mods/{self.id}/logo"
+            logo_url(self.base_url, self.id, self.logo_hash)
         )
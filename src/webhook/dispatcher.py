@@ -0,0 +1,246 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from src.database import queries, statements
+from src.database.pool import DatabasePool
+from src.env import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+# Discord rejects messages with more than 10 embeds
+MAX_EMBEDS = 10
+
+# Longest we'll honor a Retry-After before giving up on this attempt
+MAX_RETRY_AFTER = 60.0
+
+# Rate limited retries per message, on top of max_attempts
+MAX_RATE_LIMITED_RETRIES = 10
+
+# Outbox rows are never claimed again after this many failed deliveries
+MAX_OUTBOX_DELIVERIES = 5
+
+# Seconds a replica holds the outbox rows it queued
+OUTBOX_LEASE = 600.0
+
+# (outbox row id or None, embed)
+QueuedEmbed = Tuple[Optional[int], Dict]
+
+
+def _retry_after(response: httpx.Response) -> float:
+    header = response.headers.get("Retry-After")
+    if header is not None:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    try:
+        return float(response.json().get("retry_after", 1.0))
+    except (ValueError, AttributeError):
+        return 1.0
+
+
+class WebhookDispatcher:
+    """
+    Delivers webhook events off the request path. Embeds from events that
+    arrive within `coalesce_delay` seconds of each other are sent as a single
+    message. Rate limits are honored via Retry-After, other failures are
+    retried with backoff up to `max_attempts` times.
+
+    With an outbox pool, every embed is written to webhook_outbox before it
+    is queued and removed once delivered, so undelivered events are picked
+    up again on the next start. Rows are claimed for OUTBOX_LEASE seconds,
+    so a replica starting meanwhile doesn't send them too, and rows that
+    failed MAX_OUTBOX_DELIVERIES deliveries are no longer picked up.
+    """
+    def __init__(
+        self,
+        webhook_url: str,
+        outbox: Optional[DatabasePool] = None,
+        max_queue: int = 1000,
+        coalesce_delay: float = 1.0,
+        max_attempts: int = 5,
+        client: Optional[httpx.AsyncClient] = None
+    ):
+        self.webhook_url = webhook_url
+        self.coalesce_delay = coalesce_delay
+        self.max_attempts = max_attempts
+        self._outbox = outbox
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=4, max_keepalive_connections=2)
+        )
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.messages = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rate_limited = 0
+
+    async def start(self):
+        if self._outbox is not None:
+            await self._load_outbox()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0):
+        """Gives queued embeds `timeout` seconds to go out, then stops."""
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Stopping webhook dispatcher with {self._queue.qsize()} embeds queued")
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._owns_client:
+            await self._client.aclose()
+
+    async def dispatch(self, event) -> bool:
+        """
+        Queues the embeds of an event (anything with to_discord_webhook()).
+        Returns False if the queue was full; with an outbox, those embeds are
+        still delivered after the next restart.
+        """
+        queued = True
+        for embed in event.to_discord_webhook().embeds:
+            outbox_id = None
+            if self._outbox is not None:
+                async with self._outbox.acquire() as conn:
+                    outbox_id = await statements.fetchval(
+                        conn, queries.INSERT_WEBHOOK_OUTBOX, json.dumps(embed), OUTBOX_LEASE
+                    )
+            try:
+                self._queue.put_nowait((outbox_id, embed))
+            except asyncio.QueueFull:
+                self.dropped += 1
+                queued = False
+        if not queued:
+            logger.warning("Webhook queue is full, dropped an event")
+        return queued
+
+    async def _load_outbox(self):
+        async with self._outbox.acquire() as conn:
+            rows = await statements.fetch(
+                conn, queries.CLAIM_WEBHOOK_OUTBOX, self._queue.maxsize, OUTBOX_LEASE, MAX_OUTBOX_DELIVERIES
+            )
+        for row in rows:
+            self._queue.put_nowait((row["id"], json.loads(row["embed"])))
+        if rows:
+            logger.info(f"Loaded {len(rows)} undelivered webhook embeds from the outbox")
+
+    async def _run(self):
+        while True:
+            batch: List[QueuedEmbed] = [await self._queue.get()]
+            # Let events that arrive together (e.g. a batch of accepts) share a message
+            if self.coalesce_delay > 0:
+                await asyncio.sleep(self.coalesce_delay)
+            while len(batch) < MAX_EMBEDS and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._deliver(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.error(f"Webhook delivery failed: {e!r}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, batch: List[QueuedEmbed]):
+        payload = {"embeds": [embed for _, embed in batch]}
+        outbox_ids = [outbox_id for outbox_id, _ in batch if outbox_id is not None]
+        attempt = 0
+        rate_limited = 0
+        while attempt < self.max_attempts and rate_limited < MAX_RATE_LIMITED_RETRIES:
+            try:
+                response = await self._client.post(self.webhook_url, json=payload)
+            except httpx.HTTPError as e:
+                logger.warning(f"Webhook request failed: {e!r}")
+                attempt += 1
+                await asyncio.sleep(min(2 ** attempt, MAX_RETRY_AFTER))
+                continue
+
+            if response.status_code == 429:
+                # Rate limits don't count as failed attempts
+                self.rate_limited += 1
+                rate_limited += 1
+                await asyncio.sleep(min(_retry_after(response), MAX_RETRY_AFTER))
+                continue
+            if response.is_success:
+                self.delivered += len(batch)
+                self.messages += 1
+                await self._forget(outbox_ids)
+                if response.headers.get("X-RateLimit-Remaining") == "0":
+                    await asyncio.sleep(min(float(response.headers.get("X-RateLimit-Reset-After", 0)), MAX_RETRY_AFTER))
+                return
+            if response.is_client_error:
+                # Retrying a rejected payload won't help
+                logger.error(f"Webhook rejected with {response.status_code}: {response.text}")
+                self.failed += len(batch)
+                await self._forget(outbox_ids)
+                return
+
+            logger.warning(f"Webhook returned {response.status_code}, retrying")
+            attempt += 1
+            await asyncio.sleep(min(2 ** attempt, MAX_RETRY_AFTER))
+
+        logger.error(f"Giving up on {len(batch)} webhook embeds after {attempt + rate_limited} attempts")
+        self.failed += len(batch)
+        if outbox_ids:
+            async with self._outbox.acquire() as conn:
+                await statements.execute(conn, queries.BUMP_WEBHOOK_OUTBOX_ATTEMPTS, outbox_ids)
+
+    async def _forget(self, outbox_ids: List[int]):
+        if outbox_ids:
+            async with self._outbox.acquire() as conn:
+                await statements.execute(conn, queries.DELETE_WEBHOOK_OUTBOX, outbox_ids)
+
+    def metrics(self) -> Dict:
+        return {
+            "queued": self._queue.qsize(),
+            "delivered": self.delivered,
+            "messages": self.messages,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+        }
+
+
+_dispatcher: Optional[WebhookDispatcher] = None
+
+
+async def init_webhook_dispatcher(pool: DatabasePool) -> Optional[WebhookDispatcher]:
+    global _dispatcher
+    webhook_url = os.getenv("DC_WEBHOOK_URL", "")
+    if not webhook_url:
+        logger.info("DC_WEBHOOK_URL is not set, webhooks are disabled")
+        return None
+    use_outbox = os.getenv("DC_WEBHOOK_OUTBOX", "false").lower() in ("1", "true", "yes")
+    _dispatcher = WebhookDispatcher(
+        webhook_url,
+        outbox=pool if use_outbox else None,
+        max_queue=env_int("DC_WEBHOOK_MAX_QUEUE", 1000),
+        coalesce_delay=env_float("DC_WEBHOOK_COALESCE_DELAY", 1.0)
+    )
+    await _dispatcher.start()
+    return _dispatcher
+
+
+def get_webhook_dispatcher() -> Optional[WebhookDispatcher]:
+    return _dispatcher
+
+
+async def shutdown_webhook_dispatcher():
+    global _dispatcher
+    if _dispatcher is not None:
+        await _dispatcher.stop()
+        _dispatcher = None
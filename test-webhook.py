@@ -1,12 +1,13 @@
+import asyncio
 import os
-import time
-import requests
 from src.webhook.discord import NewModAcceptedEvent, NewModVersionAcceptedEvent
+from src.webhook.dispatcher import WebhookDispatcher
 from dotenv import load_dotenv
 
 load_dotenv()
 
-webhook_url = os.getenv("DISCORD_WEBHOOK_URL")
+# Any URL works, e.g. a local stub server that prints what it receives
+webhook_url = os.getenv("DC_WEBHOOK_URL")
 
 # Example for NewModAcceptedEvent
 mod_event = NewModAcceptedEvent(
@@ -17,7 +18,6 @@ mod_event = NewModAcceptedEvent(
     verified_by={"display_name": "VerifierName", "username": "VerifierUsername"},
     base_url="https://geode-sdk.org"
 )
-mod_event.to_discord_webhook().send(webhook_url)
 
 # Example for NewModVersionAcceptedEvent
 version_event = NewModVersionAcceptedEvent(
@@ -28,4 +28,14 @@ version_event = NewModVersionAcceptedEvent(
     verified={"display_name": "AdminName", "username": "AdminUsername"},
     base_url="https://geode-sdk.org"
 )
-version_event.to_discord_webhook().send(webhook_url)
+
+async def main():
+    # Both events are coalesced into a single message
+    dispatcher = WebhookDispatcher(webhook_url)
+    await dispatcher.start()
+    await dispatcher.dispatch(mod_event)
+    await dispatcher.dispatch(version_event)
+    await dispatcher.stop(timeout=30)
+    print(dispatcher.metrics())
+
+asyncio.run(main())
@@ -0,0 +1,116 @@
+import io
+import pickle
+import zipfile
+
+import pytest
+
+from src.ingest.metrics import IngestMetrics
+from src.types.api import ApiError
+from src.types.mod_json import (
+    MAX_ARCHIVE_ENTRIES,
+    ModJson,
+    declared_entry_count,
+    load_mod_logo,
+    open_archive,
+    read_member,
+    stage,
+    validate_central_directory,
+)
+
+MAX_SIZE = 1_000_000
+
+
+def _info(name, file_size, compress_size=None):
+    info = zipfile.ZipInfo(name)
+    info.file_size = file_size
+    info.compress_size = file_size if compress_size is None else compress_size
+    return info
+
+
+def _zip(members) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def _assert_bad_request(excinfo):
+    assert excinfo.value.error_type == "BadRequest"
+
+
+def test_central_directory_accepts_ordinary_archive():
+    validate_central_directory([_info("mod.json", 1024), _info("a.dll", 200_000, 100_000)], MAX_SIZE)
+
+
+@pytest.mark.parametrize("infos", [
+    [_info(f"{i}.txt", 1) for i in range(MAX_ARCHIVE_ENTRIES + 1)],
+    [_info("a.dll", 2 * 1024 * 1024, 1024)],
+    [_info("mod.json", 256 * 1024 + 1)],
+    [_info(f"{i}.dll", MAX_SIZE) for i in range(5)],
+])
+def test_central_directory_rejections_are_bad_requests(infos):
+    with pytest.raises(ApiError) as excinfo:
+        validate_central_directory(infos, MAX_SIZE)
+    _assert_bad_request(excinfo)
+
+
+def test_small_entries_may_compress_well():
+    validate_central_directory([_info("about.md", 512 * 1024, 100)], MAX_SIZE)
+
+
+def test_declared_entry_count_reads_end_record():
+    file = _zip({"mod.json": "{}", "about.md": "hi", "logo.png": b""})
+    assert declared_entry_count(file) == 3
+    assert file.tell() == 0
+
+
+def test_declared_entry_count_without_end_record():
+    assert declared_entry_count(io.BytesIO(b"not a zip")) is None
+
+
+def test_open_archive_rejects_non_zip():
+    with pytest.raises(ApiError) as excinfo:
+        open_archive(io.BytesIO(b"not a zip"), MAX_SIZE)
+    _assert_bad_request(excinfo)
+
+
+def test_read_member_caps_at_limit():
+    with open_archive(_zip({"mod.json": "{}"}), MAX_SIZE) as archive:
+        assert read_member(archive, archive.getinfo("mod.json")) == b"{}"
+
+
+def test_logo_errors_are_bad_requests():
+    with pytest.raises(ApiError) as excinfo:
+        load_mod_logo(io.BytesIO(b"not a png"))
+    _assert_bad_request(excinfo)
+
+
+def test_errors_keep_their_type_across_worker_processes():
+    error = pickle.loads(pickle.dumps(ApiError("Invalid zip archive", "BadRequest")))
+    assert (error.error_type, str(error)) == ("BadRequest", "Invalid zip archive")
+
+
+@pytest.mark.parametrize("members", [
+    {"mod.json": "{not json"},
+    {"mod.json": "[]"},
+    {"mod.json": '{"version": 1}'},
+    {"mod.json": "{}", "about.md": b"\xff\xfe"},
+    {"mod.json": "{}", "changelog.md": b"\xc3"},
+])
+def test_bad_archive_contents_are_bad_requests(members):
+    with pytest.raises(ApiError) as excinfo:
+        ModJson.from_zip(_zip(members).getvalue(), "https://example.com/mod.geode", False, 1)
+    _assert_bad_request(excinfo)
+
+
+def test_stage_counts_rejections_in_metrics():
+    metrics = IngestMetrics()
+    timings = {}
+    with pytest.raises(ApiError) as excinfo:
+        with stage(timings, "mod_json", metrics):
+            raise ApiError("Invalid mod.json", "BadRequest")
+    assert not hasattr(excinfo.value, "stage")
+    assert metrics.metrics()["mod_json"]["rejected"] == 1
+    assert "mod_json" in timings
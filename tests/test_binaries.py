@@ -0,0 +1,123 @@
+import io
+import struct
+import zipfile
+
+import pytest
+
+from src.ingest import binaries
+from src.ingest.binaries import (
+    ANDROID32,
+    ANDROID64,
+    CPU_TYPE_ARM64,
+    CPU_TYPE_X86_64,
+    IOS,
+    MAC_ARM,
+    MAC_INTEL,
+    WINDOWS,
+    binary_kind,
+    classify_binary,
+    classify_header,
+    macho_cpu_types,
+)
+from src.types.api import ApiError
+
+
+def _pe(machine=0x8664):
+    header = bytearray(0x100)
+    header[:2] = b"MZ"
+    struct.pack_into("<I", header, 0x3C, 0x80)
+    header[0x80:0x84] = b"PE\0\0"
+    struct.pack_into("<H", header, 0x84, machine)
+    return bytes(header)
+
+
+def _elf(elf_class, machine):
+    header = bytearray(64)
+    header[:4] = b"\x7fELF"
+    header[4] = elf_class
+    header[5] = 1
+    struct.pack_into("<H", header, 18, machine)
+    return bytes(header)
+
+
+def _thin(cpu_type):
+    return struct.pack("<II", binaries.MACHO_MAGIC_64, cpu_type) + bytes(24)
+
+
+def _fat(*cpu_types, magic=binaries.MACHO_FAT_MAGIC):
+    entry_size = 20 if magic == binaries.MACHO_FAT_MAGIC else 32
+    header = bytearray(struct.pack(">II", magic, len(cpu_types)))
+    for cpu_type in cpu_types:
+        header += struct.pack(">I", cpu_type) + bytes(entry_size - 4)
+    return bytes(header)
+
+
+@pytest.mark.parametrize("name, kind", [
+    ("dev.mod.dll", "pe"),
+    ("dev.mod.ios.dylib", "ios"),
+    ("dev.mod.dylib", "macho"),
+    ("dev.mod.android32.so", "elf32"),
+    ("dev.mod.android64.so", "elf64"),
+    ("libc++_shared.so", None),
+    ("about.md", None),
+])
+def test_binary_kind(name, kind):
+    assert binary_kind(name) == kind
+
+
+@pytest.mark.parametrize("kind, header, platforms", [
+    ("pe", _pe(), (WINDOWS,)),
+    ("pe", _pe(0x014C), (WINDOWS,)),
+    ("elf32", _elf(1, 40), (ANDROID32,)),
+    ("elf64", _elf(2, 183), (ANDROID64,)),
+    ("ios", _thin(CPU_TYPE_ARM64), (IOS,)),
+    ("macho", _thin(CPU_TYPE_X86_64), (MAC_INTEL,)),
+    ("macho", _fat(CPU_TYPE_ARM64, CPU_TYPE_X86_64), (MAC_ARM, MAC_INTEL)),
+    ("macho", _fat(CPU_TYPE_ARM64, magic=binaries.MACHO_FAT_MAGIC_64), (MAC_ARM,)),
+])
+def test_classify_header(kind, header, platforms):
+    assert classify_header(kind, header) == platforms
+
+
+@pytest.mark.parametrize("kind, header", [
+    ("pe", b"MZ"),
+    ("pe", _pe(0xAA64)),
+    ("elf32", _elf(2, 183)),
+    ("elf64", _elf(2, 40)),
+    ("elf64", b"\x7fELF"),
+    ("ios", _thin(CPU_TYPE_X86_64)),
+    ("macho", _fat(7)),
+    ("macho", b"\xca\xfe\xba\xbe\x00\x00\x00\x2d" + bytes(32)),
+    ("macho", b"garbage!"),
+])
+def test_invalid_headers_are_bad_requests(kind, header):
+    with pytest.raises(ApiError) as excinfo:
+        classify_header(kind, header)
+    assert excinfo.value.error_type == "BadRequest"
+
+
+def test_fat_table_must_fit_in_header():
+    with pytest.raises(ApiError):
+        macho_cpu_types(_fat(CPU_TYPE_ARM64, CPU_TYPE_X86_64)[:30])
+
+
+def _archive(data):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("dev.mod.dll", data)
+    return zipfile.ZipFile(buffer)
+
+
+def test_classify_binary_reads_only_the_header():
+    with _archive(_pe() + bytes(binaries.HEADER_READ_BYTES * 4)) as archive:
+        assert classify_binary(archive, archive.getinfo("dev.mod.dll")) == (WINDOWS,)
+
+
+def test_classify_binary_ignores_a_forged_crc():
+    size = binaries.HEADER_READ_BYTES * 2
+    with _archive(_pe().ljust(size, b"\0")) as genuine, _archive(bytes(size)) as forged:
+        assert classify_binary(genuine, genuine.getinfo("dev.mod.dll")) == (WINDOWS,)
+        info = forged.getinfo("dev.mod.dll")
+        info.CRC = genuine.getinfo("dev.mod.dll").CRC
+        with pytest.raises(ApiError):
+            classify_binary(forged, info)
@@ -0,0 +1,35 @@
+import base64
+import json
+
+import pytest
+
+from src.types.api import ApiError, decode_cursor, encode_cursor
+
+
+def _raw(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_round_trip():
+    cursor = encode_cursor("downloads", (-1200, "dev.mod"))
+    assert decode_cursor("downloads", cursor, ((int, float), str)) == (-1200, "dev.mod")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    _raw({"downloads": 1}),
+    _raw(["name", -1, "dev.mod"]),
+    _raw(["downloads", -1]),
+    _raw(["downloads", "x", "y"]),
+    _raw(["downloads", True, "dev.mod"]),
+    _raw(["downloads", -1, 5]),
+])
+def test_rejects_malformed_cursors(cursor):
+    with pytest.raises(ApiError) as excinfo:
+        decode_cursor("downloads", cursor, ((int, float), str))
+    assert excinfo.value.error_type == "BadRequest"
+
+
+def test_rejects_wrong_id_type():
+    with pytest.raises(ApiError):
+        decode_cursor("developer_mods", _raw(["developer_mods", 42]), (str,))
@@ -0,0 +1,162 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from src.database import queries, statements
+from src.index import dependency_graph
+from src.index.dependency_graph import DependencyGraph
+from src.types.models.dependency import DependencyImportance, ModVersionCompare
+
+
+def _graph_from_rows(monkeypatch, versions, dependencies) -> DependencyGraph:
+    async def fetch(conn, statement, *args):
+        if statement is queries.ACCEPTED_VERSION_TARGETS:
+            return versions
+        if statement is queries.ALL_DEPENDENCIES:
+            return dependencies
+        raise AssertionError(f"Unexpected statement {statement.name}")
+
+    monkeypatch.setattr(statements, "fetch", fetch)
+    graph = DependencyGraph()
+    asyncio.run(graph.load(None))
+    return graph
+
+
+def _version(id, mod_id, version, gd="2.206", platform="win", geode="4.0.0"):
+    return {"id": id, "mod_id": mod_id, "version": version, "geode": geode, "gd": gd, "platform": platform}
+
+
+def _dependency(dependent_id, dependency_id, version, compare, importance="required"):
+    return {
+        "dependent_id": dependent_id,
+        "dependency_id": dependency_id,
+        "version": version,
+        "compare": compare,
+        "importance": importance,
+    }
+
+
+def test_load_accepts_database_less_eq_spelling(monkeypatch):
+    graph = _graph_from_rows(
+        monkeypatch,
+        [_version(1, "a", "1.0.0"), _version(2, "b", "1.0.0"), _version(3, "b", "2.0.0")],
+        [_dependency(1, "b", "1.5.0", "=<")],
+    )
+    [dependency] = graph.resolve([1], "win", "2.206", "4.0.0")[1]
+    assert dependency.compare == ModVersionCompare.less_eq
+    assert dependency.version == "1.0.0"
+
+
+def test_resolve_picks_newest_compatible_version(monkeypatch):
+    graph = _graph_from_rows(
+        monkeypatch,
+        [
+            _version(1, "a", "1.0.0"),
+            _version(2, "b", "1.0.0"),
+            _version(3, "b", "1.2.0"),
+            _version(4, "b", "1.3.0", platform="mac"),
+            _version(5, "c", "0.1.0"),
+        ],
+        [_dependency(1, "b", "1.0.0", ">="), _dependency(3, "c", "*", ">=", "recommended")],
+    )
+    resolved = graph.resolve([1], "win", "2.206", "4.0.0")[1]
+    assert [(d.dependency_id, d.version, d.importance) for d in resolved] == [
+        ("b", "1.2.0", DependencyImportance.required),
+        ("c", "0.1.0", DependencyImportance.recommended),
+    ]
+
+
+def test_latest_respects_geode_major_and_star_gd(monkeypatch):
+    graph = _graph_from_rows(
+        monkeypatch,
+        [_version(1, "a", "1.0.0", gd="*"), _version(2, "a", "2.0.0", geode="5.0.0")],
+        [],
+    )
+    assert graph.latest("a", "win", "2.206", "4.2.0").version == "1.0.0"
+    assert graph.latest("a", "win", "2.206", None).version == "2.0.0"
+    assert graph.latest("a", "mac", None, None) is None
+
+
+def test_install_set_intersects_constraints(monkeypatch):
+    graph = _graph_from_rows(
+        monkeypatch,
+        [
+            _version(1, "a", "1.0.0"),
+            _version(2, "b", "1.0.0"),
+            _version(3, "c", "1.0.0"),
+            _version(4, "c", "1.5.0"),
+            _version(5, "c", "2.0.0"),
+        ],
+        [_dependency(1, "c", "1.0.0", ">="), _dependency(2, "c", "1.5.0", "=<")],
+    )
+    roots = [graph.latest("a", "win", None, None), graph.latest("b", "win", None, None)]
+    chosen, required_by, unsatisfied = graph.install_set(roots, "win", None, None)
+    versions = {graph.mod_id(mod): node.version for mod, node in chosen.items()}
+    assert versions == {"a": "1.0.0", "b": "1.0.0", "c": "1.5.0"}
+    assert not unsatisfied
+
+
+def test_refresh_replaces_versions_of_changed_mods(monkeypatch):
+    graph = _graph_from_rows(
+        monkeypatch,
+        [_version(1, "a", "1.0.0"), _version(2, "b", "1.0.0"), _version(3, "b", "2.0.0")],
+        [_dependency(1, "b", "1.0.0", ">=")],
+    )
+
+    # b 2.0.0 was rejected and a 1.1.0 accepted, now wanting b below 2.0.0
+    async def fetch(conn, statement, *args):
+        if statement is queries.ACCEPTED_VERSION_TARGETS:
+            assert args == (["a", "b"],)
+            return [_version(1, "a", "1.0.0"), _version(4, "a", "1.1.0"), _version(2, "b", "1.0.0")]
+        if statement is queries.DEPENDENCIES_FOR_VERSIONS:
+            return [_dependency(4, "b", "2.0.0", "<")]
+        raise AssertionError(f"Unexpected statement {statement.name}")
+
+    monkeypatch.setattr(statements, "fetch", fetch)
+    asyncio.run(graph.refresh(None, ["a", "b"]))
+    assert graph.latest("a", "win", None, None).version == "1.1.0"
+    assert graph.latest("b", "win", None, None).version == "1.0.0"
+    [dependency] = graph.resolve([4], "win", "2.206", "4.0.0")[4]
+    assert (dependency.compare, dependency.version) == (ModVersionCompare.less, "1.0.0")
+    # Version 1's edges were not returned, so they're gone
+    assert not graph.resolve([1], "win", "2.206", "4.0.0").get(1)
+
+
+class _Listener:
+    def subscribe(self, channel, on_notify, on_reset):
+        self.on_notify = on_notify
+
+
+class _Pool:
+    @asynccontextmanager
+    async def acquire(self):
+        yield None
+
+
+def test_refresh_during_a_load_lands_on_the_new_graph(monkeypatch):
+    async def run():
+        monkeypatch.setattr(dependency_graph, "_lock", asyncio.Lock())
+        release = asyncio.Event()
+
+        async def fetch(conn, statement, *args):
+            if statement is queries.ACCEPTED_VERSION_TARGETS and not args:
+                # The load's snapshot predates the commit of a 1.1.0
+                await release.wait()
+                return [_version(1, "a", "1.0.0")]
+            if statement is queries.ACCEPTED_VERSION_TARGETS:
+                return [_version(1, "a", "1.0.0"), _version(2, "a", "1.1.0")]
+            return []
+
+        monkeypatch.setattr(statements, "fetch", fetch)
+        monkeypatch.setattr(dependency_graph, "_graph", DependencyGraph())
+        listener = _Listener()
+        dependency_graph.watch_dependency_graph(listener, _Pool())
+        load = asyncio.create_task(dependency_graph.load_dependency_graph(None))
+        await asyncio.sleep(0)
+        listener.on_notify("a")
+        await asyncio.sleep(0)
+        release.set()
+        await load
+        await asyncio.gather(*dependency_graph._tasks)
+        return dependency_graph.get_dependency_graph().latest("a", "win", None, None).version
+
+    assert asyncio.run(run()) == "1.1.0"
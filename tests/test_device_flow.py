@@ -0,0 +1,38 @@
+import asyncio
+
+from src.auth.device_flow import FAILED, PENDING, DeviceFlowScheduler, LoginAttempt
+
+
+class _Github:
+    def __init__(self, poll):
+        self.poll = poll
+
+    async def poll_device_code(self, device_code):
+        return self.poll()
+
+
+async def _authorized(token):
+    return "index-token"
+
+
+def _poll(github):
+    async def run():
+        scheduler = DeviceFlowScheduler(github, _authorized)
+        attempt = LoginAttempt("127.0.0.1", "device", "USER-CODE", "https://github.com/login/device", 5, 900)
+        await scheduler._poll(attempt)
+        return attempt
+
+    return asyncio.run(run())
+
+
+def test_unexpected_errors_fail_the_attempt():
+    def poll():
+        raise KeyError("access_token")
+
+    attempt = _poll(_Github(poll))
+    assert attempt.status == FAILED and attempt.done.is_set()
+
+
+def test_pending_attempts_are_polled_again():
+    attempt = _poll(_Github(lambda: {"error": "authorization_pending"}))
+    assert attempt.status == PENDING
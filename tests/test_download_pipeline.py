@@ -0,0 +1,58 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from src.database.repository import mod_downloads
+from src.downloads import pipeline
+from src.downloads.pipeline import DownloadPipeline
+
+
+class FakePool:
+    @asynccontextmanager
+    async def acquire(self):
+        yield None
+
+
+def _pipeline(monkeypatch, failures):
+    written = []
+
+    async def insert_batch(conn, batch):
+        if failures:
+            failures.pop()
+            raise ConnectionError("database went away")
+        written.extend(batch)
+        return len(batch)
+
+    monkeypatch.setattr(mod_downloads, "insert_batch", insert_batch)
+    return DownloadPipeline(FakePool(), flush_interval=60, batch_size=2, max_queue=10, dedup_window=60), written
+
+
+def test_failed_batch_is_retried_first(monkeypatch):
+    async def run():
+        downloads, written = _pipeline(monkeypatch, [True])
+        for version in (1, 2, 3):
+            downloads.record(version, "1.1.1.1")
+        assert await downloads.flush() is None
+        assert downloads.metrics()["retrying"] == 2
+        downloads.record(4, "1.1.1.1")
+        assert await downloads.flush() == 2
+        await downloads._drain()
+        return [row[0] for row in written], downloads.metrics()
+
+    versions, metrics = asyncio.run(run())
+    assert versions == [1, 2, 3, 4]
+    assert (metrics["flushed"], metrics["failed_flushes"], metrics["dropped"]) == (4, 1, 0)
+
+
+def test_batch_is_dropped_after_repeated_failures(monkeypatch):
+    async def run():
+        downloads, written = _pipeline(monkeypatch, [True] * pipeline.MAX_FLUSH_ATTEMPTS)
+        downloads.record(1, "1.1.1.1")
+        for _ in range(pipeline.MAX_FLUSH_ATTEMPTS):
+            assert await downloads.flush() is None
+        downloads.record(2, "1.1.1.1")
+        assert await downloads.flush() == 1
+        return [row[0] for row in written], downloads.metrics()
+
+    versions, metrics = asyncio.run(run())
+    assert versions == [2]
+    assert metrics["dropped"] == 1 and metrics["retrying"] == 0
@@ -0,0 +1,53 @@
+import asyncio
+
+from src.database import queries, statements
+from src.types.models.install_set import ResolveRequest, _from_graph, _partial_graph
+
+VERSIONS = {
+    "a": [(1, "1.0.0")],
+    "b": [(2, "1.0.0")],
+    "c": [(3, "1.0.0"), (4, "1.5.0"), (5, "2.0.0"), (6, "not-semver")],
+}
+DEPENDENCIES = {
+    1: [("c", "1.0.0", ">=")],
+    2: [("c", "1.5.0", "=<")],
+}
+
+
+def _partial(monkeypatch, mods):
+    requested = []
+
+    async def fetch(conn, statement, *args):
+        if statement is queries.ACCEPTED_VERSION_TARGETS:
+            requested.append(args[0])
+            return [
+                {"id": id, "mod_id": mod_id, "version": version, "geode": "4.0.0", "gd": "2.206", "platform": "win"}
+                for mod_id in args[0]
+                for id, version in VERSIONS.get(mod_id, ())
+            ]
+        if statement is queries.DEPENDENCIES_FOR_VERSIONS:
+            return [
+                {"dependent_id": id, "dependency_id": mod_id, "version": version, "compare": compare, "importance": "required"}
+                for id in args[0]
+                for mod_id, version, compare in DEPENDENCIES.get(id, ())
+            ]
+        raise AssertionError(f"Unexpected statement {statement.name}")
+
+    monkeypatch.setattr(statements, "fetch", fetch)
+    return asyncio.run(_partial_graph(mods, None)), requested
+
+
+def test_partial_graph_loads_dependencies_level_by_level(monkeypatch):
+    _, requested = _partial(monkeypatch, ["a", "b"])
+    assert requested == [["a", "b"], ["c"]]
+
+
+def test_fallback_intersects_constraints_and_records_requirers(monkeypatch):
+    graph, _ = _partial(monkeypatch, ["a", "b", "missing"])
+    chosen, missing = _from_graph(ResolveRequest(mods=["a", "b", "missing"], platform="win"), graph)
+    assert chosen == {
+        "a": (1, "1.0.0", []),
+        "b": (2, "1.0.0", []),
+        "c": (4, "1.5.0", ["a", "b"]),
+    }
+    assert missing == ["missing"]
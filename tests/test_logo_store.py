@@ -0,0 +1,73 @@
+import pytest
+from PIL import Image
+
+from src.storage import logos
+from src.storage.logos import LogoStore, render_logo_variants
+from src.webhook.discord import NewModAcceptedEvent
+
+CACHE_BYTES = 1024 * 1024
+
+
+def _variants(color):
+    return render_logo_variants(Image.new("RGBA", (336, 336), color))
+
+
+def test_put_round_trips_and_leaves_no_temp_files(tmp_path):
+    store = LogoStore(tmp_path, CACHE_BYTES)
+    variants = _variants("red")
+    digest = store.put(variants)
+    assert store.hash_for("dev.mod") is None
+    store.point("dev.mod", digest)
+    assert store.hash_for("dev.mod") == digest
+    assert store.get(digest, 128, "webp") == variants["128.webp"]
+    assert not [path for path in tmp_path.rglob(".*")]
+
+
+def test_pointers_written_by_another_store_are_picked_up(tmp_path, monkeypatch):
+    reader = LogoStore(tmp_path, CACHE_BYTES)
+    assert reader.hash_for("dev.mod") is None
+    writer = LogoStore(tmp_path, CACHE_BYTES)
+    first = writer.put(_variants("red"))
+    writer.point("dev.mod", first)
+    # Misses are remembered until the pointer TTL runs out
+    monkeypatch.setattr(logos, "POINTER_TTL", 0)
+    assert reader.hash_for("dev.mod") == first
+    second = writer.put(_variants("blue"))
+    writer.point("dev.mod", second)
+    assert reader.hash_for("dev.mod") == second != first
+
+
+def test_events_link_the_current_hashed_logo(tmp_path, monkeypatch):
+    store = LogoStore(tmp_path, CACHE_BYTES)
+    digest = store.put(_variants("red"))
+    store.point("dev.mod", digest)
+    monkeypatch.setattr(logos, "_store", store)
+    event = NewModAcceptedEvent("Mod", "1.0.0", "dev.mod", {}, {}, "https://api")
+    assert event.logo_hash == digest
+    other = NewModAcceptedEvent("Mod", "1.0.0", "dev.other", {}, {}, "https://api")
+    assert other.logo_hash is None
+
+
+def test_invalid_mod_ids_never_reach_the_filesystem(tmp_path):
+    store = LogoStore(tmp_path / "logos", CACHE_BYTES)
+    digest = store.put(_variants("red"))
+    for mod_id in ("../../x", "dev.mod/../x", "dev.mod\n", "Dev.Mod"):
+        with pytest.raises(ValueError):
+            store.point(mod_id, digest)
+        assert store.hash_for(mod_id) is None
+    assert not (tmp_path / "x").exists()
+    assert len(store._by_mod) == 0
+
+
+def test_pointers_need_a_stored_logo(tmp_path):
+    store = LogoStore(tmp_path, CACHE_BYTES)
+    with pytest.raises(ValueError):
+        store.point("dev.mod", "0" * 64)
+
+
+def test_pointer_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(logos, "MAX_POINTERS", 3)
+    store = LogoStore(tmp_path, CACHE_BYTES)
+    for i in range(10):
+        store.hash_for(f"dev.missing{i}")
+    assert list(store._by_mod) == ["dev.missing7", "dev.missing8", "dev.missing9"]
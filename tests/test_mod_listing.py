@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.index.mod_listing import ListedMod, ModListingIndex
+from src.types.api import ApiError
+
+EPOCH = datetime(2024, 1, 1)
+
+
+def _mod(id, downloads=0, name=None, tags=(), targets=(("2.206", "win"),), age=0, description=None):
+    return ListedMod(
+        id=id,
+        name=name or id,
+        description=description,
+        version="1.0.0",
+        download_count=downloads,
+        created_at=EPOCH + timedelta(days=age),
+        updated_at=EPOCH + timedelta(days=age),
+        tag_ids=tags,
+        targets=targets,
+    )
+
+
+@pytest.fixture
+def index():
+    index = ModListingIndex()
+    index.set_tags({1: "gameplay", 2: "offline"})
+    index.upsert(_mod("dev.a", 300, "Alpha", tags=(1,), age=1))
+    index.upsert(_mod("dev.b", 200, "beta", tags=(1, 2), targets=(("*", "android64"),), age=3))
+    index.upsert(_mod("dev.c", 100, "Gamma", targets=(("2.206", "mac"), ("2.205", "win")), age=2, description="fast"))
+    return index
+
+
+def _ids(result):
+    return [mod.id for mod in result.mods]
+
+
+def test_sorts(index):
+    assert _ids(index.search()) == ["dev.a", "dev.b", "dev.c"]
+    assert _ids(index.search(sort="name")) == ["dev.a", "dev.b", "dev.c"]
+    assert _ids(index.search(sort="recently_published")) == ["dev.b", "dev.c", "dev.a"]
+
+
+def test_filters_and_facets(index):
+    result = index.search(tags=["gameplay"])
+    assert (_ids(result), result.count) == (["dev.a", "dev.b"], 2)
+    assert result.facets.tags == {"gameplay": 2, "offline": 1}
+    assert _ids(index.search(query="FAST")) == ["dev.c"]
+    # "*" covers every GD version
+    assert _ids(index.search(gd="2.206")) == ["dev.a", "dev.b", "dev.c"]
+    # Platform and GD version have to come from the same target
+    assert _ids(index.search(platform="win", gd="2.206")) == ["dev.a"]
+    with pytest.raises(ApiError):
+        index.search(tags=["unknown"])
+
+
+def test_cursor_pages_cover_everything_once(index):
+    seen = []
+    cursor = None
+    while True:
+        result = index.search(sort="recently_updated", limit=1, cursor=cursor)
+        seen += _ids(result)
+        cursor = result.next_cursor
+        if cursor is None:
+            break
+    assert seen == ["dev.b", "dev.c", "dev.a"]
+
+
+def test_cursor_survives_removal_of_its_mod(index):
+    cursor = index.search(limit=1).next_cursor
+    index.remove("dev.a")
+    assert _ids(index.search(cursor=cursor)) == ["dev.b", "dev.c"]
+
+
+def test_upsert_replaces_and_reuses_slots(index):
+    index.upsert(_mod("dev.c", 1000, "Gamma", tags=(2,)))
+    result = index.search(tags=["offline"])
+    assert _ids(result) == ["dev.c", "dev.b"]
+    assert len(index) == 3
+    index.remove("dev.b")
+    index.upsert(_mod("dev.d", 50))
+    assert index.get("dev.d").slot == 1
+    assert _ids(index.search(tags=["offline"])) == ["dev.c"]
+
+
+
+def _pages(index, **filters):
+    seen, cursor = [], None
+    while True:
+        result = index.search(limit=7, cursor=cursor, **filters)
+        seen += _ids(result)
+        cursor = result.next_cursor
+        if cursor is None:
+            return seen
+
+
+# Few matches sort only the matches, many walk the sort order
+@pytest.mark.parametrize("filters, matches", [
+    ({}, lambda i: True),
+    ({"tags": ["offline"]}, lambda i: i % 3 == 0),
+    ({"query": "mod 1"}, lambda i: str(i).startswith("1")),
+    ({"query": "mod 5"}, lambda i: str(i).startswith("5")),
+    ({"query": "mod 42"}, lambda i: i == 42),
+])
+def test_pages_list_every_match_in_order(filters, matches):
+    index = ModListingIndex()
+    index.set_tags({1: "gameplay", 2: "offline"})
+    for i in range(200):
+        index.upsert(_mod(f"dev.m{i}", downloads=i * 7 % 50, name=f"Mod {i}", tags=(1,) if i % 3 else (1, 2)))
+    expected = sorted((i for i in range(200) if matches(i)), key=lambda i: (-(i * 7 % 50), f"dev.m{i}"))
+    assert _pages(index, **filters) == [f"dev.m{i}" for i in expected]
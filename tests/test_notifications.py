@@ -0,0 +1,32 @@
+import asyncio
+
+import asyncpg
+
+from src.database import notifications
+from src.database.notifications import NotificationListener
+
+
+def test_listener_reconnects_after_interface_errors(monkeypatch):
+    attempts = []
+
+    async def connect(**kwargs):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise asyncpg.InterfaceError("connection was closed in the middle of operation")
+        raise asyncio.CancelledError()
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    monkeypatch.setattr(notifications, "RECONNECT_DELAY", 0)
+    resets = []
+    listener = NotificationListener()
+    listener.subscribe("channel", lambda payload: None, lambda: resets.append(1))
+
+    async def run():
+        try:
+            await listener._run()
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert len(attempts) == 3
+    assert len(resets) == 2
@@ -0,0 +1,77 @@
+import asyncio
+
+from pydantic import BaseModel
+from starlette.requests import Request
+
+from src.cache.responses import CachedResponse, MemoryBackend, ResponseCache
+
+
+class Payload(BaseModel):
+    value: int
+
+
+def _request(query=b"", etag=None):
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": "/v1/mods", "query_string": query, "headers": headers})
+
+
+def _respond(cache, request, tags=("mods",)):
+    calls = []
+
+    async def build():
+        calls.append(1)
+        return Payload(value=len(calls))
+
+    response = asyncio.run(cache.respond(request, tags, build))
+    return response, bool(calls)
+
+
+def _key(query):
+    return ResponseCache.normalise(_request(query))
+
+
+def test_normalise_orders_params_and_tag_sets():
+    assert _key(b"tags=b,a,&page=1") == _key(b"page=1&tags=a,b") == "/v1/mods?page=1&tags=a%2Cb"
+
+
+def test_normalise_keeps_everything_the_endpoint_sees():
+    assert _key(b"Query=foo") != _key(b"query=foo")
+    assert _key(b"query=a,b") != _key(b"query=b,a")
+    assert _key(b"page=1&page=2") != _key(b"page=2&page=1")
+    assert _key(b"query=a%26page%3D2") != _key(b"query=a&page=2")
+    assert _key(b"query=") != _key(b"")
+
+
+def test_hit_304_and_invalidation():
+    cache = ResponseCache(MemoryBackend(1024))
+    response, built = _respond(cache, _request())
+    assert built and response.body == b'{"value":1}'
+    etag = response.headers["etag"]
+
+    response, built = _respond(cache, _request())
+    assert not built and response.headers["etag"] == etag
+    response, built = _respond(cache, _request(etag=etag))
+    assert response.status_code == 304 and not built
+
+    cache.invalidate(["mods"])
+    response, built = _respond(cache, _request(etag=etag))
+    assert response.status_code == 200 and built and response.headers["etag"] != etag
+    assert (cache.hits, cache.not_modified, cache.misses) == (1, 1, 2)
+
+
+def test_reset_changes_every_etag():
+    cache = ResponseCache(MemoryBackend(1024))
+    etag = _respond(cache, _request())[0].headers["etag"]
+    cache.reset()
+    assert _respond(cache, _request())[0].headers["etag"] != etag
+
+
+def test_memory_backend_is_byte_bounded():
+    backend = MemoryBackend(10)
+    backend.set("a", CachedResponse(b"12345", "application/json", '"a"'))
+    backend.set("b", CachedResponse(b"12345", "application/json", '"b"'))
+    backend.get("a")
+    backend.set("c", CachedResponse(b"123", "application/json", '"c"'))
+    assert (backend.get("a") is not None, backend.get("b"), backend.size_bytes) == (True, None, 8)
+    backend.set("huge", CachedResponse(b"x" * 11, "application/json", '"h"'))
+    assert backend.get("huge") is None and len(backend) == 2
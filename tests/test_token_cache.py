@@ -0,0 +1,51 @@
+from src.auth import token_cache
+from src.auth.token_cache import TokenCache
+from src.types.models.developer import Developer
+
+
+def _developer(id):
+    return Developer(id=id, username=f"dev{id}", display_name=f"Dev {id}", verified=False, admin=False, github_id=id)
+
+
+def test_hits_misses_and_negative_entries():
+    cache = TokenCache(ttl=60, negative_ttl=60, max_entries=10)
+    key = TokenCache.key("token")
+    assert key != "token"
+    assert cache.get(key) == (False, None)
+    cache.put(key, _developer(1))
+    assert cache.get(key)[1].id == 1
+    cache.put(TokenCache.key("bad"), None)
+    assert cache.get(TokenCache.key("bad")) == (True, None)
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_entries_expire():
+    cache = TokenCache(ttl=60, negative_ttl=0, max_entries=10)
+    cache.put("bad", None)
+    assert cache.get("bad") == (False, None)
+    assert cache.metrics()["entries"] == 0
+
+
+def test_lru_bound():
+    cache = TokenCache(ttl=60, negative_ttl=60, max_entries=2)
+    cache.put("a", _developer(1))
+    cache.put("b", _developer(2))
+    cache.get("a")
+    cache.put("c", _developer(3))
+    assert [cache.get(key)[0] for key in ("a", "b", "c")] == [True, False, True]
+
+
+def test_invalidations(monkeypatch):
+    cache = TokenCache(ttl=60, negative_ttl=60, max_entries=10)
+    monkeypatch.setattr(token_cache, "_cache", cache)
+    cache.put("a", _developer(1))
+    cache.put("b", _developer(1))
+    cache.put("c", _developer(2))
+    generation = cache.generation
+    token_cache._on_invalidation("developer:1")
+    assert [cache.get(key)[0] for key in ("a", "b", "c")] == [False, False, True]
+    assert cache.generation == generation + 1
+    token_cache._on_invalidation("developer:nope")
+    assert cache.get("c")[0]
+    token_cache._on_invalidation("all")
+    assert cache.get("c") == (False, None)
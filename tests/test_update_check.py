@@ -0,0 +1,33 @@
+import asyncio
+
+from src.database import queries, statements
+from src.types.models import update_check
+from src.types.models.update_check import InstalledMod, UpdateCheckRequest, check_updates
+
+
+def _check(monkeypatch, installed, rows):
+    async def fetch(conn, statement, *args):
+        assert statement is queries.LATEST_COMPATIBLE_VERSIONS
+        return rows
+
+    async def no_supersedes(*args):
+        return {}
+
+    monkeypatch.setattr(statements, "fetch", fetch)
+    monkeypatch.setattr(update_check, "fetch_supersedes_for", no_supersedes)
+    request = UpdateCheckRequest(mods=[InstalledMod(id=id, version=version) for id, version in installed.items()])
+    result = asyncio.run(check_updates(request, "https://api", None))
+    return {update.id: update.version for update in result.updates}
+
+
+def _row(mod_id, version, id=1):
+    return {"mod_id": mod_id, "id": id, "version": version}
+
+
+def test_newest_parseable_row_wins(monkeypatch):
+    rows = [_row("dev.a", "2.0"), _row("dev.a", "1.5.0"), _row("dev.a", "1.4.0"), _row("dev.b", "1.0.0")]
+    assert _check(monkeypatch, {"dev.a": "1.0.0", "dev.b": "1.0.0"}, rows) == {"dev.a": "1.5.0"}
+
+
+def test_unparseable_installed_versions_are_updated(monkeypatch):
+    assert _check(monkeypatch, {"dev.a": "nightly"}, [_row("dev.a", "1.0.0")]) == {"dev.a": "1.0.0"}
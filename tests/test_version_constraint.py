@@ -0,0 +1,80 @@
+import pytest
+
+from src.types.models.dependency import ModVersionCompare
+from src.types.version_constraint import (
+    VersionConstraint,
+    normalize_compare,
+    satisfying_range,
+    try_version_key,
+    version_key,
+)
+
+
+def test_semver_precedence():
+    versions = ["1.0.0-alpha", "1.0.0-alpha.1", "1.0.0-alpha.beta", "1.0.0-beta.2", "1.0.0-beta.11", "1.0.0", "1.0.1"]
+    assert sorted(versions, key=version_key) == versions
+    assert version_key("v1.2.3+build.5") == version_key("1.2.3")
+
+
+@pytest.mark.parametrize("version", ["1.0", "01.0.0", "1.0.0-", "latest", "", "1.0.0\n", "\u0661.0.0"])
+def test_invalid_versions(version):
+    assert try_version_key(version) is None
+    with pytest.raises(ValueError):
+        version_key(version)
+
+
+@pytest.mark.parametrize("text, compare, version", [
+    (">=1.2.0", ">=", "1.2.0"),
+    ("<=1.2.0", "<=", "1.2.0"),
+    ("=<1.2.0", "<=", "1.2.0"),
+    ("=1.2.0", "=", "1.2.0"),
+    ("<v1.2.0", "<", "1.2.0"),
+    (">1.2.0", ">", "1.2.0"),
+    ("1.2.0", ">=", "1.2.0"),
+])
+def test_parse(text, compare, version):
+    constraint = VersionConstraint.parse(text)
+    assert (constraint.compare, constraint.version) == (compare, version)
+
+
+def test_constraints_are_interned():
+    assert VersionConstraint.parse(">=1.0.0") is VersionConstraint.parse(">=1.0.0")
+    assert VersionConstraint.of("v1.0.0", ModVersionCompare.more_eq) is VersionConstraint.parse(">=1.0.0")
+    assert VersionConstraint.of("1.0.0", "=<") is VersionConstraint.parse("<=1.0.0")
+
+
+def test_any():
+    constraint = VersionConstraint.parse("*")
+    assert constraint.is_any and constraint.text == "*"
+    assert constraint.matches_version("0.0.1-alpha")
+    assert not constraint.matches_version("not a version")
+
+
+@pytest.mark.parametrize("text, matching", [
+    (">=1.1.0", ["1.1.0", "1.2.0", "2.0.0"]),
+    (">1.1.0", ["1.2.0", "2.0.0"]),
+    ("=1.1.0", ["1.1.0"]),
+    ("<1.1.0", ["1.0.0", "1.1.0-beta"]),
+    ("<=1.1.0", ["1.0.0", "1.1.0-beta", "1.1.0"]),
+])
+def test_matches_and_range_agree(text, matching):
+    versions = ["1.0.0", "1.1.0-beta", "1.1.0", "1.2.0", "2.0.0"]
+    keys = [version_key(version) for version in versions]
+    constraint = VersionConstraint.parse(text)
+    assert [v for v in versions if constraint.matches_version(v)] == matching
+    lo, hi = constraint.range_in(keys)
+    assert versions[lo:hi] == matching
+
+
+def test_satisfying_range_intersects():
+    keys = [version_key(v) for v in ["1.0.0", "1.5.0", "2.0.0", "2.5.0"]]
+    constraints = [VersionConstraint.parse(">=1.5.0"), VersionConstraint.parse("<2.5.0")]
+    assert satisfying_range(keys, constraints) == (1, 3)
+    lo, hi = satisfying_range(keys, constraints + [VersionConstraint.parse(">2.5.0")])
+    assert lo == hi
+
+
+def test_normalize_compare_rejects_unknown_operators():
+    assert normalize_compare("=<") == "<="
+    with pytest.raises(ValueError):
+        normalize_compare("~")